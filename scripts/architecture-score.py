@@ -12,89 +12,108 @@ Multi-region/DR, Naming, Cost.
 
 Controls: headers per check; see the "controls" field of each record.
 
+Checks are declared in CHECKS (scripts/lib/checks.py format): a selector over
+the vars trees, a per-node match and an evaluate step producing the record's
+status and explanation. All selectors are evaluated in one walk per tree.
+Facts also checked by compliance-check (policy wildcards, Workload Identity,
+audit stacks, the loaded vars) come from scripts/lib/facts.py, once per run.
+
 Usage:
   python3 scripts/architecture-score.py                 # write both artifacts
   python3 scripts/architecture-score.py --validate-schema
   python3 scripts/architecture-score.py --min-score 85 --fail-on FAIL
   python3 scripts/architecture-score.py --quick         # no file writes, exit code only
+  python3 scripts/architecture-score.py --records records.ndjson  # + per-resource rows
+
+ARCHITECTURE_REPORT.json stays the schema v1 view: one record per check.
+Checks that find offending resources also emit one detail record each
+(report.record(resource=...), score_impact 0), kept in a columnar store.
+--records streams every record to NDJSON as it is produced, then a summary
+line (report.read_ndjson() / read_ndjson_summary() read it back).
 """
 
 import argparse
 import ipaddress
-import json
 import re
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from lib import loaders, report as rp  # noqa: E402
+from lib import checks, facts, hcl, loaders, report as rp, varindex as vx  # noqa: E402
 
 REPO = loaders.REPO_ROOT
 REPORT_JSON = REPO / "ARCHITECTURE_REPORT.json"
 SCORECARD_MD = REPO / "ARCHITECTURE_SCORECARD.md"
 SOURCES = [loaders.AWS_VARS, loaders.GCP_VARS]
+GENERATOR = "scripts/architecture-score.py"
 
 STG_AWS = [("us", "stg"), ("eu", "stg")]
 AWS_DATA_SERVICES = ["rds", "aurora", "dynamodb", "redis", "s3"]
+ENCRYPTION_ENVS = [f"{r}-{e}" for r, e in STG_AWS + [("us", "dev")]]
+GCP_CMEK_ENVS = [("stg", "eu"), ("dev", "eu")]
+# both GCP env shapes: envs.{folder}.{env}.resources and the flat
+# envs.{folder}.resources (global, us), whose env binds as "_flat"
+GCP_ENV_RESOURCES = ["envs.{folder}.{env}.resources", "envs.{folder}.resources"]
 
 
-def aws_resources(aws, region, env):
-    return (aws.get("Environments", {}).get(f"{region}-{env}", {})
-            .get("Resources", {}) or {})
+def _inputs(block):
+    return ((block or {}).get("inputs", {}) or {}) if isinstance(block, dict) else {}
 
 
-def gcp_resources(gcp, folder, env):
-    return (gcp.get("envs", {}).get(folder, {}).get(env, {})
-            .get("resources", {}) or {})
+def _gcp_env(where):
+    return where["folder"], where.get("env", "_flat")
 
 
-def iter_gcp_env_resources(gcp):
-    """Yield (folder, env, resources) handling both shapes: envs.{folder}.{env}
-    .resources and the flat envs.{folder}.resources (global, us)."""
-    for folder, envs in (gcp.get("envs", {}) or {}).items():
-        if not isinstance(envs, dict):
-            continue
-        if "resources" in envs:
-            yield folder, "_flat", envs.get("resources") or {}
-            continue
-        for env, envval in envs.items():
-            if isinstance(envval, dict) and "resources" in envval:
-                yield folder, env, envval.get("resources") or {}
+def _details(messages, status):
+    """Per-resource details from "resource: problem" messages; status is a
+    string or a fn(message) -> status."""
+    out = []
+    for m in messages:
+        resource, _, problem = m.partition(": ")
+        out.append((resource, status(m) if callable(status) else status, problem))
+    return out
+
+
+def stack_wires_cmek(folder, env, resource):
+    path = loaders.GCP_ENVS / folder / env / resource / "terragrunt.hcl"
+    if not path.exists():
+        return False
+    inputs = hcl.stack(path)["inputs"]
+    return "encryption_key_name" in inputs or "service_encryption_key" in inputs
 
 
-def collect_cidrs(aws, gcp):
-    """(label, network) pairs for every VPC-level CIDR declared in vars."""
+# -- IP Planning ------------------------------------------------------------
+
+def match_aws_vpc_cidr(node, where):
+    cidr = node.get("vpc_cidr") if isinstance(node, dict) else None
+    return [(f"aws/{where['envkey']}/vpc", cidr)] if cidr else []
+
+
+def match_gcp_cidrs(node, where):
+    folder, env = _gcp_env(where)
     out = []
-    for envkey, envval in (aws.get("Environments", {}) or {}).items():
-        res = (envval or {}).get("Resources", {}) or {}
-        vpc = (res.get("vpc") or {}).get("inputs", {}) or {}
-        cidr = vpc.get("vpc_cidr")
-        if cidr:
-            out.append((f"aws/{envkey}/vpc", cidr))
-    for folder, env, res in iter_gcp_env_resources(gcp):
-            netvpc = (res.get("net-vpc") or {}).get("inputs", {}) or {}
-            for sn in netvpc.get("subnets", []) or []:
-                ip = sn.get("subnet_ip")
-                if ip:
-                    out.append((f"gcp/{folder}/{env}/{sn.get('subnet_name')}", ip))
-            for rng in (netvpc.get("secondary_ranges") or {}).values():
-                for r in rng or []:
-                    if r.get("ip_cidr_range"):
-                        out.append((f"gcp/{folder}/{env}/secondary/{r.get('range_name')}",
-                                    r["ip_cidr_range"]))
+    for sn in (node or {}).get("subnets", []) or []:
+        ip = sn.get("subnet_ip")
+        if ip:
+            out.append((f"gcp/{folder}/{env}/{sn.get('subnet_name')}", ip))
+    for rng in ((node or {}).get("secondary_ranges") or {}).values():
+        for r in rng or []:
+            if r.get("ip_cidr_range"):
+                out.append((f"gcp/{folder}/{env}/secondary/{r.get('range_name')}",
+                            r["ip_cidr_range"]))
     return out
 
 
-def check_ip_planning(aws, gcp):
-    recs = []
+def eval_cidr_overlap(found, ctx):
     cidrs = []
     bad = []
-    for label, c in collect_cidrs(aws, gcp):
+    for label, c in found:
         try:
             cidrs.append((label, ipaddress.ip_network(c)))
         except ValueError:
             bad.append(f"{label}={c}")
-    overlaps = []
+    overlaps, details = [], [(label.split("=", 1)[0], "FAIL", f"unparseable CIDR {label}")
+                             for label in bad]
     for i in range(len(cidrs)):
         for j in range(i + 1, len(cidrs)):
             li, ni = cidrs[i]
@@ -106,335 +125,364 @@ def check_ip_planning(aws, gcp):
                 continue
             if ni.overlaps(nj):
                 overlaps.append(f"{li}({ni}) <-> {lj}({nj})")
-    status = "FAIL" if overlaps or bad else "PASS"
-    recs.append(rp.record(
-        "IP Planning", "cidr-overlap", status, 8,
-        ("No overlapping CIDRs across AWS VPCs and GCP subnets"
-         if status == "PASS" else
-         f"Overlaps: {overlaps[:5]}; unparseable: {bad[:5]}"),
-        "aws vars.yaml + gcp vars.yaml (all vpc/subnet cidrs)",
-        ["PCI-DSS 1.1", "CIS-3.1"]))
-
-    # GKE secondary ranges present + sized for every env that runs svc-gke
+                details.append((li, "FAIL", f"{ni} overlaps {lj}({nj})"))
+    if overlaps or bad:
+        return "FAIL", f"Overlaps: {overlaps[:5]}; unparseable: {bad[:5]}", details
+    return "PASS", "No overlapping CIDRs across AWS VPCs and GCP subnets"
+
+
+def match_gke_secondary_ranges(res, where):
+    """Secondary ranges present + sized for an env that runs svc-gke."""
+    if not isinstance(res, dict) or "svc-gke" not in res:
+        return []
+    folder, env = _gcp_env(where)
+    netvpc = _inputs(res.get("net-vpc"))
+    sec = netvpc.get("secondary_ranges") or {}
+    ranges = [r for lst in sec.values() for r in (lst or [])]
+    if not ranges:
+        return [f"{folder}/{env}: no secondary_ranges"]
     problems = []
-    for folder, env, res in iter_gcp_env_resources(gcp):
-            if "svc-gke" not in res:
-                continue
-            netvpc = (res.get("net-vpc") or {}).get("inputs", {}) or {}
-            sec = netvpc.get("secondary_ranges") or {}
-            ranges = [r for lst in sec.values() for r in (lst or [])]
-            if not ranges:
-                problems.append(f"{folder}/{env}: no secondary_ranges")
-                continue
-            for r in ranges:
-                try:
-                    n = ipaddress.ip_network(r["ip_cidr_range"])
-                except (KeyError, ValueError):
-                    problems.append(f"{folder}/{env}: bad range {r}")
-                    continue
-                name = (r.get("range_name") or "").lower()
-                if "pod" in name and n.prefixlen > 21:
-                    problems.append(f"{folder}/{env}: pods range {n} smaller than /21")
-                if ("service" in name or "svc" in name) and n.prefixlen > 24:
-                    problems.append(f"{folder}/{env}: services range {n} smaller than /24")
-    recs.append(rp.record(
-        "IP Planning", "gke-secondary-ranges", "PASS" if not problems else "WARN", 4,
-        "All GKE envs declare adequately sized secondary ranges" if not problems
-        else f"Issues: {problems[:6]}",
-        "gcp vars.yaml envs.*.*.resources.net-vpc.inputs.secondary_ranges",
-        ["CIS GKE 5.6.2"]))
-    return recs
-
-
-def check_segmentation(aws, gcp):
-    recs = []
+    for r in ranges:
+        try:
+            n = ipaddress.ip_network(r["ip_cidr_range"])
+        except (KeyError, ValueError):
+            problems.append(f"{folder}/{env}: bad range {r}")
+            continue
+        name = (r.get("range_name") or "").lower()
+        if "pod" in name and n.prefixlen > 21:
+            problems.append(f"{folder}/{env}: pods range {n} smaller than /21")
+        if ("service" in name or "svc" in name) and n.prefixlen > 24:
+            problems.append(f"{folder}/{env}: services range {n} smaller than /24")
+    return problems
+
+
+def eval_gke_secondary_ranges(problems, ctx):
+    if problems:
+        return "WARN", f"Issues: {problems[:6]}", _details(problems, "WARN")
+    return "PASS", "All GKE envs declare adequately sized secondary ranges"
+
+
+# -- Segmentation -----------------------------------------------------------
+
+def eval_egress_inspection(_, ctx):
     insp = [(r, e) for r, e in STG_AWS
             if (loaders.AWS_ROOT / "network" / "inspection" / r / e / "terragrunt.hcl").exists()]
-    recs.append(rp.record(
-        "Segmentation", "stg-egress-inspection-path",
-        "PASS" if len(insp) == len(STG_AWS) else "FAIL", 15,
-        "Both AWS stg regions route egress via an inspection path" if len(insp) == len(STG_AWS)
-        else "No inspection VPC / firewall stacks exist for aws us-stg or eu-stg; "
-             "spokes egress via local NAT/IGW (G3.A closes this)",
-        "aws-terragrunt-configuration/aws/network/", ["PCI-DSS 1.2.1", "CIS 3.8"]))
-
-    # G4-8: the VPC-SC perimeter must cover every declared stg project and
-    # derive restricted services from declared APIs (never hand-maintained)
+    if len(insp) == len(STG_AWS):
+        return "PASS", "Both AWS stg regions route egress via an inspection path"
+    return "FAIL", ("No inspection VPC / firewall stacks exist for aws us-stg or eu-stg; "
+                    "spokes egress via local NAT/IGW (G3.A closes this)")
+
+
+def eval_vpcsc_perimeter(_, ctx):
+    """G4-8: the VPC-SC perimeter must cover every declared stg project and
+    derive restricted services from declared APIs (never hand-maintained)."""
+    gcp = ctx["gcp"]
     vpcsc_stack = (loaders.GCP_ENVS / "global" / "vpcsc" / "terragrunt.hcl")
-    global_res = (gcp.get("envs", {}).get("global", {}) or {}).get("resources", {}) or {}
-    vpcsc_vars = ((global_res.get("vpcsc") or {}).get("inputs", {}) or {})
-    stg_res = gcp_resources(gcp, "stg", "eu")
-    declared_projects = (1 if ((stg_res.get("net-vpc") or {}).get("inputs", {}) or {})
-                         .get("host_project_name") else 0) + \
-        len((((stg_res.get("svc-projects") or {}).get("inputs", {}) or {})
-             .get("service_projects") or {}))
+    vpcsc_vars = checks.at(gcp, "envs.global.resources.vpcsc.inputs", {})
+    net_vpc = checks.at(gcp, "envs.stg.eu.resources.net-vpc.inputs", {})
+    svc_projects = checks.at(gcp, "envs.stg.eu.resources.svc-projects.inputs", {})
+    declared_projects = (1 if net_vpc.get("host_project_name") else 0) + \
+        len(svc_projects.get("service_projects") or {})
     perimeter_slots = len(vpcsc_vars.get("perimeter_project_numbers") or [])
-    apis_declared = bool(((stg_res.get("net-vpc") or {}).get("inputs", {}) or {})
-                         .get("active_apis"))
     if not vpcsc_stack.exists():
-        vp_status, vp_expl = "FAIL", "No envs/global/vpcsc stack"
-    elif perimeter_slots < declared_projects:
-        vp_status = "FAIL"
-        vp_expl = (f"Perimeter declares {perimeter_slots} project slots but stg "
-                   f"declares {declared_projects} projects — a stg project is "
-                   "outside the perimeter")
-    elif not apis_declared:
-        vp_status, vp_expl = "FAIL", "No declared APIs to derive restricted services from"
-    else:
-        vp_status = "PASS"
-        vp_expl = (f"Perimeter covers all {declared_projects} declared stg projects; "
-                   "restricted services derived from declared APIs in the stack hcl")
-    recs.append(rp.record(
-        "Segmentation", "vpcsc-perimeter-coverage", vp_status, 6, vp_expl,
-        "gcp-terragrunt-configuration/terragrunt/envs/global/vpcsc/",
-        ["PCI-DSS 1.3", "SOC2 CC6.6", "HIPAA 164.312(e)(1)"]))
-
-    tagged = "DataClassification" in json.dumps(aws.get("common", {})) or \
-             "data-classification" in json.dumps(gcp.get("common", {}))
-    recs.append(rp.record(
-        "Segmentation", "workload-classification-tags",
-        "PASS" if tagged else "WARN", 5,
-        "Workload data-classification tagging declared" if tagged else
-        "No DataClassification / data-classification tag scheme declared in either "
-        "vars.yaml common block, so regulated/non-regulated co-tenancy is unverifiable "
-        "(G3-14 / G4-4 close this)",
-        "vars.yaml common.common_tags / common.labels", ["PCI-DSS 1.1", "SOC2 CC6.1"]))
-    return recs
-
-
-def check_encryption(aws, gcp):
-    recs = []
-    fails, warns = [], []
-    for region, env in STG_AWS + [("us", "dev")]:
-        res = aws_resources(aws, region, env)
-        for svc in AWS_DATA_SERVICES:
-            block = res.get(svc)
-            if not isinstance(block, dict):
-                continue
-            text = json.dumps(block)
-            has_cmk = "kms_key" in text
-            if '"storage_encrypted": false' in text:
-                fails.append(f"{region}-{env}/{svc}: storage_encrypted=false")
-            elif not has_cmk:
-                warns.append(f"{region}-{env}/{svc}: no CMK/kms_key reference")
+        return "FAIL", "No envs/global/vpcsc stack"
+    if perimeter_slots < declared_projects:
+        return "FAIL", (f"Perimeter declares {perimeter_slots} project slots but stg "
+                        f"declares {declared_projects} projects — a stg project is "
+                        "outside the perimeter")
+    if not net_vpc.get("active_apis"):
+        return "FAIL", "No declared APIs to derive restricted services from"
+    return "PASS", (f"Perimeter covers all {declared_projects} declared stg projects; "
+                    "restricted services derived from declared APIs in the stack hcl")
+
+
+def eval_classification_tags(_, ctx):
+    if vx.has_key(vx.of(ctx["aws"]), "DataClassification", under="common") or \
+            vx.has_key(vx.of(ctx["gcp"]), "data-classification", under="common"):
+        return "PASS", "Workload data-classification tagging declared"
+    return "WARN", ("No DataClassification / data-classification tag scheme declared in "
+                    "either vars.yaml common block, so regulated/non-regulated co-tenancy "
+                    "is unverifiable (G3-14 / G4-4 close this)")
+
+
+# -- Encryption -------------------------------------------------------------
+
+def match_aws_data_service(block, where):
+    envkey, svc = where["envkey"], where["svc"]
+    if envkey not in ENCRYPTION_ENVS or svc not in AWS_DATA_SERVICES \
+            or not isinstance(block, dict):
+        return []
+    ax = vx.of(block)
+    order = (ENCRYPTION_ENVS.index(envkey), AWS_DATA_SERVICES.index(svc))
+    if vx.key_value(ax, "storage_encrypted", False):
+        return [(order, "off", f"{envkey}/{svc}: storage_encrypted=false")]
+    if not vx.has_key(ax, lambda k: "kms_key" in k):
+        return [(order, "default", f"{envkey}/{svc}: no CMK/kms_key reference")]
+    return []
+
+
+def eval_aws_data_services_cmk(found, ctx):
+    found = sorted(found)
+    fails = [msg for _, kind, msg in found if kind == "off"]
+    warns = [msg for _, kind, msg in found if kind == "default"]
     status = "FAIL" if any(f.startswith(("us-stg", "eu-stg")) for f in fails) else \
              ("WARN" if fails or warns else "PASS")
-    recs.append(rp.record(
-        "Encryption", "aws-data-services-cmk", status, 12,
-        "All AWS data services encrypted with CMK references" if status == "PASS"
-        else f"explicit-off: {fails[:6]}; default-key-only: {len(warns)} services",
-        "aws vars.yaml Environments.*.Resources.{rds,aurora,dynamodb,redis,s3}",
-        ["PCI-DSS 3.4", "CIS-2.1", "HIPAA 164.312(a)(2)(iv)"]))
-
-    def stack_wires_cmek(folder, env, resource):
-        hcl = loaders.GCP_ENVS / folder / env / resource / "terragrunt.hcl"
-        if not hcl.exists():
-            return False
-        text = hcl.read_text(encoding="utf-8", errors="replace")
-        return "encryption_key_name" in text or "service_encryption_key" in text
-
-    gproblems = []
-    for folder, env in [("stg", "eu"), ("dev", "eu")]:
-        res = gcp_resources(gcp, folder, env)
-        gke = (res.get("svc-gke") or {}).get("inputs", {}) or {}
-        if gke and not gke.get("database_encryption"):
-            gproblems.append(f"{folder}/{env}: gke database_encryption off")
-        sql = (res.get("svc-sql") or {}).get("inputs", {}) or {}
-        if sql and "kms" not in json.dumps(sql).lower() \
-                and not stack_wires_cmek(folder, env, "svc-sql"):
-            gproblems.append(f"{folder}/{env}: svc-sql has no CMEK key reference")
-        redis = (res.get("svc-redis") or {}).get("inputs", {}) or {}
-        if redis and "kms" not in json.dumps(redis).lower() \
-                and not stack_wires_cmek(folder, env, "svc-redis"):
-            gproblems.append(f"{folder}/{env}: svc-redis has no CMEK key reference")
+    if status == "PASS":
+        return status, "All AWS data services encrypted with CMK references"
+    details = _details(fails, lambda m: "FAIL" if m.startswith(("us-stg", "eu-stg")) else "WARN")
+    return (status, f"explicit-off: {fails[:6]}; default-key-only: {len(warns)} services",
+            details + _details(warns, "WARN"))
+
+
+def _declares_kms(block):
+    ix = vx.of(_inputs(block))
+    return vx.has_key(ix, lambda k: "kms" in k.lower()) or \
+        bool(vx.find_values(ix, lambda v: isinstance(v, str) and "kms" in v.lower()))
+
+
+def match_gcp_data_services(res, where):
+    folder, env = _gcp_env(where)
+    if (folder, env) not in GCP_CMEK_ENVS or not isinstance(res, dict):
+        return []
+    order = GCP_CMEK_ENVS.index((folder, env))
+    problems = []
+    gke = _inputs(res.get("svc-gke"))
+    if gke and not gke.get("database_encryption"):
+        problems.append(f"{folder}/{env}: gke database_encryption off")
+    for svc in ("svc-sql", "svc-redis"):
+        if _inputs(res.get(svc)) and not _declares_kms(res.get(svc)) \
+                and not stack_wires_cmek(folder, env, svc):
+            problems.append(f"{folder}/{env}: {svc} has no CMEK key reference")
+    return [(order, i, p) for i, p in enumerate(problems)]
+
+
+def eval_gcp_data_services_cmek(found, ctx):
+    gproblems = [p for _, _, p in sorted(found)]
     stg_bad = [p for p in gproblems if p.startswith("stg/")]
-    recs.append(rp.record(
-        "Encryption", "gcp-data-services-cmek",
-        "FAIL" if stg_bad else ("WARN" if gproblems else "PASS"), 12,
-        f"Missing CMEK wiring: {gproblems[:6]}" if gproblems else
-        "All GCP stg data services carry CMEK references",
-        "gcp vars.yaml envs.*.*.resources.{svc-gke,svc-sql,svc-redis}",
-        ["PCI-DSS 3.4", "CIS GCP 1.10"]))
-
-    # G4-12: every stg data service resolves to a key that exists in the KMS
-    # stack config; a dangling reference = FAIL
-    dangling = []
-    kms_ok = []
-    for folder, env in [("stg", "eu")]:
-        res = gcp_resources(gcp, folder, env)
-        kms_keys = set((((res.get("kms") or {}).get("inputs", {}) or {})
-                        .get("keys", {}) or {}).keys())
-        for svc, keyname in (("svc-sql", "sql"), ("svc-redis", "redis")):
-            if svc in res and stack_wires_cmek(folder, env, svc):
-                (kms_ok if keyname in kms_keys else dangling).append(
-                    f"{folder}/{env}/{svc}->{keyname}")
-    recs.append(rp.record(
-        "Encryption", "gcp-kms-key-resolution",
-        "FAIL" if dangling else ("PASS" if kms_ok else "N/A"), 6,
-        (f"Dangling key references: {dangling}" if dangling else
-         f"Wired services resolve to declared KMS keys: {kms_ok}" if kms_ok else
-         "No CMEK-wired services yet"),
-        "gcp vars.yaml envs.stg.*.resources.kms.inputs.keys vs stack hcl wiring",
-        ["PCI-DSS 3.4", "CIS GCP 1.10"]))
-
-    rot = "rotation_period" in json.dumps(gcp) or "rotation" in json.dumps(
-        aws.get("Environments", {}).get("us-stg", {}))
-    recs.append(rp.record(
-        "Encryption", "key-rotation-declared", "PASS" if rot else "FAIL", 5,
-        "Key rotation period declared" if rot else
-        "No key rotation period declared in either vars.yaml (G4-9 adds KMS module "
-        "with rotation; AWS CMKs land with G3 stacks)",
-        "vars.yaml (rotation_period keys)", ["PCI-DSS 3.6.4", "CIS 3.8"]))
-    return recs
-
-
-def check_identity(aws, gcp):
-    recs = []
-    org_pol = (loaders.GCP_ENVS / "global" / "org-policies" / "terragrunt.hcl").exists()
-    recs.append(rp.record(
-        "Identity", "gcp-sa-key-creation-blocked", "PASS" if org_pol else "FAIL", 8,
-        "Org policy stack exists (constraint list verified in G4)" if org_pol else
-        "No org-policy stack: iam.disableServiceAccountKeyCreation not enforced anywhere",
-        "gcp-terragrunt-configuration/terragrunt/envs/global/",
-        ["CIS GCP 1.4", "SOC2 CC6.1"]))
-
-    wildcards = []
-    for jf in (loaders.AWS_ROOT).rglob("*.json"):
-        if loaders.CACHE_DIRS.intersection(jf.parts):
-            continue
-        try:
-            doc = json.loads(jf.read_text(encoding="utf-8"))
-        except (ValueError, UnicodeDecodeError):
-            continue
-        stmts = doc.get("Statement", []) if isinstance(doc, dict) else []
-        if isinstance(stmts, dict):
-            stmts = [stmts]
-        for st in stmts:
-            if (st or {}).get("Effect") == "Allow":
-                acts = st.get("Action", [])
-                acts = [acts] if isinstance(acts, str) else acts
-                if "*" in acts:
-                    wildcards.append(str(jf.relative_to(REPO)))
-    recs.append(rp.record(
-        "Identity", "no-wildcard-allow-actions",
-        "PASS" if not wildcards else "FAIL", 8,
-        "No Allow-Effect policy document grants Action:*" if not wildcards else
-        f"Wildcard Allow actions in: {wildcards[:5]}",
-        "aws-terragrunt-configuration/**/*.json", ["PCI-DSS 7.1", "CIS-1.1", "SOC2 CC6.1"]))
-
-    gke_hcls = [s["path"] for s in loaders.gcp_env_stacks() if s["resource"] == "svc-gke"]
-    wi = all("identity_namespace" in p.read_text(encoding="utf-8", errors="replace")
-             for p in gke_hcls) if gke_hcls else False
-    recs.append(rp.record(
-        "Identity", "gke-workload-identity", "PASS" if wi else "FAIL", 6,
-        "All GKE stacks wire identity_namespace (Workload Identity)" if wi else
-        "Some GKE stacks lack identity_namespace wiring",
-        "gcp envs/*/*/svc-gke/terragrunt.hcl", ["CIS GKE 5.2.1", "SOC2 CC6.1"]))
-    return recs
-
-
-def check_audit(aws, gcp):
-    recs = []
-    trail = (loaders.AWS_ROOT / "cloudtrail" / "terragrunt.hcl").exists()
-    trail_cfg = json.dumps(aws.get("Environments", {}).get("master", {})) + \
-        json.dumps(aws.get("Environments", {}).get("management", {}))
-    validation = "log_file_validation" in trail_cfg or "enable_log_file_validation" in trail_cfg
-    recs.append(rp.record(
-        "Audit", "aws-org-trail",
-        "PASS" if (trail and validation) else ("WARN" if trail else "FAIL"), 8,
-        ("Org CloudTrail present with log-file validation" if (trail and validation) else
-         "CloudTrail stack exists but log-file validation / retention not declared in vars"
-         if trail else "No CloudTrail stack"),
-        "aws-terragrunt-configuration/aws/cloudtrail/", ["PCI-DSS 10.1", "CIS-5.1"]))
-
-    audit = (loaders.GCP_ENVS / "global" / "audit" / "terragrunt.hcl").exists()
-    aud_cfg = json.dumps((gcp.get("envs", {}).get("global", {}) or {}))
-    retention = "retention" in aud_cfg
-    recs.append(rp.record(
-        "Audit", "gcp-org-log-sink",
-        "PASS" if (audit and retention) else ("WARN" if audit else "FAIL"), 8,
-        ("Org audit sink present with retention declared" if (audit and retention) else
-         "Audit stack exists but no retention period declared in vars"
-         if audit else "No audit stack"),
-        "gcp-terragrunt-configuration/terragrunt/envs/global/audit/",
-        ["PCI-DSS 10.1", "SOC2 CC7.1", "CIS GCP 2.2"]))
-    return recs
-
-
-def check_dr(aws, gcp):
-    recs = []
-    dr_declared = "dr_region" in json.dumps(aws).lower()
-    recs.append(rp.record(
-        "Multi-region/DR", "aws-dr-region-declared",
-        "PASS" if dr_declared else "FAIL", 5,
-        "DR region declared per env" if dr_declared else
-        "No dr_region key anywhere in AWS vars.yaml; no cross-region copy targets declared",
-        "aws vars.yaml", ["SOC2 A1.2", "ISO27001 A.17"]))
-
-    stg_regions = set((gcp.get("envs", {}).get("stg", {}) or {}).keys())
-    prod_regions = set((gcp.get("envs", {}).get("prod", {}) or {}).keys())
-    parity = stg_regions == prod_regions
-    recs.append(rp.record(
-        "Multi-region/DR", "gcp-stg-prod-region-parity",
-        "PASS" if parity else "FAIL", 5,
-        f"GCP stg regions {sorted(stg_regions)} != prod regions {sorted(prod_regions)}; "
-        "stg cannot rehearse prod's multi-region posture" if not parity else
-        "stg mirrors prod regions",
-        "gcp vars.yaml envs.stg vs envs.prod", ["SOC2 A1.2"]))
-    return recs
-
-
-def check_naming(aws, gcp):
-    recs = []
+    if gproblems:
+        return ("FAIL" if stg_bad else "WARN"), f"Missing CMEK wiring: {gproblems[:6]}", \
+            _details(gproblems, lambda m: "FAIL" if m.startswith("stg/") else "WARN")
+    return "PASS", "All GCP stg data services carry CMEK references"
+
+
+def match_kms_key_resolution(res, where):
+    """G4-12: every stg data service resolves to a key that exists in the
+    KMS stack config; a dangling reference = FAIL."""
+    folder, env = _gcp_env(where)
+    if (folder, env) != ("stg", "eu") or not isinstance(res, dict):
+        return []
+    kms_keys = set((_inputs(res.get("kms")).get("keys", {}) or {}).keys())
+    out = []
+    for svc, keyname in (("svc-sql", "sql"), ("svc-redis", "redis")):
+        if svc in res and stack_wires_cmek(folder, env, svc):
+            out.append((keyname in kms_keys, f"{folder}/{env}/{svc}->{keyname}"))
+    return out
+
+
+def eval_kms_key_resolution(found, ctx):
+    dangling = [label for ok, label in found if not ok]
+    kms_ok = [label for ok, label in found if ok]
+    details = [(label.split("->")[0], "PASS" if ok else "FAIL",
+                f"key {label.split('->')[1]} {'declared' if ok else 'not declared'} in kms")
+               for ok, label in found]
+    if dangling:
+        return "FAIL", f"Dangling key references: {dangling}", details
+    if kms_ok:
+        return "PASS", f"Wired services resolve to declared KMS keys: {kms_ok}", details
+    return "N/A", "No CMEK-wired services yet"
+
+
+def eval_key_rotation(_, ctx):
+    if vx.has_key(vx.of(ctx["gcp"]), "rotation_period") or \
+            vx.has_key(vx.of(ctx["aws"]), lambda k: "rotation" in k, under="Environments.us-stg"):
+        return "PASS", "Key rotation period declared"
+    return "FAIL", ("No key rotation period declared in either vars.yaml (G4-9 adds KMS "
+                    "module with rotation; AWS CMKs land with G3 stacks)")
+
+
+# -- Identity ---------------------------------------------------------------
+
+def eval_sa_key_creation(_, ctx):
+    if (loaders.GCP_ENVS / "global" / "org-policies" / "terragrunt.hcl").exists():
+        return "PASS", "Org policy stack exists (constraint list verified in G4)"
+    return "FAIL", ("No org-policy stack: iam.disableServiceAccountKeyCreation not "
+                    "enforced anywhere")
+
+
+def eval_wildcard_allow(_, ctx):
+    wildcards = facts.wildcard_allow_policies()
+    if wildcards:
+        return "FAIL", f"Wildcard Allow actions in: {wildcards[:5]}", \
+            [(w, "FAIL", 'Allow statement grants Action "*"') for w in wildcards]
+    return "PASS", "No Allow-Effect policy document grants Action:*"
+
+
+def eval_workload_identity(_, ctx):
+    if facts.gke_stacks() and not facts.gke_without_workload_identity():
+        return "PASS", "All GKE stacks wire identity_namespace (Workload Identity)"
+    return "FAIL", "Some GKE stacks lack identity_namespace wiring", \
+        [(str(p.parent.relative_to(REPO)), "FAIL", "no identity_namespace input")
+         for p in facts.gke_without_workload_identity()]
+
+
+# -- Audit ------------------------------------------------------------------
+
+def eval_org_trail(_, ctx):
+    trail = facts.cloudtrail_stack()
+    ax = vx.of(ctx["aws"])
+    validation = any(vx.has_key(ax, lambda k: "log_file_validation" in k,
+                                under=f"Environments.{account}")
+                     for account in ("master", "management"))
+    if trail and validation:
+        return "PASS", "Org CloudTrail present with log-file validation"
+    if trail:
+        return "WARN", ("CloudTrail stack exists but log-file validation / retention "
+                        "not declared in vars")
+    return "FAIL", "No CloudTrail stack"
+
+
+def eval_org_log_sink(_, ctx):
+    audit = facts.gcp_audit_stack()
+    retention = vx.has_key(vx.of(ctx["gcp"]), lambda k: "retention" in k, under="envs.global")
+    if audit and retention:
+        return "PASS", "Org audit sink present with retention declared"
+    if audit:
+        return "WARN", "Audit stack exists but no retention period declared in vars"
+    return "FAIL", "No audit stack"
+
+
+# -- Multi-region/DR --------------------------------------------------------
+
+def eval_dr_region(_, ctx):
+    if vx.has_key(vx.of(ctx["aws"]), lambda k: "dr_region" in k.lower()):
+        return "PASS", "DR region declared per env"
+    return "FAIL", ("No dr_region key anywhere in AWS vars.yaml; no cross-region copy "
+                    "targets declared")
+
+
+def eval_region_parity(_, ctx):
+    stg_regions = set(checks.at(ctx["gcp"], "envs.stg", {}).keys())
+    prod_regions = set(checks.at(ctx["gcp"], "envs.prod", {}).keys())
+    if stg_regions == prod_regions:
+        return "PASS", "stg mirrors prod regions"
+    return "FAIL", (f"GCP stg regions {sorted(stg_regions)} != prod regions "
+                    f"{sorted(prod_regions)}; stg cannot rehearse prod's multi-region posture")
+
+
+# -- Naming -----------------------------------------------------------------
+
+def eval_stack_to_vars(_, ctx):
+    aws, gcp = ctx["aws"], ctx["gcp"]
     missing = []
     for s in loaders.aws_env_stacks():
-        res = aws_resources(aws, s["region"], s["env"])
-        if s["service"] not in res:
+        if s["service"] not in checks.at(aws, f"Environments.{s['region']}-{s['env']}.Resources", {}):
             missing.append(f"stack {s['service']}/{s['region']}/{s['env']} has no "
                            f"vars key Environments.{s['region']}-{s['env']}.Resources.{s['service']}")
     for s in loaders.gcp_env_stacks():
         if s["folder"] == "global":
             continue
-        res = gcp_resources(gcp, s["folder"], s["env"])
-        if s["resource"] not in res:
+        if s["resource"] not in checks.at(gcp, f"envs.{s['folder']}.{s['env']}.resources", {}):
             missing.append(f"stack envs/{s['folder']}/{s['env']}/{s['resource']} has no "
                            f"vars key envs.{s['folder']}.{s['env']}.resources.{s['resource']}")
-    recs.append(rp.record(
-        "Naming", "stack-to-vars-consistency", "PASS" if not missing else "FAIL", 10,
-        "Every env stack resolves to a vars.yaml key" if not missing else
-        f"{len(missing)} stacks reference nonexistent vars keys: {missing[:5]}",
-        "terragrunt tree vs vars.yaml", ["SOC2 CC8.1"]))
-    return recs
-
-
-def check_cost(aws, gcp):
-    recs = []
-    aws_budget = "budget" in json.dumps(aws).lower()
-    gcp_budget = "budget" in json.dumps(gcp).lower()
-    status = "PASS" if (aws_budget and gcp_budget) else \
-             ("WARN" if (aws_budget or gcp_budget) else "FAIL")
-    recs.append(rp.record(
-        "Cost", "budgets-declared", status, 4,
-        "Budgets with thresholds declared in both clouds" if status == "PASS" else
+    if missing:
+        details = [(m.split(" ")[1], "FAIL", m.split(" has ", 1)[1]) for m in missing]
+        return "FAIL", f"{len(missing)} stacks reference nonexistent vars keys: {missing[:5]}", \
+            details
+    return "PASS", "Every env stack resolves to a vars.yaml key"
+
+
+# -- Cost -------------------------------------------------------------------
+
+def eval_budgets(_, ctx):
+    aws_budget = vx.has_key(vx.of(ctx["aws"]), lambda k: "budget" in k.lower())
+    gcp_budget = vx.has_key(vx.of(ctx["gcp"]), lambda k: "budget" in k.lower())
+    if aws_budget and gcp_budget:
+        return "PASS", "Budgets with thresholds declared in both clouds"
+    return ("WARN" if (aws_budget or gcp_budget) else "FAIL"), (
         f"budget keys present: aws={aws_budget}, gcp={gcp_budget}; need per-env budgets "
-        "with >= 2 thresholds (G3-11 / G4-13)",
-        "vars.yaml (budget keys)", ["SOC2 CC3.4"]))
-    return recs
+        "with >= 2 thresholds (G3-11 / G4-13)")
+
+
+def check(category, name, weight, evidence, controls, evaluate, select=None, match=None):
+    return {"category": category, "check": name, "weight": weight, "evidence": evidence,
+            "controls": controls, "evaluate": evaluate, "select": select, "match": match}
+
+
+CHECKS = [
+    check("IP Planning", "cidr-overlap", 8,
+          "aws vars.yaml + gcp vars.yaml (all vpc/subnet cidrs)", ["PCI-DSS 1.1", "CIS-3.1"],
+          eval_cidr_overlap, match={"aws": match_aws_vpc_cidr, "gcp": match_gcp_cidrs},
+          select={"aws": ["Environments.{envkey}.Resources.vpc.inputs"],
+                  "gcp": [p + ".net-vpc.inputs" for p in GCP_ENV_RESOURCES]}),
+    check("IP Planning", "gke-secondary-ranges", 4,
+          "gcp vars.yaml envs.*.*.resources.net-vpc.inputs.secondary_ranges", ["CIS GKE 5.6.2"],
+          eval_gke_secondary_ranges, select={"gcp": GCP_ENV_RESOURCES},
+          match=match_gke_secondary_ranges),
+    check("Segmentation", "stg-egress-inspection-path", 15,
+          "aws-terragrunt-configuration/aws/network/", ["PCI-DSS 1.2.1", "CIS 3.8"],
+          eval_egress_inspection),
+    check("Segmentation", "vpcsc-perimeter-coverage", 6,
+          "gcp-terragrunt-configuration/terragrunt/envs/global/vpcsc/",
+          ["PCI-DSS 1.3", "SOC2 CC6.6", "HIPAA 164.312(e)(1)"], eval_vpcsc_perimeter),
+    check("Segmentation", "workload-classification-tags", 5,
+          "vars.yaml common.common_tags / common.labels", ["PCI-DSS 1.1", "SOC2 CC6.1"],
+          eval_classification_tags),
+    check("Encryption", "aws-data-services-cmk", 12,
+          "aws vars.yaml Environments.*.Resources.{rds,aurora,dynamodb,redis,s3}",
+          ["PCI-DSS 3.4", "CIS-2.1", "HIPAA 164.312(a)(2)(iv)"], eval_aws_data_services_cmk,
+          select={"aws": ["Environments.{envkey}.Resources.{svc}"]},
+          match=match_aws_data_service),
+    check("Encryption", "gcp-data-services-cmek", 12,
+          "gcp vars.yaml envs.*.*.resources.{svc-gke,svc-sql,svc-redis}",
+          ["PCI-DSS 3.4", "CIS GCP 1.10"], eval_gcp_data_services_cmek,
+          select={"gcp": GCP_ENV_RESOURCES}, match=match_gcp_data_services),
+    check("Encryption", "gcp-kms-key-resolution", 6,
+          "gcp vars.yaml envs.stg.*.resources.kms.inputs.keys vs stack hcl wiring",
+          ["PCI-DSS 3.4", "CIS GCP 1.10"], eval_kms_key_resolution,
+          select={"gcp": ["envs.{folder}.{env}.resources"]}, match=match_kms_key_resolution),
+    check("Encryption", "key-rotation-declared", 5,
+          "vars.yaml (rotation_period keys)", ["PCI-DSS 3.6.4", "CIS 3.8"], eval_key_rotation),
+    check("Identity", "gcp-sa-key-creation-blocked", 8,
+          "gcp-terragrunt-configuration/terragrunt/envs/global/", ["CIS GCP 1.4", "SOC2 CC6.1"],
+          eval_sa_key_creation),
+    check("Identity", "no-wildcard-allow-actions", 8,
+          "aws-terragrunt-configuration/**/*.json", ["PCI-DSS 7.1", "CIS-1.1", "SOC2 CC6.1"],
+          eval_wildcard_allow),
+    check("Identity", "gke-workload-identity", 6,
+          "gcp envs/*/*/svc-gke/terragrunt.hcl", ["CIS GKE 5.2.1", "SOC2 CC6.1"],
+          eval_workload_identity),
+    check("Audit", "aws-org-trail", 8,
+          "aws-terragrunt-configuration/aws/cloudtrail/", ["PCI-DSS 10.1", "CIS-5.1"],
+          eval_org_trail),
+    check("Audit", "gcp-org-log-sink", 8,
+          "gcp-terragrunt-configuration/terragrunt/envs/global/audit/",
+          ["PCI-DSS 10.1", "SOC2 CC7.1", "CIS GCP 2.2"], eval_org_log_sink),
+    check("Multi-region/DR", "aws-dr-region-declared", 5,
+          "aws vars.yaml", ["SOC2 A1.2", "ISO27001 A.17"], eval_dr_region),
+    check("Multi-region/DR", "gcp-stg-prod-region-parity", 5,
+          "gcp vars.yaml envs.stg vs envs.prod", ["SOC2 A1.2"], eval_region_parity),
+    check("Naming", "stack-to-vars-consistency", 10,
+          "terragrunt tree vs vars.yaml", ["SOC2 CC8.1"], eval_stack_to_vars),
+    check("Cost", "budgets-declared", 4,
+          "vars.yaml (budget keys)", ["SOC2 CC3.4"], eval_budgets),
+]
+
+
+def build_store(stream=None):
+    """Check-level and per-resource records in a columnar report store;
+    each record is also written to an rp.ndjson_open() stream if given."""
+    st = rp.store()
+
+    def sink(rec):
+        rp.store_add(st, rec)
+        if stream:
+            rp.ndjson_write(stream, rec)
+    checks.run(CHECKS, facts.model(), sink=sink)
+    return st
 
 
 def build_records():
-    aws = loaders.load_aws_vars()
-    gcp = loaders.load_gcp_vars()
-    recs = []
-    recs += check_ip_planning(aws, gcp)
-    recs += check_segmentation(aws, gcp)
-    recs += check_encryption(aws, gcp)
-    recs += check_identity(aws, gcp)
-    recs += check_audit(aws, gcp)
-    recs += check_dr(aws, gcp)
-    recs += check_naming(aws, gcp)
-    recs += check_cost(aws, gcp)
-    return recs
+    return list(rp.rows(build_store(), resources=False))
 
 
 def main():
@@ -443,22 +491,31 @@ def main():
     ap.add_argument("--min-score", type=float, default=None)
     ap.add_argument("--fail-on", choices=["FAIL", "WARN"], default=None)
     ap.add_argument("--quick", action="store_true", help="no file writes; exit code only")
+    ap.add_argument("--records", metavar="NDJSON",
+                    help="also stream every record, per-resource detail included, as "
+                         "NDJSON with a trailing summary line")
     args = ap.parse_args()
 
-    records = build_records()
+    stream = rp.ndjson_open(args.records, GENERATOR, SOURCES) if args.records else None
+    built = False
+    try:
+        st = build_store(stream)
+        built = True
+    finally:
+        if stream:
+            rp.ndjson_close(stream, summary=built)
 
     if args.validate_schema:
         errors = []
-        for r in records:
+        for r in rp.rows(st):
             errors += [f"{r.get('check', '?')}: {e}" for e in rp.validate_record(r)]
         if errors:
             print("\n".join(errors), file=sys.stderr)
             return 1
-        print(f"OK: {len(records)} records conform to schema v{rp.SCHEMA_VERSION}")
+        print(f"OK: {st['rows']} records conform to schema v{rp.SCHEMA_VERSION}")
         return 0
 
-    rep = rp.build_report(records, "scripts/architecture-score.py",
-                          SOURCES)
+    rep = rp.summary(st, GENERATOR, SOURCES)
     if not args.quick:
         rp.write_report_json(rep, REPORT_JSON)
         SCORECARD_MD.write_text(
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Backfill the score history: score every commit in a range, in parallel.
+
+For each commit, the tree's files (everything except the generator code
+under scripts/) are listed with `git ls-tree`, read through the worker's
+persistent `git cat-file --batch` (scripts/lib/git.py) and written to a
+temporary directory — no checkouts, the working tree is never touched.
+The current generators then run in-process against that tree
+(loaders.set_root()):
+
+  architecture-score  -> the schema v1 report (runs/checks tables)
+  placeholder-scan    -> placeholder_tokens, placeholder_occurrences
+  input-assertions    -> assertion_findings, assertion_active (non-allowlisted)
+
+and each commit is appended to the score history (scripts/lib/history.py).
+
+Commits whose generator inputs are identical (same paths and blob ids) are
+scored once and the result is recorded for each of them. The inputs are what
+the generators read: the two configuration trees (vars.yaml, terragrunt.hcl
+/ _env.hcl, tf-modules, policy JSON), scripts/config/ (the assertion
+allowlist) and the other files placeholder-scan scans (its suffixes, e.g.
+.github/*.yaml), less generated outputs. Commits touching only docs, the
+Makefile, generated outputs or scripts share a key. Distinct inputs are
+scored in a process pool, one fresh process per commit, so no memoized fact
+leaks between trees.
+
+Usage:
+  python3 scripts/backfill.py                       # every commit reachable from HEAD
+  python3 scripts/backfill.py --range v1.0..HEAD -j 8
+  python3 scripts/backfill.py --dry-run             # list commits / dedup only
+
+Controls: SOC2 CC8.1, PCI-DSS 6.4 (change-control evidence trail).
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import git, history, loaders  # noqa: E402
+
+SCRIPTS = Path(__file__).resolve().parent
+
+
+def commits(rev_range):
+    """[(sha, commit time)] oldest first."""
+    out = []
+    for line in git.run("log", "--reverse", "--format=%H %ct", rev_range).splitlines():
+        sha, ct = line.split()
+        out.append((sha, int(ct)))
+    return out
+
+
+CONFIG_TREES = ("aws-terragrunt-configuration/", "gcp-terragrunt-configuration/",
+                "scripts/config/")
+# written by the generators, never read as their input
+GENERATED = {"ARCHITECTURE_REPORT.json"}
+
+
+def is_tree_file(path):
+    """Generator code is taken from the working tree, not from history."""
+    return not (path.startswith("scripts/") and path.endswith((".py", ".sh")))
+
+
+def tree_entries(sha):
+    """[(mode, blob id, path)] of a commit's files, less generator code."""
+    return [(mode, oid, path) for mode, kind, oid, path in git.ls_tree(sha)
+            if kind == "blob" and is_tree_file(path)]
+
+
+def is_input(path, placeholder_scan):
+    """Whether a generator reads path: the configuration trees, or a file
+    placeholder-scan scans."""
+    if path.startswith(CONFIG_TREES):
+        return True
+    if path in GENERATED or path.startswith("scripts/"):
+        return False
+    return Path(path).suffix in placeholder_scan.SCAN_SUFFIXES \
+        and not placeholder_scan.SKIP_DIRS.intersection(Path(path).parts)
+
+
+def input_key(entries, placeholder_scan):
+    """sha256 over the (mode, blob, path) of the entries generators read."""
+    h = hashlib.sha256()
+    for mode, blob, path in entries:
+        if is_input(path, placeholder_scan):
+            h.update(f"{mode} {blob} {path}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"),
+                                                  SCRIPTS / f"{name}.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def score_tree(entries):
+    """Run the generators over one materialized commit (in a fresh worker
+    process): {"report": v1 report, "metrics": {...}} or {"error": ...}."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix="backfill-") as tmp:
+        try:
+            git.materialize(entries, tmp)  # LookupError on a missing blob
+            loaders.set_root(tmp)
+            arch = _load_script("architecture-score")
+            ph = _load_script("placeholder-scan")
+            ia = _load_script("input-assertions")
+            from lib import report as rp
+            report = rp.build_report(arch.build_records(), arch.GENERATOR, arch.SOURCES)
+            found = ph.scan()
+            findings = ia.aws_findings(loaders.load_aws_vars()) + \
+                ia.gcp_findings(loaders.load_gcp_vars())
+            _, active = ia.render(findings, ia.load_allowlist())
+        except Exception as e:  # a missing object, or a tree the generators cannot read
+            return {"error": f"{type(e).__name__}: {e}"}
+    return {"report": report, "metrics": {
+        "placeholder_tokens": len(found),
+        "placeholder_occurrences": sum(len(v) for v in found.values()),
+        "assertion_findings": len(findings),
+        "assertion_active": len(active)}}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--range", default="HEAD", dest="rev_range",
+                    help="git revision range (default: all of HEAD's history)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    ap.add_argument("--db", type=Path, default=history.DB_PATH)
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    todo = commits(args.rev_range)
+    ph = _load_script("placeholder-scan")
+    keys, trees = {}, {}
+    for sha, _ in todo:
+        entries = tree_entries(sha)
+        keys[sha] = k = input_key(entries, ph)
+        trees.setdefault(k, entries)
+    print(f"{len(todo)} commits, {len(trees)} distinct input trees")
+    if args.dry_run:
+        for sha, _ in todo:
+            print(f"  {sha[:10]}  inputs {keys[sha][:12]}")
+        return 0
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=args.jobs, max_tasks_per_child=1) as pool:
+        futures = {k: pool.submit(score_tree, entries) for k, entries in trees.items()}
+        results = {k: f.result() for k, f in futures.items()}
+
+    conn = history.connect(args.db)
+    failed = 0
+    for sha, ct in todo:
+        res = results[keys[sha]]
+        if "error" in res:
+            failed += 1
+            print(f"  {sha[:10]}  skipped: {res['error']}")
+            continue
+        run_id = history.record(conn, res["report"], sha, ct, metrics=res["metrics"])
+        m = res["metrics"]
+        print(f"  {sha[:10]}  score {res['report']['score']:>5}  "
+              f"placeholders {m['placeholder_tokens']}  "
+              f"assertions {m['assertion_active']}/{m['assertion_findings']}"
+              f"{'' if run_id else '  (already recorded)'}")
+    return 1 if failed == len(todo) and todo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
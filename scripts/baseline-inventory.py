@@ -10,186 +10,185 @@ Emits evidence/G0/BASELINE.json — a machine-readable snapshot of:
 
 Read-only: performs no cloud calls and no terragrunt/terraform execution.
 
+Incremental: each stack's entry and each vars file's key paths are cached in
+.gate-cache/baseline-inventory.json keyed by the sha256 of the bytes they are
+derived from (a stack's terragrunt.hcl plus the _env.hcl files above it), and
+the file counts by the git index's stat — a run re-parses only what changed.
+--check reports a structured delta (stacks and key paths added / removed /
+changed, per cloud; changed counts) instead of a bare "stale".
+
 Controls: SOC2 CC8.1 (change baseline), CIS 1.x (inventory of assets),
 PCI-DSS 12.5.1 (inventory responsibility).
 
 Usage:
   python3 scripts/baseline-inventory.py            # write BASELINE.json
   python3 scripts/baseline-inventory.py --check    # verify existing file matches repo state (exit 0/1)
+  python3 scripts/baseline-inventory.py --check --json   # the delta as JSON (for CI annotations)
   python3 scripts/baseline-inventory.py --output <path>
 """
 
 import argparse
+import hashlib
 import json
-import re
+import os
 import sys
 from collections import Counter
 from pathlib import Path
 
-import yaml
-import yaml.composer
-
-
-class _RedefiningComposer(yaml.composer.Composer):
-    """Allow anchor redefinition (YAML 1.2 semantics, matches Terragrunt's yamldecode).
-
-    PyYAML >= 6.0.3 raises ComposerError on duplicate anchors; both vars.yaml
-    files legitimately redefine anchors (e.g. &DefReg), so we relax that.
-    """
-
-    def compose_node(self, parent, index):
-        event = self.peek_event()
-        if (not isinstance(event, yaml.events.AliasEvent)
-                and getattr(event, "anchor", None) is not None
-                and event.anchor in self.anchors):
-            del self.anchors[event.anchor]
-        return super().compose_node(parent, index)
-
-
-class _TerragruntSafeLoader(
-    yaml.reader.Reader, yaml.scanner.Scanner, yaml.parser.Parser,
-    _RedefiningComposer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver,
-):
-    def __init__(self, stream):
-        yaml.reader.Reader.__init__(self, stream)
-        yaml.scanner.Scanner.__init__(self)
-        yaml.parser.Parser.__init__(self)
-        _RedefiningComposer.__init__(self)
-        yaml.constructor.SafeConstructor.__init__(self)
-        yaml.resolver.Resolver.__init__(self)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import git, loaders, model  # noqa: E402
 
-
-def load_vars_yaml(path: Path):
-    return yaml.load(path.read_text(encoding="utf-8"), Loader=_TerragruntSafeLoader)
-
-
-REPO_ROOT = Path(__file__).resolve().parent.parent
-AWS_ROOT = REPO_ROOT / "aws-terragrunt-configuration" / "aws"
-GCP_ROOT = REPO_ROOT / "gcp-terragrunt-configuration"
-GCP_ENVS = GCP_ROOT / "terragrunt" / "envs"
-GCP_MODULES = GCP_ROOT / "tf-modules"
+# paths and the anchor-tolerant YAML loader live in lib/loaders, stack
+# classification and module source/ref in lib/model (shared with the other gates)
+REPO_ROOT = loaders.REPO_ROOT
+AWS_ROOT = loaders.AWS_ROOT
+GCP_ROOT = loaders.GCP_ROOT
+GCP_ENVS = loaders.GCP_ENVS
+GCP_MODULES = loaders.GCP_MODULES
 DEFAULT_OUTPUT = REPO_ROOT / "evidence" / "G0" / "BASELINE.json"
+ENTRY_CACHE = loaders.CACHE_DIR / "baseline-inventory.json"
+ENTRY_CACHE_VERSION = 1  # bump when aws_stack / gcp_stack / key paths change shape
 
-SOURCE_RE = re.compile(r'source\s*=\s*"([^"]+)"')
-REF_RE = re.compile(r"\?ref=([^\"&\s]+)")
+load_vars_yaml = loaders.load_vars_yaml
 
-AWS_ENVS = {"dev", "stg", "prod"}
-AWS_REGIONS = {"us", "eu"}
 
+_env_bytes = {}
 
-def read_source(hcl_path: Path):
-    """Extract the terraform source string from a terragrunt.hcl, if present."""
-    text = hcl_path.read_text(encoding="utf-8", errors="replace")
-    m = SOURCE_RE.search(text)
-    if not m:
-        return None, None
-    source = m.group(1)
-    ref_m = REF_RE.search(source)
-    # refs interpolated from _env.hcl locals (e.g. ${include.env.locals.module_ref})
-    ref = ref_m.group(1) if ref_m else None
-    return source, ref
 
-
-def resolve_env_ref(hcl_path: Path, ref: str):
-    """If the ref is a terragrunt interpolation, resolve module_ref from the nearest _env.hcl."""
-    if ref is None or "${" not in ref:
-        return ref
+def _env_chain(hcl_path: Path):
+    """Bytes of the _env.hcl files between a stack and REPO_ROOT (they can
+    resolve its module ref)."""
+    out = []
     for parent in hcl_path.parents:
-        env_hcl = parent / "_env.hcl"
-        if env_hcl.exists():
-            m = re.search(r'module_ref\s*=\s*"([^"]+)"', env_hcl.read_text(encoding="utf-8", errors="replace"))
-            if m:
-                return m.group(1)
+        if parent not in _env_bytes:
+            env_hcl = parent / "_env.hcl"
+            _env_bytes[parent] = env_hcl.read_bytes() if env_hcl.exists() else b""
+        out.append(_env_bytes[parent])
         if parent == REPO_ROOT:
             break
-    return ref  # unresolved interpolation, keep as-is
-
-
-CACHE_DIRS = {".terragrunt-cache", ".terraform"}
+    return out
+
+
+def _digest(*chunks):
+    h = hashlib.sha256()
+    for c in chunks:
+        h.update(c)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_cache(path=ENTRY_CACHE):
+    """{"stacks": {path: {hash, entry}}, "vars": {path: {hash, key_paths}},
+    "files": {stat, counts}}; empty on a missing or other-version file (or
+    path None)."""
+    try:
+        disk = json.loads(Path(path).read_text(encoding="utf-8")) if path else {}
+    except (OSError, ValueError):
+        disk = {}
+    if disk.get("version") != ENTRY_CACHE_VERSION:
+        disk = {}
+    return {k: disk.get(k, {}) for k in ("stacks", "vars", "files")}
+
+
+def save_cache(cache, path=ENTRY_CACHE):
+    try:
+        Path(path).parent.mkdir(exist_ok=True)
+        tmp = Path(path).with_name(f"{Path(path).name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": ENTRY_CACHE_VERSION, **cache},
+                                  indent=1), encoding="utf-8")  # entries keep field order
+        tmp.replace(path)
+    except OSError:
+        pass  # read-only checkout: the snapshot is still correct, just not cached
+
+
+def _cached_entry(cache, hcl_path: Path, make):
+    """make(hcl_path) unless the stack's inputs hash to the cached entry."""
+    key = str(hcl_path.relative_to(REPO_ROOT))
+    digest = _digest(hcl_path.read_bytes(), *_env_chain(hcl_path))
+    hit = cache["stacks"].get(key)
+    if isinstance(hit, dict) and hit.get("hash") == digest:
+        return hit["entry"]
+    entry = make(hcl_path)
+    cache["stacks"][key] = {"hash": digest, "entry": entry}
+    return entry
+
+
+def aws_stack(hcl_path: Path):
+    stack = model.of().stack(hcl_path)
+    source, ref = stack.module_source()
+    return {
+        "path": str(hcl_path.relative_to(REPO_ROOT)),
+        "service": stack.service,
+        "region": stack.env.region if stack.env else None,
+        # cross-cutting stacks (cloudtrail, accounts, security/*, iam/*,
+        # network/*) are "global"; the root has no env
+        "env": stack.env.name if stack.env else "global" if stack.parts else None,
+        "module_source": source,
+        "module_ref": ref,
+    }
 
 
-def find_stacks(root: Path):
-    """All terragrunt.hcl files under root, skipping terragrunt/terraform caches."""
-    return sorted(p for p in root.rglob("terragrunt.hcl")
-                  if not CACHE_DIRS.intersection(p.relative_to(root).parts))
+def aws_stacks(cache=None):
+    cache = cache if cache is not None else load_cache()
+    return [_cached_entry(cache, s.path, aws_stack) for s in model.of().stacks
+            if s.cloud == "aws"]
 
 
-def aws_stacks():
-    stacks = []
-    for hcl in find_stacks(AWS_ROOT):
-        rel = hcl.relative_to(AWS_ROOT)
-        parts = rel.parts[:-1]  # drop terragrunt.hcl
-        source, ref = read_source(hcl)
-        ref = resolve_env_ref(hcl, ref)
-        entry = {
-            "path": str(hcl.relative_to(REPO_ROOT)),
-            "service": None,
-            "region": None,
-            "env": None,
-            "module_source": source,
-            "module_ref": ref,
-        }
-        if len(parts) == 0:
-            entry["service"] = "_root"
-        elif len(parts) >= 3 and parts[-2] in AWS_REGIONS and parts[-1] in AWS_ENVS:
-            entry["service"] = "/".join(parts[:-2])
-            entry["region"] = parts[-2]
-            entry["env"] = parts[-1]
-        else:
-            # cross-cutting stacks: cloudtrail, accounts, security/*, iam/*, network/*
-            entry["service"] = "/".join(parts)
-            entry["env"] = "global"
-        stacks.append(entry)
-    return stacks
+def gcp_stack(hcl_path: Path):
+    stack = model.of().stack(hcl_path)
+    parts = stack.parts
+    source, ref = stack.module_source(resolve=False)
+    entry = {
+        "path": str(hcl_path.relative_to(REPO_ROOT)),
+        "folder": parts[0] if parts else None,
+        "env": None,
+        "resource": stack.service,
+        "module_source": source,
+        "module_ref": ref,
+    }
+    if parts and parts[0] == "global":
+        entry["env"] = "global"
+    elif stack.env is not None:
+        # {folder}/{env}/{resource} e.g. shrd/prod/net-vpc  or  stg/eu/svc-gke
+        entry["env"] = stack.env.name
+    return entry
 
 
-def gcp_stacks():
+def gcp_stacks(cache=None):
+    cache = cache if cache is not None else load_cache()
     stacks = []
-    for hcl in find_stacks(GCP_ENVS):
-        rel = hcl.relative_to(GCP_ENVS)
-        parts = rel.parts[:-1]
-        source, ref = read_source(hcl)
-        entry = {
-            "path": str(hcl.relative_to(REPO_ROOT)),
-            "folder": None,
-            "env": None,
-            "resource": None,
-            "module_source": source,
-            "module_ref": ref,
-        }
-        if len(parts) == 0:
-            entry["resource"] = "_root"
-        elif parts[0] == "global":
-            entry["folder"] = "global"
-            entry["env"] = "global"
-            entry["resource"] = "/".join(parts[1:]) or "_folder_root"
-        elif len(parts) == 3:
-            # {folder}/{env}/{resource} e.g. shrd/prod/net-vpc  or  stg/eu/svc-gke
-            entry["folder"], entry["env"], entry["resource"] = parts[0], parts[1], parts[2]
+    for s in model.of().stacks:
+        if s.cloud != "gcp":
+            continue
+        if not s.path.is_relative_to(GCP_ENVS):
+            # root terragrunt.hcl one level above envs/
+            stacks.append({
+                "path": str(s.path.relative_to(REPO_ROOT)),
+                "folder": None, "env": None, "resource": "_root",
+                "module_source": None, "module_ref": None,
+            })
         else:
-            entry["folder"] = parts[0] if parts else None
-            entry["resource"] = "/".join(parts[1:]) or "_folder_root"
-        stacks.append(entry)
-    # root terragrunt.hcl one level above envs/
-    root_hcl = GCP_ROOT / "terragrunt" / "terragrunt.hcl"
-    if root_hcl.exists():
-        stacks.insert(0, {
-            "path": str(root_hcl.relative_to(REPO_ROOT)),
-            "folder": None, "env": None, "resource": "_root",
-            "module_source": None, "module_ref": None,
-        })
+            stacks.append(_cached_entry(cache, s.path, gcp_stack))
     return stacks
 
 
 def yaml_key_paths(data, prefix=""):
-    """Flatten every key path in a nested mapping (lists are terminal)."""
-    paths = []
-    if isinstance(data, dict):
-        for k, v in data.items():
-            p = f"{prefix}.{k}" if prefix else str(k)
-            paths.append(p)
-            paths.extend(yaml_key_paths(v, p))
-    return paths
+    """Yield every key path in a nested mapping, depth-first in document
+    order (lists are terminal). Iterative: one items() iterator per open
+    mapping, no intermediate lists."""
+    if not isinstance(data, dict):
+        return
+    open_ = [(prefix, iter(data.items()))]
+    while open_:
+        base, items = open_[-1]
+        for k, v in items:
+            p = f"{base}.{k}" if base else str(k)
+            yield p
+            if isinstance(v, dict):
+                open_.append((p, iter(v.items())))
+                break
+        else:
+            open_.pop()
 
 
 def local_modules():
@@ -202,20 +201,47 @@ def local_modules():
     return mods
 
 
-def file_counts():
+def _index_stat():
+    """(mtime_ns, size) of the git index, or None (e.g. a worktree's .git file)."""
+    try:
+        st = (git.REPO / ".git" / "index").stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def file_counts(cache=None):
     """Counts by extension over git-tracked files only, so local artifacts
     (caches, lock files, __pycache__) cannot perturb the snapshot. evidence/
-    is excluded because snapshot outputs must not count themselves."""
-    import subprocess
-    out = subprocess.run(["git", "ls-files"], cwd=REPO_ROOT,
-                         capture_output=True, text=True, check=True).stdout
+    is excluded because snapshot outputs must not count themselves. Reused
+    from the cache while the git index is unchanged."""
+    cache = cache if cache is not None else load_cache()
+    stat = _index_stat()
+    hit = cache["files"]
+    if stat is not None and hit.get("stat") == stat:
+        return hit["counts"]
     counts = Counter()
-    for line in out.splitlines():
+    for line in git.ls_files():
         parts = Path(line).parts
         if parts and parts[0] == "evidence":
             continue
         counts[Path(line).suffix or "(none)"] += 1
-    return dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+    counts = dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+    cache["files"] = {"stat": stat, "counts": counts}
+    return counts
+
+
+def vars_key_paths(path: Path, cache=None):
+    """Key paths of a vars file, re-parsed only when its bytes change."""
+    cache = cache if cache is not None else load_cache()
+    key = str(path.relative_to(REPO_ROOT))
+    digest = _digest(path.read_bytes())
+    hit = cache["vars"].get(key)
+    if isinstance(hit, dict) and hit.get("hash") == digest:
+        return hit["key_paths"]
+    paths = list(yaml_key_paths(load_vars_yaml(path)))
+    cache["vars"][key] = {"hash": digest, "key_paths": paths}
+    return paths
 
 
 def stacks_by_env(aws, gcp):
@@ -227,49 +253,145 @@ def stacks_by_env(aws, gcp):
     return dict(sorted(c.items()))
 
 
-def build():
-    aws = aws_stacks()
-    gcp = gcp_stacks()
-    aws_vars = load_vars_yaml(AWS_ROOT / "vars.yaml")
-    gcp_vars = load_vars_yaml(GCP_ROOT / "terragrunt" / "vars.yaml")
-    return {
+def build(cache_path=ENTRY_CACHE):
+    """The snapshot, assembled from cached per-stack / per-file entries
+    (cache_path None: no cache)."""
+    cache = load_cache(cache_path)
+    aws = aws_stacks(cache)
+    gcp = gcp_stacks(cache)
+    snapshot = {
         "schema_version": 1,
         "aws": {
             "stacks": aws,
-            "vars_key_paths": yaml_key_paths(aws_vars),
+            "vars_key_paths": vars_key_paths(AWS_ROOT / "vars.yaml", cache),
         },
         "gcp": {
             "stacks": gcp,
-            "vars_key_paths": yaml_key_paths(gcp_vars),
+            "vars_key_paths": vars_key_paths(GCP_ROOT / "terragrunt" / "vars.yaml", cache),
             "local_modules": local_modules(),
         },
         "counts": {
-            "files_by_extension": file_counts(),
+            "files_by_extension": file_counts(cache),
             "stacks_by_env": stacks_by_env(aws, gcp),
             "aws_stacks_total": len(aws),
             "gcp_stacks_total": len(gcp),
         },
     }
+    if cache_path:
+        # drop entries for stacks that no longer exist
+        live = {s["path"] for s in aws + gcp}
+        cache["stacks"] = {k: v for k, v in cache["stacks"].items() if k in live}
+        save_cache(cache, cache_path)
+    return snapshot
+
+
+def _keyed_delta(old, new, key):
+    """{"added", "removed", "changed": {key: {field: [old, new]}}} of two
+    lists of dicts matched on key."""
+    old = {e[key]: e for e in old or []}
+    new = {e[key]: e for e in new or []}
+    changed = {}
+    for k in sorted(old.keys() & new.keys()):
+        fields = {f: [old[k].get(f), new[k].get(f)]
+                  for f in sorted(old[k].keys() | new[k].keys())
+                  if old[k].get(f) != new[k].get(f)}
+        if fields:
+            changed[k] = fields
+    return {"added": sorted(new.keys() - old.keys()),
+            "removed": sorted(old.keys() - new.keys()), "changed": changed}
+
+
+def _paths_delta(old, new):
+    old, new = set(old or []), set(new or [])
+    return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def _counts_delta(old, new, prefix=""):
+    out = {}
+    for k in sorted((old or {}).keys() | (new or {}).keys()):
+        a, b = (old or {}).get(k), (new or {}).get(k)
+        p = f"{prefix}[{k}]" if prefix else k
+        if isinstance(a, dict) or isinstance(b, dict):
+            out.update(_counts_delta(a if isinstance(a, dict) else {},
+                                     b if isinstance(b, dict) else {}, p))
+        elif a != b:
+            out[p] = [a, b]
+    return out
+
+
+def delta(existing, snapshot):
+    """Structured difference between a recorded snapshot and the current one:
+    per cloud, stacks (by path) and vars key paths added / removed / changed,
+    local modules (gcp), and every changed count. "stale" is False only if
+    the two are equal."""
+    out = {"stale": existing != snapshot}
+    if existing.get("schema_version") != snapshot["schema_version"]:
+        out["schema_version"] = [existing.get("schema_version"), snapshot["schema_version"]]
+    for cloud in ("aws", "gcp"):
+        old, new = existing.get(cloud) or {}, snapshot[cloud]
+        out[cloud] = {"stacks": _keyed_delta(old.get("stacks"), new["stacks"], "path"),
+                      "vars_key_paths": _paths_delta(old.get("vars_key_paths"),
+                                                     new["vars_key_paths"])}
+        if "local_modules" in new:
+            out[cloud]["local_modules"] = _keyed_delta(old.get("local_modules"),
+                                                       new["local_modules"], "name")
+    out["counts"] = _counts_delta(existing.get("counts"), snapshot["counts"])
+    return out
+
+
+def render_delta(d):
+    """Text lines for a delta (one per drifted item)."""
+    lines = []
+    if "schema_version" in d:
+        lines.append(f"  schema_version: {d['schema_version'][0]} -> {d['schema_version'][1]}")
+    for cloud in ("aws", "gcp"):
+        for part in ("stacks", "local_modules", "vars_key_paths"):
+            sec = d[cloud].get(part)
+            if not sec:
+                continue
+            for k in sec["added"]:
+                lines.append(f"  {cloud} {part}: + {k}")
+            for k in sec["removed"]:
+                lines.append(f"  {cloud} {part}: - {k}")
+            for k, fields in sec.get("changed", {}).items():
+                for f, (a, b) in fields.items():
+                    lines.append(f"  {cloud} {part}: ~ {k} {f}: {a} -> {b}")
+    for k, (a, b) in d["counts"].items():
+        lines.append(f"  counts: ~ {k}: {a} -> {b}")
+    return lines
 
 
 def main():
-    ap = argparse.ArgumentParser(description=__doc__)
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument("--check", action="store_true",
                     help="verify the existing BASELINE.json matches current repo state")
+    ap.add_argument("--json", action="store_true",
+                    help="with --check: print the delta as JSON on stdout")
     ap.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    ap.add_argument("--no-cache", action="store_true",
+                    help=f"rebuild every entry; do not read or write {ENTRY_CACHE.name}")
     args = ap.parse_args()
 
-    snapshot = build()
+    snapshot = build(None if args.no_cache else ENTRY_CACHE)
 
     if args.check:
         if not args.output.exists():
             print(f"FAIL: {args.output} does not exist", file=sys.stderr)
             return 1
         existing = json.loads(args.output.read_text(encoding="utf-8"))
-        if existing == snapshot:
-            print(f"OK: {args.output} matches current repo state")
+        d = delta(existing, snapshot)
+        if args.json:
+            print(json.dumps(d, indent=2))
+        if not d["stale"]:
+            if not args.json:
+                print(f"OK: {args.output} matches current repo state")
             return 0
-        print(f"FAIL: {args.output} is stale relative to the repo; regenerate it", file=sys.stderr)
+        lines = render_delta(d)
+        print(f"FAIL: {args.output} is stale relative to the repo "
+              f"({len(lines)} drifted items); regenerate it", file=sys.stderr)
+        if not args.json:
+            print("\n".join(lines), file=sys.stderr)
         return 1
 
     args.output.parent.mkdir(parents=True, exist_ok=True)
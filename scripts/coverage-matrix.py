@@ -9,6 +9,13 @@ Derivation is mechanical: stack presence on disk + key presence in vars.yaml.
 No cloud calls. A control family scored from stack presence alone is at best
 PARTIAL — content-level verification arrives with the G1 scoring engine.
 
+Columns are every AWS region/env and GCP folder/env that has stacks
+(loaders.aws_env_stacks / gcp_env_stacks), plus PLANNED_COLUMNS the plan
+requires whether or not they exist yet. Stack presence is answered from the
+shared stack index (loaders.has_stack, one directory walk per run) and vars
+predicates from the inverted index of each parsed tree (lib/varindex.py),
+so adding an env adds a column without adding filesystem or tree walks.
+
 Controls: PCI-DSS 12.5.1 (asset/control inventory), SOC2 CC3.2 (risk
 identification), CIS overall mapping.
 
@@ -18,24 +25,27 @@ Usage:
 """
 
 import argparse
-import importlib.util
 import sys
+import textwrap
 from pathlib import Path
 
-REPO_ROOT = Path(__file__).resolve().parent.parent
-AWS_ROOT = REPO_ROOT / "aws-terragrunt-configuration" / "aws"
-GCP_ROOT = REPO_ROOT / "gcp-terragrunt-configuration"
-GCP_ENVS = GCP_ROOT / "terragrunt" / "envs"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import facts, loaders, varindex as vx  # noqa: E402
+
+REPO_ROOT = loaders.REPO_ROOT
 OUTPUT = REPO_ROOT / "docs" / "preprod" / "COVERAGE_MATRIX.md"
 
-# reuse the anchor-tolerant YAML loader from baseline-inventory.py
-_spec = importlib.util.spec_from_file_location(
-    "baseline_inventory", REPO_ROOT / "scripts" / "baseline-inventory.py")
-_bi = importlib.util.module_from_spec(_spec)
-_spec.loader.exec_module(_bi)
-load_vars_yaml = _bi.load_vars_yaml
+# columns the plan scopes in even while the repo has no stacks for them
+PLANNED_COLUMNS = {
+    "gcp/stg/us": "the repo has no `envs/stg/us` tree (GCP stg exists only as "
+                  "`envs/stg/eu`). The plan's G4 scope must either create it or "
+                  "formally descope it.",
+}
 
-COLUMNS = ["aws/us/dev", "aws/us/stg", "aws/eu/stg", "gcp/stg/eu", "gcp/stg/us"]
+# column order: env tier first, then region in each cloud's established order
+# (GCP stg has always listed eu before the planned us); unknown names sort last
+TIERS = ("dev", "stg", "prod", "shrd")
+REGIONS = {"aws": ("us", "eu"), "gcp": ("eu", "us")}
 
 FAMILIES = [
     "network isolation",
@@ -53,7 +63,30 @@ AWS_DATA_SERVICES = ["rds", "aurora", "dynamodb", "redis", "s3"]
 
 
 def stack(path: str) -> bool:
-    return (REPO_ROOT / path / "terragrunt.hcl").exists()
+    return loaders.has_stack(path)
+
+
+def _rank(name, order):
+    return (order.index(name) if name in order else len(order), name)
+
+
+def columns():
+    """[(column, cloud, a, b)]: aws (region, env) and gcp (folder, env) pairs
+    with stacks, plus the planned columns, in tier order."""
+    found = {("aws", s["region"], s["env"]) for s in loaders.aws_env_stacks()}
+    found |= {("gcp", s["folder"], s["env"]) for s in loaders.gcp_env_stacks()
+              if s["folder"] != "global"}
+    found |= {tuple(c.split("/")) for c in PLANNED_COLUMNS}
+    aws = sorted((k for k in found if k[0] == "aws"),
+                 key=lambda k: (_rank(k[2], TIERS), _rank(k[1], REGIONS["aws"])))
+    gcp = sorted((k for k in found if k[0] == "gcp"),
+                 key=lambda k: (_rank(k[1], TIERS), _rank(k[2], REGIONS["gcp"])))
+    return [("/".join(k), *k) for k in aws + gcp]
+
+
+def gcp_envs():
+    """(folder, env) pairs that hold at least one stack."""
+    return {(s["folder"], s["env"]) for s in loaders.gcp_env_stacks()}
 
 
 def cell(status: str, evidence: str):
@@ -68,16 +101,19 @@ def aws_env_resources(aws_vars, region: str, env: str):
 
 def aws_encryption_cell(aws_vars, region, env):
     res = aws_env_resources(aws_vars, region, env)
+    ax = vx.of(aws_vars)
     encrypted, unencrypted, missing = [], [], []
     for svc in AWS_DATA_SERVICES:
         block = res.get(svc)
         if not isinstance(block, dict):
             missing.append(svc)
             continue
-        text = str(block)
-        if "'storage_encrypted': True" in text or "kms_key" in text or "'encrypted': True" in text:
+        under = f"Environments.{region}-{env}.Resources.{svc}"
+        if vx.key_value(ax, "storage_encrypted", True, under) \
+                or vx.mentions(ax, "kms_key", under) \
+                or vx.key_value(ax, "encrypted", True, under):
             encrypted.append(svc)
-        elif "'storage_encrypted': False" in text:
+        elif vx.key_value(ax, "storage_encrypted", False, under):
             unencrypted.append(svc)
         else:
             missing.append(svc)
@@ -139,7 +175,7 @@ def gcp_column(gcp_vars, folder, env):
     gbase = "gcp-terragrunt-configuration/terragrunt/envs/global"
     cells = {}
 
-    if not (GCP_ENVS / folder / env).is_dir():
+    if (folder, env) not in gcp_envs():
         for fam in FAMILIES:
             cells[fam] = cell("ABSENT", f"envs/{folder}/{env} does not exist in the repo")
         return cells
@@ -154,11 +190,14 @@ def gcp_column(gcp_vars, folder, env):
         "ABSENT",
         f"{base}/net-firewalls provides distributed rules only; no centralized inspection/NGFW path")
 
-    env_vars = (gcp_vars.get("envs", {}).get(folder, {}).get(env, {})
-                .get("resources", {}) or {})
-    txt = str(env_vars)
-    has_dbenc = "'database_encryption': True" in txt or '"database_encryption": true' in txt
-    has_kms = "kms_rings" in txt or "kms_key" in txt
+    gx = vx.of(gcp_vars)
+    under = f"envs.{folder}.{env}.resources"
+
+    def mentions(*words):
+        return any(vx.mentions(gx, w, under) for w in words)
+
+    has_dbenc = bool(vx.key_value(gx, "database_encryption", True, under))
+    has_kms = mentions("kms_rings", "kms_key")
     cells["encryption/CMEK"] = cell(
         "PARTIAL" if (has_dbenc or has_kms) else "ABSENT",
         f"vars.yaml envs.{folder}.{env}: database_encryption={has_dbenc}, kms refs={has_kms}; no repo-wide KMS stack, no service_encryption_key_ids wiring")
@@ -173,12 +212,12 @@ def gcp_column(gcp_vars, folder, env):
         "PRESENT" if audit else "ABSENT",
         f"{gbase}/audit exists (org-level sink)" if audit else "no audit stack")
 
-    has_sql_backup = "backup_configuration" in txt or "transaction_log_retention_days" in txt
+    has_sql_backup = mentions("backup_configuration", "transaction_log_retention_days")
     cells["backup"] = cell(
         "PARTIAL" if has_sql_backup else "ABSENT",
         f"vars.yaml envs.{folder}.{env}: SQL backup/retention keys={'yes' if has_sql_backup else 'no'}; no GKE/GCS backup, no backup plans")
 
-    has_budget = "budget" in txt
+    has_budget = mentions("budget")
     cells["cost"] = cell(
         "PARTIAL" if has_budget else "ABSENT",
         f"vars.yaml envs.{folder}.{env}: budget keys={'yes' if has_budget else 'no'}; no billing budget stack")
@@ -189,7 +228,7 @@ def gcp_column(gcp_vars, folder, env):
         f"no {gbase}/vpcsc stack; no service perimeter (even dry-run)")
 
     iam = stack(f"{gbase}/iam")
-    has_wi = "workload_identity" in txt
+    has_wi = mentions("workload_identity")
     cells["identity"] = cell(
         "PARTIAL" if (iam or has_wi) else "ABSENT",
         f"{gbase}/iam exists; workload_identity_iam in env vars={'yes' if has_wi else 'no'}; no SA-key-creation guardrail (needs org policy)")
@@ -197,18 +236,17 @@ def gcp_column(gcp_vars, folder, env):
 
 
 def build_matrix():
-    aws_vars = load_vars_yaml(AWS_ROOT / "vars.yaml")
-    gcp_vars = load_vars_yaml(GCP_ROOT / "terragrunt" / "vars.yaml")
+    model = facts.model()  # the vars parse shared with the other gates
+    aws_vars, gcp_vars = model["aws"], model["gcp"]
     matrix = {}
-    matrix["aws/us/dev"] = aws_column(aws_vars, "us", "dev")
-    matrix["aws/us/stg"] = aws_column(aws_vars, "us", "stg")
-    matrix["aws/eu/stg"] = aws_column(aws_vars, "eu", "stg")
-    matrix["gcp/stg/eu"] = gcp_column(gcp_vars, "stg", "eu")
-    matrix["gcp/stg/us"] = gcp_column(gcp_vars, "stg", "us")
+    for col, cloud, a, b in columns():
+        matrix[col] = aws_column(aws_vars, a, b) if cloud == "aws" \
+            else gcp_column(gcp_vars, a, b)
     return matrix
 
 
 def render(matrix):
+    cols = list(matrix)
     lines = [
         "# Coverage Matrix (G0-3)",
         "",
@@ -221,17 +259,17 @@ def render(matrix):
         "exists but is incomplete or unverified at content level; ABSENT = no",
         "implementing artifact in the repo.",
         "",
-        "| Control family | " + " | ".join(COLUMNS) + " |",
-        "|---|" + "---|" * len(COLUMNS),
+        "| Control family | " + " | ".join(cols) + " |",
+        "|---|" + "---|" * len(cols),
     ]
     for fam in FAMILIES:
         row = [f"| {fam}"]
-        for col in COLUMNS:
+        for col in cols:
             row.append(matrix[col][fam]["status"])
         lines.append(" | ".join(row) + " |")
 
     lines += ["", "## Evidence per cell", ""]
-    for col in COLUMNS:
+    for col in cols:
         lines.append(f"### {col}")
         lines.append("")
         lines.append("| Control family | Status | Evidence |")
@@ -241,12 +279,12 @@ def render(matrix):
             lines.append(f"| {fam} | {c['status']} | {c['evidence']} |")
         lines.append("")
 
+    lines += ["## Notes", ""]
+    for col, why in PLANNED_COLUMNS.items():
+        if all(c["status"] == "ABSENT" for c in matrix[col].values()):
+            lines += textwrap.wrap(f"- `{col}` is entirely absent: {why}", 76,
+                                   subsequent_indent="  ")
     lines += [
-        "## Notes",
-        "",
-        "- `gcp/stg/us` is entirely absent: the repo has no `envs/stg/us` tree",
-        "  (GCP stg exists only as `envs/stg/eu`). The plan's G4 scope must either",
-        "  create it or formally descope it.",
         "- AWS org-scope stacks (scp, cloudtrail, iam) cover every column but are",
         "  not env-scoped; they are scored PARTIAL pending content checks in G1.",
         "- README claims GuardDuty; no GuardDuty stack exists (G3-7 closes this).",
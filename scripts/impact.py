@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Vars change impact: which stacks and generated docs a vars.yaml diff touches.
+
+Diffs the parsed (anchor-resolved) vars trees of a base git ref against the
+working tree at leaf key-path level (scripts/lib/diff.py), then maps every
+changed path to the stacks that read it by the repo's path convention:
+
+  AWS  Environments.{region}-{env}.Resources.{svc}  -> aws/{svc}/{region}/{env}
+       Environments.{account}.Resources.{svc}       -> aws/{account}/{svc}, else
+                                                       a stack dir named {svc}
+       Environments.{key}.<other>                   -> every stack of that env
+  GCP  envs.{folder}.{env}.resources.{res}          -> envs/{folder}/{env}/{res}
+       envs.global.resources.{res}                  -> envs/global/{res}
+       envs.{folder}[.{env}].<other>                -> every stack below it
+  both common.* or any other top-level key          -> every stack of that cloud
+
+plus every stack whose hcl indexes common_vars at, above or below the
+changed path outside that convention (e.g. envs/global/vpcsc reads
+envs.stg.eu.resources; lib/fingerprint.extra_reads, which keys the plan
+cache on the same reads).
+
+Stacks that depend on an affected stack (scripts/lib/graph.py) are listed as
+downstream: their plans read its outputs. A resource block with no stack on
+disk affects no stack (input-assertions reports those). Generated docs are
+listed from the generator -> source table below; docs that carry a sha256
+trailer over the vars files go stale on any change to them.
+
+Only vars.yaml is diffed; hcl and module edits are out of scope (the plan
+cache in plan-stacks fingerprints those).
+
+Usage:
+  python3 scripts/impact.py                      # vs HEAD, text
+  python3 scripts/impact.py --base origin/main   # vs merge target
+  python3 scripts/impact.py --format json        # for CI scoping
+  python3 scripts/impact.py --format stacks      # one stack dir per line
+
+Controls: SOC2 CC8.1 (change impact assessment), PCI-DSS 6.4.x.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import diff as vardiff, fingerprint, git, graph as stackgraph, loaders  # noqa: E402
+
+REPO = loaders.REPO_ROOT
+
+# generated doc -> (generator, vars files it reads, what it depends on):
+# "any" = whole-file bytes (sha256 trailer or value-derived content),
+# "keys" = only the set of key paths.
+GENERATED_DOCS = [
+    ("NETWORK_TOPOLOGY.md", "scripts/render-topology.py", ("aws", "gcp"), "any"),
+    ("architecture.mmd", "scripts/render-topology.py", ("aws", "gcp"), "any"),
+    ("ARCHITECTURE_REPORT.json", "scripts/architecture-score.py", ("aws", "gcp"), "any"),
+    ("ARCHITECTURE_SCORECARD.md", "scripts/architecture-score.py", ("aws", "gcp"), "any"),
+    ("CMEK_WIRING.md", "scripts/render-cmek-wiring.py", ("gcp",), "any"),
+    ("INPUT_ASSERTIONS.md", "scripts/input-assertions.py", ("aws", "gcp"), "any"),
+    ("PLACEHOLDERS.md", "scripts/placeholder-scan.py", ("aws", "gcp"), "any"),
+    ("docs/preprod/COVERAGE_MATRIX.md", "scripts/coverage-matrix.py", ("aws", "gcp"), "any"),
+    ("evidence/G0/BASELINE.json", "scripts/baseline-inventory.py", ("aws", "gcp"), "keys"),
+]
+
+VARS_FILES = {"aws": loaders.AWS_VARS, "gcp": loaders.GCP_VARS}
+
+
+def load_vars_at(ref, path: Path):
+    """Parsed vars file as of a git ref ({} if absent there)."""
+    text = git.show(ref, path.relative_to(REPO))
+    return (loaders.load_vars_text(text) or {}) if text is not None else {}
+
+
+def _split(path, keys):
+    """(key, rest) for the longest key in keys that prefixes dotted path;
+    keys may themselves contain dots. (None, path) if none matches."""
+    best = None
+    for k in keys:
+        k = str(k)
+        if (path == k or path.startswith(k + ".")) and (best is None or len(k) > len(best)):
+            best = k
+    if best is None:
+        return None, path
+    return best, path[len(best) + 1:]
+
+
+def _keys(trees, *walk):
+    """Union of the keys found at one nesting position across trees."""
+    out = set()
+    for t in trees:
+        for w in walk:
+            t = t.get(w) if isinstance(t, dict) else None
+        if isinstance(t, dict):
+            out.update(str(k) for k in t)
+    return out
+
+
+def stack_index():
+    """Stack nodes by cloud and by their convention coordinates."""
+    aws, gcp = {}, {}
+    for p in loaders.find_stacks(loaders.AWS_ROOT):
+        aws[stackgraph.stack_key(p)] = p.relative_to(loaders.AWS_ROOT).parts[:-1]
+    for p in loaders.find_stacks(loaders.GCP_TG_ROOT):
+        parts = p.relative_to(loaders.GCP_TG_ROOT).parts[:-1]
+        gcp[stackgraph.stack_key(p)] = parts[1:] if parts[:1] == ("envs",) else None
+    return aws, gcp
+
+
+def read_index():
+    """{cloud: {node: [dotted key path]}} of the vars reads each stack makes
+    outside the path convention ("" is the whole tree)."""
+    out = {}
+    for cloud, root, section in (("aws", loaders.AWS_ROOT, "Environments"),
+                                 ("gcp", loaders.GCP_TG_ROOT, "envs")):
+        out[cloud] = {}
+        for p in loaders.find_stacks(root):
+            reads = [".".join(keys) for keys, _ in fingerprint.extra_reads(p, section)]
+            if reads:
+                out[cloud][stackgraph.stack_key(p)] = reads
+    return out
+
+
+def read_targets(path, reads):
+    """Stack nodes reading one changed vars path, or a subtree holding it or
+    held by it, outside the convention."""
+    return {n for n, rs in reads.items()
+            if any(not r or path == r or path.startswith(r + ".") or r.startswith(path + ".")
+                   for r in rs)}
+
+
+def aws_targets(path, trees, stacks):
+    """Stack nodes reading one changed AWS vars path."""
+    top, rest = _split(path, _keys(trees))
+    if top != "Environments":
+        return set(stacks)
+    envkey, rest = _split(rest, _keys(trees, "Environments"))
+    if envkey is None:
+        return set(stacks)
+    region_env = tuple(envkey.split("-", 1)) if "-" in envkey else None
+    in_env = {n for n, parts in stacks.items()
+              if (region_env and tuple(parts[-2:]) == region_env and len(parts) >= 3)
+              or (len(parts) == 2 and parts[0] == envkey)}
+    section, rest = _split(rest, {"Resources"})
+    if section is None:
+        return in_env
+    svc, _ = _split(rest, _keys(trees, "Environments", envkey, "Resources"))
+    if svc is None:
+        return in_env
+    hit = {n for n, parts in stacks.items()
+           if (region_env and parts == (*svc.split("/"), *region_env))
+           or parts == (envkey, svc)}
+    return hit or {n for n, parts in stacks.items() if parts and parts[-1] == svc
+                   and not (len(parts) >= 3 and parts[-2] in loaders.AWS_REGIONS)}
+
+
+def gcp_targets(path, trees, stacks):
+    """Stack nodes reading one changed GCP vars path."""
+    top, rest = _split(path, _keys(trees))
+    if top != "envs":
+        return set(stacks)
+    folder, rest = _split(rest, _keys(trees, "envs"))
+    if folder is None:
+        return set(stacks)
+    below = lambda *prefix: {n for n, parts in stacks.items()  # noqa: E731
+                             if parts and parts[:len(prefix)] == prefix}
+    env_keys = _keys(trees, "envs", folder)
+    if "resources" in env_keys:  # flat folder: envs.{folder}.resources.{res}
+        section, rest = _split(rest, {"resources"})
+        res, _ = _split(rest, _keys(trees, "envs", folder, "resources"))
+        return below(folder, res) if section and res else below(folder)
+    env, rest = _split(rest, env_keys)
+    if env is None:
+        return below(folder)
+    section, rest = _split(rest, {"resources"})
+    res, _ = _split(rest, _keys(trees, "envs", folder, env, "resources"))
+    return below(folder, env, res) if section and res else below(folder, env)
+
+
+def downstream(nodes, graph):
+    """Stacks that transitively depend on any of nodes (excluding nodes)."""
+    rdeps = {}
+    for n, deps in graph["edges"].items():
+        for d in deps:
+            rdeps.setdefault(d, set()).add(n)
+    out, todo = set(), list(nodes)
+    while todo:
+        for n in rdeps.get(todo.pop(), ()):
+            if n not in out and n not in nodes:
+                out.add(n)
+                todo.append(n)
+    return out
+
+
+def analyse(base_ref):
+    aws_stacks, gcp_stacks = stack_index()
+    reads = read_index()
+    targets = {"aws": (aws_targets, aws_stacks), "gcp": (gcp_targets, gcp_stacks)}
+    changes, by_path, keys_changed = {}, {}, set()
+    for cloud, vars_path in VARS_FILES.items():
+        base = load_vars_at(base_ref, vars_path)
+        head = loaders.load_vars_yaml(vars_path) if vars_path.exists() else {}
+        d = vardiff.diff(base, head)
+        changes[cloud] = d
+        if d["added"] or d["removed"]:
+            keys_changed.add(cloud)
+        fn, stacks = targets[cloud]
+        for kind in ("added", "removed", "changed"):
+            for p in d[kind]:
+                by_path[f"{cloud}:{p}"] = sorted(fn(p, (base, head), stacks)
+                                                 | read_targets(p, reads[cloud]))
+    direct = {n for nodes in by_path.values() for n in nodes}
+    down = downstream(direct, stackgraph.build_graph())
+    touched = {c for c, d in changes.items() if any(d.values())}
+    docs = [{"path": doc, "generator": gen}
+            for doc, gen, clouds, dep in GENERATED_DOCS
+            if (keys_changed if dep == "keys" else touched) & set(clouds)]
+    return {"base": base_ref, "changes": changes, "paths": by_path,
+            "stacks": {"direct": sorted(direct), "downstream": sorted(down)},
+            "docs": docs}
+
+
+def render_text(result):
+    lines = [f"vars impact vs {result['base']}:"]
+    for cloud, d in result["changes"].items():
+        lines.append(f"  {cloud}: {len(d['added'])} added, {len(d['removed'])} removed, "
+                     f"{len(d['changed'])} changed leaf paths")
+    for path, nodes in sorted(result["paths"].items()):
+        lines.append(f"  {path} -> {len(nodes)} stacks")
+    for label in ("direct", "downstream"):
+        nodes = result["stacks"][label]
+        lines.append(f"{label} stacks ({len(nodes)}):")
+        lines += [f"  {n}" for n in nodes]
+    lines.append(f"generated docs ({len(result['docs'])}):")
+    lines += [f"  {d['path']}  ({d['generator']})" for d in result["docs"]]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default="HEAD", help="git ref to diff against (default HEAD)")
+    ap.add_argument("--format", choices=["text", "json", "stacks"], default="text")
+    args = ap.parse_args()
+
+    if git.object_id(f"{args.base}^{{commit}}") is None:
+        print(f"FAIL: unknown git ref {args.base!r}", file=sys.stderr)
+        return 1
+    result = analyse(args.base)
+    if args.format == "json":
+        print(json.dumps(result, indent=2, default=str))
+    elif args.format == "stacks":
+        for n in result["stacks"]["direct"] + result["stacks"]["downstream"]:
+            print(n)
+    else:
+        print(render_text(result), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,6 +25,7 @@ Controls: SOC2 CC8.1 (declared config is deployed config), PCI-DSS 6.4.
 import argparse
 import re
 import sys
+from collections import defaultdict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -48,6 +49,41 @@ def load_allowlist():
     return entries
 
 
+# every literal "..." span, including ones nested in ${...} interpolations:
+# consecutive quote pairs are matched with a lookahead so spans may overlap
+QUOTED_RE = re.compile(r'(?="([^"]*)")')
+INDEX_REF_RE = re.compile(r'\["([^"]*)"\]')
+RESOURCES_REF_RE = re.compile(r"Resources\.([\w-]+)")
+
+
+def hcl_consumption_index(hcl_texts):
+    """One pass over every AWS stack: inverted maps from a token to the set of
+    hcl paths containing it.
+
+      quoted    "<envkey>" literals
+      svc_refs  ["<svc>"] index lookups and Resources.<svc> attribute refs
+      basename  stack directory name
+
+    A Resources.api-gw ref also indexes "api", matching the word-boundary
+    semantics of the per-key regex it replaces.
+    """
+    index = {"quoted": defaultdict(set), "svc_refs": defaultdict(set),
+             "basename": defaultdict(set)}
+    for p, t in hcl_texts.items():
+        index["basename"][p.parent.name].add(p)
+        for m in QUOTED_RE.finditer(t):
+            index["quoted"][m.group(1)].add(p)
+        for m in INDEX_REF_RE.finditer(t):
+            index["svc_refs"][m.group(1)].add(p)
+        for m in RESOURCES_REF_RE.finditer(t):
+            ref = m.group(1)
+            index["svc_refs"][ref].add(p)
+            for i, ch in enumerate(ref):
+                if ch == "-" and i and ref[i - 1] != "-":
+                    index["svc_refs"][ref[:i]].add(p)
+    return index
+
+
 def aws_findings(aws):
     """L1: every Environments.{key}.Resources.{svc} block must be consumed.
 
@@ -59,12 +95,18 @@ def aws_findings(aws):
          directory basename equals the resource name exists.
     A region-env miss where a same-named global stack exists is reported as
     L1-INDIRECT (verify the global stack's lookup, or allowlist).
+
+    Literal lookups are answered by set intersection over
+    hcl_consumption_index(), so each key costs O(1) rather than a scan of
+    every hcl file.
     """
     findings = []
     stacks = {(s["service"], s["region"], s["env"]) for s in loaders.aws_env_stacks()}
     hcl_files = loaders.find_stacks(loaders.AWS_ROOT)
     hcl_texts = {p: p.read_text(encoding="utf-8", errors="replace") for p in hcl_files}
-    stack_basenames = {p.parent.name for p in hcl_files}
+    index = hcl_consumption_index(hcl_texts)
+    empty = frozenset()
+    stack_basenames = set(index["basename"])
     # parent-dir convention: aws/{account}/{resource} stacks read
     # Environments[basename(dirname)] via local.account (e.g. security/scp)
     parent_dir_stacks = {(p.parent.parent.name, p.parent.name) for p in hcl_files}
@@ -81,17 +123,15 @@ def aws_findings(aws):
                 continue
             if (envkey, svc) in parent_dir_stacks:
                 continue
+            naming_env = index["quoted"].get(envkey, empty)
             # literal lookup: one hcl file naming both the env key and the
             # resource (e.g. accounts stack reads Environments.master.*)
-            svc_pat = re.compile(rf'\["{re.escape(svc)}"\]|Resources\.{re.escape(svc)}\b')
-            if any(f'"{envkey}"' in t and svc_pat.search(t)
-                   for t in hcl_texts.values()):
+            if naming_env & index["svc_refs"].get(svc, empty):
                 continue
             # interpolated resource lookup: a stack dir named after the
             # resource whose hcl names the env key literally (e.g. cloudtrail
             # reads Environments["log-archive"]...[local.resource])
-            if any(p.parent.name == svc and f'"{envkey}"' in t
-                   for p, t in hcl_texts.items()):
+            if naming_env & index["basename"].get(svc, empty):
                 continue
             if svc in stack_basenames:
                 findings.append({
@@ -110,8 +150,8 @@ def aws_findings(aws):
     return findings
 
 
-def gcp_module_for_stack(hcl_path):
-    src = loaders.read_module_source(hcl_path) or ""
+def gcp_module_for_stack(hcl_path, text=None):
+    src = loaders.read_module_source(hcl_path, text) or ""
     m = re.search(r"tf-modules//?([\w-]+)", src)
     return loaders.GCP_MODULES / m.group(1) if m else None
 
@@ -138,11 +178,13 @@ def gcp_findings(gcp):
             hcl = stacks.get(skey)
             if hcl is None:
                 continue
-            module_dir = gcp_module_for_stack(hcl)
+            hcl_text = hcl.read_text(encoding="utf-8", errors="replace")
+            module_dir = gcp_module_for_stack(hcl, hcl_text)
             if module_dir is None or not module_dir.is_dir():
                 continue
-            declared_vars = loaders.module_declared_variables(module_dir)
-            hcl_text = hcl.read_text(encoding="utf-8", errors="replace")
+            # memoized per module content hash: stacks sharing a module
+            # (svc-gke, svc-sql, net-vpc...) resolve to one parse
+            declared_vars = loaders.module_variable_index(module_dir)
             inputs = (rblock or {}).get("inputs", {}) if isinstance(rblock, dict) else {}
             for key in (inputs or {}):
                 if key in declared_vars or f'"{key}"' in hcl_text or key in hcl_text:
@@ -2,6 +2,20 @@
 
 Modules:
   loaders  — anchor-tolerant YAML loading, repo paths, stack discovery
+             (one walk per process: stack_index, has_stack),
+             module variable index (cached under .gate-cache/)
+  hcl      — structural terragrunt/HCL reader (blocks, inputs, dependencies)
+  model    — read-only slotted records (Env, Stack, Resource, Network,
+             Subnet) cross-linked once per run over both trees
+  graph    — stack dependency graph, topological levels, DOT/JSON export
+  fingerprint — stack input fingerprints (plan cache keys)
+  diff     — structural (Merkle-hashed) diff of parsed vars trees
+  varindex — inverted key/value index over a loaded vars tree
+  checks   — declarative scoring checks, one traversal per vars tree
+  facts    — memoized repo facts shared by compliance and scoring gates
   rules    — compliance rules as data (IDs preserved from legacy checker)
+  engine   — evaluates the predicates attached to rules over facts
   report   — fixed-schema check records, scoring, scorecard rendering
+  history  — append-only SQLite score history per commit, trend queries
+  git      — persistent `git cat-file --batch` reader, ls-tree/ls-files
 """
@@ -0,0 +1,112 @@
+"""Declarative scoring checks, evaluated in one traversal per vars tree.
+
+A check is a dict:
+
+  { "category": "...", "check": "...", "weight": 8,
+    "evidence": "...", "controls": ["PCI-DSS 1.1"],
+    "select": {"aws": ["Environments.{envkey}.Resources.vpc.inputs"],
+               "gcp": ["envs.{folder}.{env}.resources"]},   # optional
+    "match": fn(node, where) -> iterable of items,           # with select
+             (or {"aws": fn, "gcp": fn} when the trees differ in shape)
+    "evaluate": fn(items, ctx) -> (status, explanation[, details]) }
+
+Selectors are dotted key patterns over a loaded tree; each segment is a
+literal key, "*" (any key) or "{name}" (any key, bound as where[name]);
+`where` also carries "path", the node's dotted path. match() runs once per
+selected node and its items are collected in traversal (= file) order;
+evaluate() turns them into a status and explanation for report.record(),
+optionally with details: [(resource, status, explanation)], one per
+offending (or checked) resource, emitted as per-resource records.
+A check without "select" is evaluated once with items = [] — for facts that
+come from the stack tree, hcl or policy files rather than from walking vars.
+
+run() compiles every selector of every check into one set of matcher
+states and walks each tree once, advancing all states at each node visit and
+pruning subtrees no state can match — adding a check adds no traversal.
+
+Controls: headers per check; see the "controls" field of each record.
+"""
+
+from . import report as rp
+
+
+def _compile(pattern):
+    out = []
+    for seg in pattern.split("."):
+        if seg == "*":
+            out.append(("any", None))
+        elif seg.startswith("{") and seg.endswith("}"):
+            out.append(("bind", seg[1:-1]))
+        else:
+            out.append(("key", seg))
+    return tuple(out)
+
+
+def _walk(tree, states, items):
+    """states: [(check index, match fn, compiled pattern, position, bindings)]."""
+    stack = [(tree, "", states)]
+    while stack:
+        node, path, active = stack.pop()
+        pending = []
+        for ci, match, pat, pos, binds in active:
+            if pos == len(pat):
+                items[ci].extend(match(node, dict(binds, path=path)) or ())
+            else:
+                pending.append((ci, match, pat, pos, binds))
+        if not pending or not isinstance(node, dict):
+            continue
+        children = []
+        for k, v in node.items():
+            ks = str(k)
+            nxt = []
+            for ci, match, pat, pos, binds in pending:
+                kind, val = pat[pos]
+                if kind == "key" and val != ks:
+                    continue
+                nxt.append((ci, match, pat, pos + 1,
+                            {**binds, val: ks} if kind == "bind" else binds))
+            if nxt:
+                children.append((v, f"{path}.{ks}" if path else ks, nxt))
+        stack.extend(reversed(children))
+
+
+def run(checks, trees, ctx=None, sink=None):
+    """Run checks over trees ({name: loaded tree}, walked in order); returns
+    the check-level report.record()s in check order. ctx (default: trees)
+    goes to evaluate(). sink, if given, is called with each check record and
+    then its per-resource detail records as they are produced."""
+    ctx = trees if ctx is None else ctx
+    items = [[] for _ in checks]
+    for name, tree in trees.items():
+        states = []
+        for ci, c in enumerate(checks):
+            match = c.get("match")
+            match = match.get(name) if isinstance(match, dict) else match
+            states += [(ci, match, _compile(p), 0, {})
+                       for p in (c.get("select") or {}).get(name, ())]
+        if states:
+            _walk(tree, states, items)
+    recs = []
+    for ci, c in enumerate(checks):
+        status, explanation, *details = c["evaluate"](items[ci], ctx)
+        rec = rp.record(c["category"], c["check"], status, c["weight"],
+                        explanation, c["evidence"], c["controls"])
+        recs.append(rec)
+        if sink is None:
+            continue
+        sink(rec)
+        for resource, rstatus, rexpl in (details[0] if details else ()):
+            sink(rp.record(c["category"], c["check"], rstatus, c["weight"],
+                           rexpl, c["evidence"], c["controls"], resource=resource))
+    return recs
+
+
+def at(tree, dotted, default=None):
+    """tree[k1][k2]... for a dotted path; default if any step is missing,
+    empty or not a mapping."""
+    node = tree
+    for k in dotted.split("."):
+        node = node.get(k) if isinstance(node, dict) else None
+        if not node:
+            return default
+    return node
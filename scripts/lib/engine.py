@@ -0,0 +1,136 @@
+"""Rule engine: evaluates the checks attached to lib/rules.py RULES.
+
+A rule may carry "checks", each naming a predicate registered here:
+
+  {"scope": "aws" | "gcp" | "repo",
+   "predicate": "gke_without_private_nodes",
+   "pass": "PCI-DSS-1.1-GCP",        # tag recorded on pass; None = never
+   "finding": "GKE clusters without private nodes: {items}",
+   "remediation": "Set enable_private_nodes: true"}
+
+A predicate takes the context {"aws", "gcp", "root"} and returns the
+offending items — empty means the check passes. The finding is formatted with
+items (the list), head (its first five) and count. Predicates read the
+memoized facts of lib/facts.py, so a fact shared with architecture-score is
+computed once per process whichever gate asks first.
+
+evaluate() runs the aws checks, then gcp, then repo, each in rule order;
+a cloud's checks are skipped when its vars.yaml is absent.
+
+Controls: the rule id is the control reference (see lib/rules.py).
+"""
+
+from . import facts, model, varindex as vx
+
+SCOPES = ("aws", "gcp", "repo")
+FINDING_FIELDS = ("items", "head", "count")  # what a finding may format
+
+PREDICATES = {}
+
+
+def predicate(fn):
+    PREDICATES[fn.__name__] = fn
+    return fn
+
+
+# -- aws ---------------------------------------------------------------------
+
+@predicate
+def aws_storage_unencrypted(ctx):
+    """Env keys declaring storage_encrypted: false below their Resources."""
+    aws = ctx["aws"]
+    ax = vx.of(aws)
+    return sorted(envkey for envkey in (aws.get("Environments", {}) or {})
+                  if vx.key_value(ax, "storage_encrypted", False,
+                                  under=f"Environments.{envkey}.Resources"))
+
+
+@predicate
+def aws_vpc_without_private_subnets(ctx):
+    """Workload (region-env) VPCs with no private_subnets; hub/transit VPCs
+    (e.g. the network account) are exempt."""
+    bad = []
+    for env in model.of(ctx["aws"], ctx["gcp"]).envs.values():
+        if env.cloud != "aws" or env.region is None or "vpc" not in env.resources:
+            continue
+        vpc = env.resources["vpc"].inputs
+        if vpc and not vpc.get("private_subnets"):
+            bad.append(env.key)
+    return bad
+
+
+@predicate
+def aws_cloudtrail_missing(ctx):
+    return [] if facts.cloudtrail_stack() else ["cloudtrail"]
+
+
+@predicate
+def aws_wildcard_allow(ctx):
+    return facts.wildcard_allow_policies()
+
+
+# -- gcp ---------------------------------------------------------------------
+
+@predicate
+def gke_etcd_unencrypted(ctx):
+    return [f"{folder}/{env}:gke" for (folder, env), gke in facts.gke_inputs().items()
+            if not gke.get("database_encryption")]
+
+
+@predicate
+def gke_without_private_nodes(ctx):
+    public = []
+    for s in facts.gke_stacks():
+        gke = facts.gke_inputs().get((s["folder"], s["env"]))
+        if gke and not gke.get("enable_private_nodes"):
+            public.append(f"{s['folder']}/{s['env']}")
+    return public
+
+
+@predicate
+def gcp_audit_missing(ctx):
+    return [] if facts.gcp_audit_stack() else ["envs/global/audit"]
+
+
+@predicate
+def gke_without_workload_identity(ctx):
+    if not facts.gke_stacks():
+        return ["no svc-gke stacks"]
+    return facts.gke_without_workload_identity()
+
+
+# -- repo --------------------------------------------------------------------
+
+@predicate
+def secret_files(ctx):
+    return facts.secret_files(ctx["root"])
+
+
+@predicate
+def required_docs_missing(ctx):
+    return [d for d in ("SECURITY.md", "CONTRIBUTING.md")
+            if not (ctx["root"] / d).exists()]
+
+
+def evaluate(rules, ctx):
+    """(findings, passed tags) for the checks attached to rules."""
+    findings, passed = [], []
+    for scope in SCOPES:
+        if scope != "repo" and not ctx.get(scope):
+            continue
+        for r in rules:
+            for c in r.get("checks", ()):
+                if c["scope"] != scope:
+                    continue
+                items = PREDICATES[c["predicate"]](ctx)
+                if not items:
+                    if c.get("pass"):
+                        passed.append(c["pass"])
+                    continue
+                findings.append({
+                    "rule_id": r["id"], "framework": r["framework"],
+                    "severity": r["severity"], "category": r["category"],
+                    "finding": c["finding"].format(items=items, head=items[:5],
+                                                   count=len(items)),
+                    "remediation": c["remediation"]})
+    return findings, passed
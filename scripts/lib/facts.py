@@ -0,0 +1,116 @@
+"""Memoized repo facts shared by the compliance and scoring gates.
+
+compliance-check and architecture-score ask several of the same questions of
+the tree: which policy documents Allow Action "*", which GKE stacks wire
+Workload Identity, whether the CloudTrail / GCP audit stacks exist, what the
+GKE inputs of each env are. Each question is a fact function here, computed
+once per process and argument tuple; both gates (and the rule engine,
+scripts/lib/engine.py) read the facts instead of re-deriving them, so a
+combined run scans the policy JSON, parses the GKE hcl and loads each
+vars.yaml exactly once.
+
+Facts are plain values (lists, dicts, bools) over the working tree as it was
+when first asked; clear() drops them (e.g. after editing files in-process).
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+import functools
+import json
+
+from . import hcl, loaders
+
+_memo = {}
+
+
+def fact(fn):
+    """Memoize fn per (name, args) for the process."""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        key = (fn.__name__, args)
+        if key not in _memo:
+            _memo[key] = fn(*args)
+        return _memo[key]
+    return wrapper
+
+
+def clear():
+    _memo.clear()
+
+
+@fact
+def model():
+    """{"aws": tree, "gcp": tree}; a tree is None if its vars.yaml is absent."""
+    return {"aws": loaders.load_aws_vars() if loaders.AWS_VARS.exists() else None,
+            "gcp": loaders.load_gcp_vars() if loaders.GCP_VARS.exists() else None}
+
+
+@fact
+def wildcard_allow_policies():
+    """Repo-relative AWS policy JSON files with an Allow statement on Action "*"
+    (one entry per such statement)."""
+    out = []
+    for jf in loaders.AWS_ROOT.rglob("*.json"):
+        if loaders.CACHE_DIRS.intersection(jf.parts):
+            continue
+        try:
+            doc = json.loads(jf.read_text(encoding="utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            continue
+        stmts = doc.get("Statement", []) if isinstance(doc, dict) else []
+        stmts = [stmts] if isinstance(stmts, dict) else stmts
+        for st in stmts:
+            acts = (st or {}).get("Action", [])
+            acts = [acts] if isinstance(acts, str) else acts
+            if (st or {}).get("Effect") == "Allow" and "*" in acts:
+                out.append(str(jf.relative_to(loaders.REPO_ROOT)))
+    return out
+
+
+@fact
+def cloudtrail_stack():
+    return (loaders.AWS_ROOT / "cloudtrail" / "terragrunt.hcl").exists()
+
+
+@fact
+def gcp_audit_stack():
+    return (loaders.GCP_ENVS / "global" / "audit" / "terragrunt.hcl").exists()
+
+
+@fact
+def gke_stacks():
+    """gcp_env_stacks() entries for svc-gke."""
+    return [s for s in loaders.gcp_env_stacks() if s["resource"] == "svc-gke"]
+
+
+@fact
+def gke_without_workload_identity():
+    """svc-gke stack paths whose inputs do not wire identity_namespace."""
+    return [s["path"] for s in gke_stacks()
+            if "identity_namespace" not in hcl.stack(s["path"])["inputs"]]
+
+
+@fact
+def gke_inputs():
+    """{(folder, env): svc-gke inputs} for every GCP env declaring GKE inputs;
+    flat folders (envs.{folder}.resources) use env "_flat"."""
+    out = {}
+    for folder, envs in ((model()["gcp"] or {}).get("envs", {}) or {}).items():
+        if not isinstance(envs, dict):
+            continue
+        env_iter = [("_flat", envs)] if "resources" in envs else envs.items()
+        for env, envval in env_iter:
+            if not isinstance(envval, dict):
+                continue
+            res = envval.get("resources", {}) or {}
+            gke = (res.get("svc-gke") or {}).get("inputs", {}) or {}
+            if gke:
+                out[(folder, env)] = gke
+    return out
+
+
+@fact
+def secret_files(root):
+    """*.key, *.pem and .env files below root, outside .git."""
+    return [p for pat in ("*.key", "*.pem", ".env")
+            for p in root.rglob(pat) if ".git" not in p.parts]
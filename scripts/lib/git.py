@@ -0,0 +1,168 @@
+"""Git object access without per-file processes.
+
+One long-lived `git cat-file --batch` per process (batch()) serves every blob
+and object-id read: any rev syntax works as the object name ("<oid>",
+"HEAD:path", "origin/main:aws-terragrunt-configuration/aws/vars.yaml",
+"<rev>^{tree}"). read_many() pipelines its requests — written from a thread
+while responses are read — so reading N objects costs one round of pipe I/O,
+not N process spawns. Listings come from one `git ls-tree` / `git ls-files`
+call each; materialize() writes listed blobs out as a tree (e.g. a commit,
+without a checkout) — raw repository contents, without the .gitattributes
+eol/filter conversion a checkout applies. subprocess is imported on the
+first git call, so entry points that only import this module start faster.
+
+Users: impact (vars at a base ref), backfill (historical trees),
+security-gate (checkout-index export), baseline-inventory (tracked files).
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+import atexit
+import os
+import threading
+from pathlib import Path
+
+# the checkout these scripts live in — not loaders.REPO_ROOT, which
+# loaders.set_root() may re-point at a materialized tree
+REPO = Path(__file__).resolve().parent.parent.parent
+
+
+def run(*args):
+    """stdout of a git command in REPO; CalledProcessError on failure."""
+    import subprocess
+
+    return subprocess.run(["git", *args], cwd=REPO, capture_output=True, text=True,
+                          check=True).stdout
+
+
+class CatFile:
+    """A persistent `git cat-file --batch` process."""
+
+    def __init__(self, repo=REPO):
+        import subprocess
+
+        self.proc = subprocess.Popen(["git", "cat-file", "--batch"], cwd=repo,
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def _exchange(self, objs):
+        """[(oid, type, body) or None] for objs, in order."""
+        if any("\n" in o for o in objs):
+            raise ValueError("object names cannot contain newlines")
+        payload = "".join(f"{o}\n" for o in objs).encode("utf-8")
+        out = []
+        with self.lock:
+            writer = threading.Thread(target=self._feed, args=(payload,), daemon=True)
+            writer.start()
+            for _ in objs:
+                header = self.proc.stdout.readline().split()
+                if not header:
+                    raise RuntimeError("git cat-file --batch exited")
+                if len(header) != 3:  # "<name> missing" / "<name> ambiguous"
+                    out.append(None)
+                    continue
+                body = self.proc.stdout.read(int(header[2]))
+                self.proc.stdout.read(1)  # trailing newline
+                out.append((header[0].decode(), header[1].decode(), body))
+            writer.join()
+        return out
+
+    def _feed(self, payload):
+        self.proc.stdin.write(payload)
+        self.proc.stdin.flush()
+
+    def read(self, obj):
+        """Object contents (bytes), or None if it does not exist."""
+        hit = self._exchange([obj])[0]
+        return hit[2] if hit else None
+
+    def read_many(self, objs):
+        """{obj: bytes or None}, one pipelined exchange."""
+        objs = list(dict.fromkeys(objs))
+        return {o: (hit[2] if hit else None) for o, hit in zip(objs, self._exchange(objs))}
+
+    def info(self, obj):
+        """(oid, type) of an object, or None."""
+        hit = self._exchange([obj])[0]
+        return hit[:2] if hit else None
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+
+_batch = None
+
+
+def batch():
+    """The process-wide CatFile (started on first use, closed at exit; a
+    forked child starts its own)."""
+    global _batch
+    if _batch is None or _batch.pid != os.getpid():
+        _batch = CatFile()
+        atexit.register(_batch.close)
+    return _batch
+
+
+def show(rev, path):
+    """Text of path at rev, or None if it does not exist there."""
+    data = batch().read(f"{rev}:{Path(path).as_posix()}")
+    return None if data is None else data.decode("utf-8")
+
+
+def object_id(obj):
+    """Object id of any rev syntax (e.g. a tree: "HEAD:gcp-terragrunt-configuration"),
+    or None."""
+    hit = batch().info(obj)
+    return hit[0] if hit else None
+
+
+def ls_tree(rev, *paths, recursive=True):
+    """[(mode, type, oid, path)] of a tree-ish, optionally limited to paths."""
+    args = ["ls-tree", "-z", "--full-tree"] + (["-r"] if recursive else []) + [rev]
+    out = []
+    for rec in run(*args, "--", *paths).split("\0"):
+        if rec:
+            meta, path = rec.split("\t", 1)
+            mode, kind, oid = meta.split()
+            out.append((mode, kind, oid, path))
+    return out
+
+
+def ls_files(stage=False):
+    """Paths in the index; with stage, [(mode, oid, path)] of its merged
+    (stage 0) entries."""
+    if not stage:
+        return [p for p in run("ls-files", "-z").split("\0") if p]
+    out = []
+    for rec in run("ls-files", "-z", "-s").split("\0"):
+        if rec:
+            meta, path = rec.split("\t", 1)
+            mode, oid, st = meta.split()
+            if st == "0":
+                out.append((mode, oid, path))
+    return out
+
+
+def materialize(entries, dest):
+    """Write [(mode, oid, path)] blobs under dest (symlinks as symlinks,
+    gitlinks skipped); one pipelined read for all of them. Blobs are written
+    as stored: no eol/filter conversion. LookupError, before anything is
+    written, if an object is missing."""
+    entries = [e for e in entries if e[0] != "160000"]
+    blobs = batch().read_many(oid for _, oid, _ in entries)
+    missing = [f"{path} ({oid})" for _, oid, path in entries if blobs[oid] is None]
+    if missing:
+        raise LookupError(f"{len(missing)} object(s) missing from {REPO}: "
+                          + ", ".join(missing[:5]))
+    for mode, oid, path in entries:
+        target = Path(dest, path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if mode == "120000":
+            os.symlink(blobs[oid].decode("utf-8"), target)
+        else:
+            target.write_bytes(blobs[oid])
+            if mode == "100755":
+                target.chmod(0o755)
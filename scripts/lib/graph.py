@@ -0,0 +1,162 @@
+"""Terragrunt stack dependency graph.
+
+Nodes are stack directories (repo-relative, posix) holding a terragrunt.hcl
+under the AWS and GCP terragrunt roots. An edge A -> B means A declares
+`dependency { config_path = B }` or lists B in `dependencies { paths }`, so B
+must be planned/applied first. topo_levels() groups stacks into levels whose
+members share no edge and can therefore run concurrently.
+
+Graph shape (plain data, JSON-serialisable):
+
+  { "nodes": ["aws-.../vpc/us/stg", ...],
+    "edges": {node: [dependency node, ...]},
+    "missing": [{"from": node, "config_path": "...", "target": "..."}] }
+
+`missing` holds edges whose target directory has no terragrunt.hcl, or whose
+config_path is a terragrunt interpolation that cannot be resolved statically.
+
+Controls: SOC2 CC8.1 (ordered, reviewable change execution).
+"""
+
+import json
+import os
+from pathlib import Path
+
+from . import hcl, loaders
+
+
+class CycleError(ValueError):
+    """Raised by topo_levels() when the graph has a dependency cycle."""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("dependency cycle: " + " -> ".join(cycle))
+
+
+def stack_key(path: Path):
+    """Node id for a stack directory or its terragrunt.hcl."""
+    path = Path(path)
+    if path.name == "terragrunt.hcl":
+        path = path.parent
+    return path.resolve().relative_to(loaders.REPO_ROOT).as_posix()
+
+
+def stack_dependencies(hcl_path: Path):
+    """config_path strings declared by one stack, in file order, de-duplicated."""
+    model = hcl.stack(hcl_path)
+    paths = [hcl.string_value(d.get("config_path")) or d.get("config_path")
+             for d in model["dependencies"].values() if d.get("config_path")]
+    return list(dict.fromkeys(paths + model["dependency_paths"]))
+
+
+def build_graph(roots=None):
+    """Dependency graph over every stack under roots (default: both clouds)."""
+    roots = roots or [loaders.AWS_ROOT, loaders.GCP_TG_ROOT]
+    hcls = [p for root in roots for p in loaders.find_stacks(root)]
+    nodes = sorted(stack_key(p) for p in hcls)
+    known = set(nodes)
+    edges, missing = {}, []
+    for p in hcls:
+        node = stack_key(p)
+        deps = []
+        for cfg in stack_dependencies(p):
+            target = None if "${" in cfg else \
+                Path(os.path.normpath(p.parent / cfg)).as_posix()
+            key = None
+            if target and Path(target).is_relative_to(loaders.REPO_ROOT):
+                key = Path(target).relative_to(loaders.REPO_ROOT).as_posix()
+            if key in known:
+                if key not in deps and key != node:
+                    deps.append(key)
+            else:
+                missing.append({"from": node, "config_path": cfg, "target": key})
+        edges[node] = sorted(deps)
+    return {"nodes": nodes, "edges": edges, "missing": missing}
+
+
+def subgraph(graph, keep):
+    """Restrict a graph to nodes satisfying keep(node), keeping the ordering
+    constraints that run through dropped nodes (A -> x -> B becomes A -> B)."""
+    kept = [n for n in graph["nodes"] if keep(n)]
+    memo = {}
+
+    def reach(n, seen):
+        if n in memo:
+            return memo[n]
+        out = set()
+        for d in graph["edges"].get(n, []):
+            if d in seen:
+                continue  # cycle through dropped nodes; topo_levels reports it
+            out |= {d} if keep(d) else reach(d, seen | {d})
+        memo[n] = out
+        return out
+
+    return {"nodes": kept,
+            "edges": {n: sorted(reach(n, {n})) for n in kept},
+            "missing": [m for m in graph["missing"] if keep(m["from"])]}
+
+
+def find_cycle(graph):
+    """One dependency cycle as [a, b, ..., a], or None."""
+    state = {}
+    for start in graph["nodes"]:
+        if start in state:
+            continue
+        stack = [(start, iter(graph["edges"].get(start, [])))]
+        path = [start]
+        state[start] = "open"
+        while stack:
+            node, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                state[node] = "done"
+                stack.pop()
+                path.pop()
+            elif state.get(nxt) == "open":
+                return path[path.index(nxt):] + [nxt]
+            elif nxt not in state:
+                state[nxt] = "open"
+                stack.append((nxt, iter(graph["edges"].get(nxt, []))))
+                path.append(nxt)
+    return None
+
+
+def topo_levels(graph):
+    """[[level-0 stacks], [level-1 stacks], ...]: every stack sits one level
+    above its deepest dependency. Raises CycleError on a cycle."""
+    pending = {n: set(graph["edges"].get(n, [])) for n in graph["nodes"]}
+    levels = []
+    while pending:
+        ready = sorted(n for n, deps in pending.items() if not deps)
+        if not ready:
+            raise CycleError(find_cycle({"nodes": sorted(pending),
+                                         "edges": {n: sorted(d) for n, d in pending.items()}}))
+        levels.append(ready)
+        for n in ready:
+            del pending[n]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return levels
+
+
+def to_json(graph):
+    levels = None
+    try:
+        levels = topo_levels(graph)
+    except CycleError:
+        pass
+    return json.dumps({**graph, "levels": levels, "cycle": find_cycle(graph)},
+                      indent=2) + "\n"
+
+
+def to_dot(graph):
+    lines = ["digraph stacks {", "  rankdir=LR;", "  node [shape=box, fontsize=10];"]
+    for n in graph["nodes"]:
+        lines.append(f'  "{n}";')
+    for n in graph["nodes"]:
+        for d in graph["edges"].get(n, []):
+            lines.append(f'  "{n}" -> "{d}";')
+    for m in graph["missing"]:
+        lines.append(f'  "{m["from"]}" -> "missing:{m["config_path"]}" [style=dashed, color=red];')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
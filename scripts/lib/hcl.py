@@ -0,0 +1,287 @@
+"""Structural HCL reader for terragrunt stacks and local terraform modules.
+
+Not a full HCL evaluator: it tokenizes just enough (strings with ${...}
+templates, heredocs, comments, bracket nesting) to split a file into blocks
+and `name = expr` attributes. Expressions are kept as raw source text;
+string_value() unquotes plain literals. Commented-out blocks and keys never
+reach the model, unlike substring probes over the file text.
+
+stack(path) returns the terragrunt view of a file, parsed once per content
+hash and shared by every gate in the process:
+
+  { "source": "...", "terraform": {attr: raw}, "inputs": {key: raw},
+    "inputs_expr": "...", "dependencies": {name: {attr: raw}},
+    "dependency_paths": [...], "includes": {name: {attr: raw}},
+    "locals": {name: raw} }
+
+Returned models are shared — treat them as read-only. var_reads(model)
+lists the key paths a stack indexes into its decoded vars.yaml (literal
+keys only; computed keys cut the path).
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+IDENT_RE = re.compile(r'[A-Za-z_][\w-]*|"(?:[^"\\\n]|\\.)*"')
+HEREDOC_RE = re.compile(r"<<-?([A-Za-z_]\w*)[ \t]*\n")
+SPACE_RE = re.compile(r"[ \t]*")
+
+
+def _skip_string(text, i):
+    """Index just past the string literal opening at text[i] (a quote),
+    including any ${...} / %{...} template sequences nested inside it."""
+    n = len(text)
+    i += 1
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+        elif c == '"':
+            return i + 1
+        elif c == "\n":
+            return i  # unterminated: let the caller resync on the newline
+        elif c in "$%" and text.startswith("{", i + 1):
+            if text.startswith(c, i + 2):
+                i += 3  # $${ / %%{ are literal escapes
+            else:
+                i = skip(text, i + 2, "close")
+        else:
+            i += 1
+    return n
+
+
+def _skip_heredoc(text, i):
+    """Index of the end of the terminator line of the heredoc at text[i]."""
+    m = HEREDOC_RE.match(text, i)
+    end = re.compile(rf"^[ \t]*{m.group(1)}[ \t]*$", re.M).search(text, m.end())
+    return end.end() if end else len(text)
+
+
+def skip(text, i, stop):
+    """Advance over HCL from text[i] until `stop` at bracket depth 0.
+
+    stop: "newline"  — end of an attribute expression in a block body;
+          "item"     — newline or comma (attribute inside an object literal);
+          "close"    — just past the bracket closing one that is already open.
+    """
+    depth = 1 if stop == "close" else 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '"':
+            i = _skip_string(text, i)
+            continue
+        if c == "#" or text.startswith("//", i):
+            nl = text.find("\n", i)
+            i = n if nl < 0 else nl
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        if text.startswith("<<", i) and HEREDOC_RE.match(text, i):
+            i = _skip_heredoc(text, i)
+            continue
+        if c in "{[(":
+            depth += 1
+        elif c in "}])":
+            depth -= 1
+            if stop == "close" and depth == 0:
+                return i + 1
+            if depth < 0:
+                return i  # closing bracket of the enclosing object/block
+        elif depth == 0 and (c == "\n" or (c == "," and stop == "item")):
+            return i
+        i += 1
+    return n
+
+
+def _skip_trivia(text, i, end):
+    """Skip whitespace, separators and comments between body items."""
+    while i < end:
+        c = text[i]
+        if c in " \t\r\n,":
+            i += 1
+        elif c == "#" or text.startswith("//", i):
+            nl = text.find("\n", i)
+            i = end if nl < 0 else nl + 1
+        elif text.startswith("/*", i):
+            e = text.find("*/", i + 2)
+            i = end if e < 0 else e + 2
+        else:
+            break
+    return i
+
+
+def _unquote(token):
+    return token[1:-1] if token.startswith('"') else token
+
+
+def parse_body(text, i=0, end=None, in_object=False):
+    """{"attributes": {name: raw_expr}, "blocks": [{"type", "labels", "body"}]}
+    for the body text[i:end]. in_object: parse an object literal's items
+    (`key = v` or `key: v`, comma or newline separated)."""
+    end = len(text) if end is None else end
+    attributes, blocks = {}, []
+    stop = "item" if in_object else "newline"
+    while True:
+        i = _skip_trivia(text, i, end)
+        if i >= end:
+            break
+        m = IDENT_RE.match(text, i)
+        if not m:
+            i = skip(text, i, stop) + 1
+            continue
+        name = _unquote(m.group(0))
+        j = SPACE_RE.match(text, m.end()).end()
+        if (text.startswith("=", j) and not text.startswith("==", j)) or \
+                (in_object and text.startswith(":", j)):
+            vstart = SPACE_RE.match(text, j + 1).end()
+            vend = min(skip(text, vstart, stop), end)
+            attributes.setdefault(name, text[vstart:vend].strip())
+            i = vend + 1
+            continue
+        labels = []
+        while True:
+            lm = IDENT_RE.match(text, j)
+            if not lm:
+                break
+            labels.append(_unquote(lm.group(0)))
+            j = SPACE_RE.match(text, lm.end()).end()
+        if text.startswith("{", j):
+            close = min(skip(text, j + 1, "close"), end)
+            blocks.append({"type": name, "labels": labels,
+                           "body": parse_body(text, j + 1, close - 1)})
+            i = close
+            continue
+        nl = text.find("\n", j)
+        i = end if nl < 0 else nl + 1  # unrecognized line: resync
+    return {"attributes": attributes, "blocks": blocks}
+
+
+def string_value(raw):
+    """The contents of a raw expression that is a single string literal, else
+    None. Template sequences are kept verbatim (e.g. "?ref=${local.ref}")."""
+    if raw and raw.startswith('"') and _skip_string(raw, 0) == len(raw):
+        return raw[1:-1]
+    return None
+
+
+def object_attributes(raw):
+    """key -> raw for every object literal passed directly in raw — either the
+    expression itself or an argument of a function call such as merge(...).
+    Objects nested inside lists or index brackets are not inputs keys."""
+    out = {}
+    if not raw:
+        return out
+    opened = []
+    i, n = 0, len(raw)
+    while i < n:
+        c = raw[i]
+        if c == '"':
+            i = _skip_string(raw, i)
+            continue
+        if c == "{" and all(o == "(" for o in opened):
+            close = skip(raw, i + 1, "close")
+            for k, v in parse_body(raw, i + 1, close - 1, in_object=True)["attributes"].items():
+                out.setdefault(k, v)
+            i = close
+            continue
+        if c in "[(":
+            opened.append(c)
+        elif c in "])" and opened:
+            opened.pop()
+        i += 1
+    return out
+
+
+def string_list(raw):
+    """Plain string literals of a raw list expression (["a", "b"]); elements
+    that are not literals are skipped."""
+    out = []
+    if not raw or not raw.startswith("["):
+        return out
+    i, n = 1, len(raw)
+    while i < n:
+        i = _skip_trivia(raw, i, n)
+        if i >= n or raw[i] == "]":
+            break
+        end = skip(raw, i, "item")
+        value = string_value(raw[i:end].strip())
+        if value is not None:
+            out.append(value)
+        i = end + 1
+    return out
+
+
+VAR_REF_RE = r'\blocal\.{}((?:\s*\[\s*"(?:[^"\\\n]|\\.)*"\s*\]|\.[A-Za-z_][\w-]*)*)'
+VAR_KEY_RE = re.compile(r'\[\s*"((?:[^"\\\n]|\\.)*)"\s*\]|\.([A-Za-z_][\w-]*)')
+
+
+def var_reads(model, name="common_vars"):
+    """[(keys, literal)] for every reference to local.<name> (the decoded
+    vars.yaml) in a stack model's locals and inputs. keys are the leading
+    literal keys of the index chain; literal is False when the chain goes on
+    with a computed key ("${local.environment}", local.x), which cuts it."""
+    ref_re = re.compile(VAR_REF_RE.format(re.escape(name)))
+    out = []
+    for raw in [*model["locals"].values(), model["inputs_expr"] or ""]:
+        for m in ref_re.finditer(raw):
+            keys, literal = [], True
+            for k in VAR_KEY_RE.finditer(m.group(1)):
+                key = k.group(1) if k.group(1) is not None else k.group(2)
+                if "${" in key or "%{" in key:
+                    literal = False
+                    break
+                keys.append(key)
+            if literal and raw[m.end():].lstrip().startswith(("[", ".")):
+                literal = False
+            out.append((tuple(keys), literal))
+    return out
+
+
+def stack_model(text):
+    body = parse_body(text)
+    terraform, dependencies, includes, local_vars = {}, {}, {}, {}
+    dependency_paths = []
+    for b in body["blocks"]:
+        attrs = b["body"]["attributes"]
+        label = b["labels"][0] if b["labels"] else ""
+        if b["type"] == "terraform":
+            terraform.update(attrs)
+        elif b["type"] == "dependency":
+            dependencies[label] = attrs
+        elif b["type"] == "include":
+            includes[label] = attrs
+        elif b["type"] == "locals":
+            local_vars.update(attrs)
+        elif b["type"] == "dependencies":
+            dependency_paths += string_list(attrs.get("paths"))
+    inputs_expr = body["attributes"].get("inputs")
+    return {
+        "source": string_value(terraform.get("source")),
+        "terraform": terraform,
+        "inputs": object_attributes(inputs_expr),
+        "inputs_expr": inputs_expr,
+        "dependencies": dependencies,
+        "dependency_paths": dependency_paths,
+        "includes": includes,
+        "locals": local_vars,
+    }
+
+
+_by_digest = {}
+
+
+def stack(path: Path, text=None):
+    """Cached stack_model() of a terragrunt/hcl file, keyed by content sha256
+    so identical files share one parse."""
+    data = text.encode("utf-8") if text is not None else Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    model = _by_digest.get(digest)
+    if model is None:
+        model = _by_digest[digest] = stack_model(data.decode("utf-8", errors="replace"))
+    return model
@@ -0,0 +1,199 @@
+"""Append-only score history: architecture-score reports per commit (SQLite).
+
+Every run of architecture-score overwrites ARCHITECTURE_REPORT.json; the
+ratchet policy in .github/gate-thresholds.yaml needs the runs that came
+before. record() appends one report to a local SQLite file:
+
+  runs   (id, commit_sha, committed_at, dirty, recorded_at, generator,
+          schema_version, source_hash, report_hash, score, grade)
+  checks (run_id, category, check_name, status, score_impact, weight)
+  metrics (run_id, name, value)   -- other per-run counts (backfill adds
+                                  -- placeholder / input-assertion counts)
+
+A run is keyed by (commit_sha, dirty, generator, report_hash): re-recording
+an identical report for the same commit is a no-op, and triggers reject
+UPDATE/DELETE. Queries read the timeline (the latest run per commit and
+dirty flag, ordered by commit time) through the (check_name, run_id) and
+(category, run_id) indexes, so trend / first-failing / ratchet answers stay
+in the milliseconds however many runs accumulate.
+
+The database lives under .gate-cache/ (untracked; a local memo, not
+evidence). Controls: SOC2 CC8.1, PCI-DSS 6.4 (change control).
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from . import loaders
+
+DB_PATH = loaders.CACHE_DIR / "score-history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id             INTEGER PRIMARY KEY,
+    commit_sha     TEXT    NOT NULL,
+    committed_at   INTEGER NOT NULL,          -- unix seconds (git %ct)
+    dirty          INTEGER NOT NULL DEFAULT 0,
+    recorded_at    TEXT    NOT NULL,
+    generator      TEXT    NOT NULL,
+    schema_version INTEGER NOT NULL,
+    source_hash    TEXT    NOT NULL,
+    report_hash    TEXT    NOT NULL,
+    score          REAL    NOT NULL,
+    grade          TEXT    NOT NULL,
+    UNIQUE (commit_sha, dirty, generator, report_hash)
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (committed_at, id);
+CREATE TABLE IF NOT EXISTS checks (
+    run_id       INTEGER NOT NULL REFERENCES runs (id),
+    category     TEXT    NOT NULL,
+    check_name   TEXT    NOT NULL,
+    status       TEXT    NOT NULL,
+    score_impact REAL    NOT NULL,
+    weight       REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS checks_by_check ON checks (check_name, run_id);
+CREATE INDEX IF NOT EXISTS checks_by_category ON checks (category, run_id);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name   TEXT    NOT NULL,
+    value  REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_by_name ON metrics (name, run_id);
+CREATE TRIGGER IF NOT EXISTS runs_no_update BEFORE UPDATE ON runs
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_no_delete BEFORE DELETE ON runs
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS checks_no_update BEFORE UPDATE ON checks
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS checks_no_delete BEFORE DELETE ON checks
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS metrics_no_update BEFORE UPDATE ON metrics
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS metrics_no_delete BEFORE DELETE ON metrics
+    BEGIN SELECT RAISE(ABORT, 'score history is append-only'); END;
+"""
+
+# latest run per (commit, dirty), in commit order
+TIMELINE = """
+WITH timeline AS (
+    SELECT r.* FROM runs r
+    JOIN (SELECT max(id) AS id FROM runs GROUP BY commit_sha, dirty) l ON l.id = r.id
+)
+"""
+
+
+def connect(path=DB_PATH):
+    import sqlite3
+
+    path.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def report_hash(report):
+    """sha256 over a report's check records (not its timestamp)."""
+    return hashlib.sha256(json.dumps(report["checks"], sort_keys=True)
+                          .encode("utf-8")).hexdigest()
+
+
+def record(conn, report, commit_sha, committed_at, dirty=False, metrics=None):
+    """Append a schema v1 report (plus {name: number} metrics); returns its
+    run id, or None if the same report was already recorded for this commit."""
+    with conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO runs (commit_sha, committed_at, dirty, recorded_at,"
+            " generator, schema_version, source_hash, report_hash, score, grade)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (commit_sha, int(committed_at), int(bool(dirty)),
+             datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+             report["generator"], report["schema_version"], report["source_hash"],
+             report_hash(report), report["score"], report["grade"]))
+        if not cur.rowcount:
+            return None
+        run_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO checks (run_id, category, check_name, status, score_impact, weight)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, c["category"], c["check"], c["status"], c["score_impact"], c["weight"])
+             for c in report["checks"]])
+        conn.executemany("INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                         [(run_id, k, v) for k, v in sorted((metrics or {}).items())])
+    return run_id
+
+
+def trend(conn, check=None, category=None, limit=20, metric=None):
+    """The last `limit` timeline entries, oldest first: the overall score,
+    or one check's status/impact, one category's summed impact, or one
+    metric's value."""
+    if metric:
+        sql = TIMELINE + (
+            "SELECT t.commit_sha, t.committed_at, t.dirty, m.value"
+            " FROM timeline t JOIN metrics m ON m.run_id = t.id AND m.name = ?"
+            " ORDER BY t.committed_at DESC, t.id DESC LIMIT ?")
+        args = (metric, limit)
+    elif check:
+        sql = TIMELINE + (
+            "SELECT t.commit_sha, t.committed_at, t.dirty, c.status, c.score_impact"
+            " FROM timeline t JOIN checks c ON c.run_id = t.id AND c.check_name = ?"
+            " ORDER BY t.committed_at DESC, t.id DESC LIMIT ?")
+        args = (check, limit)
+    elif category:
+        sql = TIMELINE + (
+            "SELECT t.commit_sha, t.committed_at, t.dirty,"
+            " sum(c.score_impact) AS score_impact, count(*) AS checks,"
+            " sum(c.status = 'FAIL') AS fail"
+            " FROM timeline t JOIN checks c ON c.run_id = t.id AND c.category = ?"
+            " GROUP BY t.id ORDER BY t.committed_at DESC, t.id DESC LIMIT ?")
+        args = (category, limit)
+    else:
+        sql = TIMELINE + (
+            "SELECT commit_sha, committed_at, dirty, score, grade FROM timeline"
+            " ORDER BY committed_at DESC, id DESC LIMIT ?")
+        args = (limit,)
+    return [dict(r) for r in reversed(conn.execute(sql, args).fetchall())]
+
+
+def first_failing(conn, check=None):
+    """For each check FAILing in the latest timeline entry: the commit its
+    current FAIL streak started at, and the streak length."""
+    sql = TIMELINE + """,
+    streaks AS (
+        SELECT c.check_name, c.category, t.commit_sha, t.committed_at,
+               sum(c.status != 'FAIL') OVER w AS broken,
+               row_number() OVER w AS age
+        FROM timeline t JOIN checks c ON c.run_id = t.id
+        WHERE ? IS NULL OR c.check_name = ?
+        WINDOW w AS (PARTITION BY c.check_name
+                     ORDER BY t.committed_at DESC, t.id DESC ROWS UNBOUNDED PRECEDING)
+    )
+    SELECT check_name, category, commit_sha, committed_at, age AS runs_failing
+    FROM (SELECT *, row_number() OVER (PARTITION BY check_name ORDER BY age DESC) AS pick
+          FROM streaks WHERE broken = 0)
+    WHERE pick = 1 AND check_name IN (
+        SELECT check_name FROM checks WHERE run_id =
+            (SELECT id FROM timeline ORDER BY committed_at DESC, id DESC LIMIT 1))
+    ORDER BY committed_at, check_name
+    """
+    return [dict(r) for r in conn.execute(sql, (check, check)).fetchall()]
+
+
+def ratchet_violations(conn, floor=None):
+    """Timeline entries scoring below `floor` or below the entry before them
+    (the ratchet only tightens)."""
+    sql = TIMELINE + """
+    SELECT commit_sha, committed_at, dirty, score, prev_score FROM (
+        SELECT *, lag(score) OVER (ORDER BY committed_at, id) AS prev_score FROM timeline)
+    WHERE (? IS NOT NULL AND score < ?) OR score < prev_score
+    ORDER BY committed_at, id
+    """
+    out = []
+    for r in conn.execute(sql, (floor, floor)).fetchall():
+        r = dict(r)
+        r["reason"] = "below floor" if floor is not None and r["score"] < floor \
+            else "regressed"
+        out.append(r)
+    return out
@@ -1,18 +1,28 @@
 """Loaders for gate scripts: YAML (anchor-redefinition tolerant), repo paths,
-terragrunt stack discovery.
+terragrunt stack discovery (one walk per process: stack_index()).
 
 Both vars.yaml files legitimately redefine YAML anchors (legal in YAML 1.2 and
 accepted by Terragrunt's yamldecode); PyYAML >= 6.0.3 rejects that, so all gate
 scripts must load vars through load_vars_yaml() below — never yaml.safe_load.
+It also refuses documents whose aliases would expand past MAX_EXPANDED_NODES
+(vars_stats() reports alias fan-out); aliased subtrees load as shared
+objects, which iter_shared() walks once.
+
+PyYAML is imported on the first parse, not with this module, so paths that
+never read YAML (every --help, score-history queries, stack-graph) do not pay
+for the largest import behind the gates; scripts/startup-budget.py holds that
+line.
 
 Controls: SOC2 CC8.1 (consistent change tooling).
 """
 
+import hashlib
+import json
+import os
 import re
 from pathlib import Path
 
-import yaml
-import yaml.composer
+from . import hcl
 
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent
 AWS_ROOT = REPO_ROOT / "aws-terragrunt-configuration" / "aws"
@@ -22,53 +32,198 @@ GCP_ENVS = GCP_TG_ROOT / "envs"
 GCP_MODULES = GCP_ROOT / "tf-modules"
 AWS_VARS = AWS_ROOT / "vars.yaml"
 GCP_VARS = GCP_TG_ROOT / "vars.yaml"
+# local, untracked memo store for derived indexes (safe to delete any time)
+CACHE_DIR = REPO_ROOT / ".gate-cache"
+MODULE_VARS_CACHE = CACHE_DIR / "module-variables.json"
+MODULE_VARS_CACHE_VERSION = 2
 
 CACHE_DIRS = {".terragrunt-cache", ".terraform"}
 AWS_ENV_NAMES = {"dev", "stg", "prod"}
 AWS_REGIONS = {"us", "eu"}
 
-SOURCE_RE = re.compile(r'source\s*=\s*"([^"]+)"')
 
+def set_root(root):
+    """Re-point the repo path constants above at another checkout-shaped tree
+    (e.g. a commit materialized from git by scripts/backfill.py). Call before
+    loading anything: memoized facts and scripts that copied a constant at
+    import keep the old paths. CACHE_DIR stays with this checkout."""
+    global REPO_ROOT, AWS_ROOT, GCP_ROOT, GCP_TG_ROOT, GCP_ENVS, GCP_MODULES, \
+        AWS_VARS, GCP_VARS
+    REPO_ROOT = Path(root).resolve()
+    AWS_ROOT = REPO_ROOT / "aws-terragrunt-configuration" / "aws"
+    GCP_ROOT = REPO_ROOT / "gcp-terragrunt-configuration"
+    GCP_TG_ROOT = GCP_ROOT / "terragrunt"
+    GCP_ENVS = GCP_TG_ROOT / "envs"
+    GCP_MODULES = GCP_ROOT / "tf-modules"
+    AWS_VARS = AWS_ROOT / "vars.yaml"
+    GCP_VARS = GCP_TG_ROOT / "vars.yaml"
+
+
+# composed-node budget for the alias-expanded tree; both vars files expand to
+# a few thousand nodes, a billion-laughs document to orders of magnitude more
+MAX_EXPANDED_NODES = 1_000_000
+
+
+class ExpansionError(ValueError):
+    """A YAML document whose aliases expand past MAX_EXPANDED_NODES."""
+
+
+_loader = None
+
+
+def loader_class():
+    """TerragruntSafeLoader: PyYAML's SafeLoader with a composer that lets an
+    anchor be redefined and counts anchors / alias uses (built, and yaml
+    imported, on first use)."""
+    global _loader
+    if _loader is not None:
+        return _loader
+    import yaml
+    import yaml.composer
+
+    class _RedefiningComposer(yaml.composer.Composer):
+        def compose_node(self, parent, index):
+            event = self.peek_event()
+            if isinstance(event, yaml.events.AliasEvent):
+                fan_out = self.__dict__.setdefault("alias_fan_out", {})
+                fan_out[event.anchor] = fan_out.get(event.anchor, 0) + 1
+            elif getattr(event, "anchor", None) is not None:
+                self.__dict__["anchor_count"] = self.__dict__.get("anchor_count", 0) + 1
+                if event.anchor in self.anchors:
+                    del self.anchors[event.anchor]
+            return super().compose_node(parent, index)
+
+    class TerragruntSafeLoader(
+        yaml.reader.Reader, yaml.scanner.Scanner, yaml.parser.Parser,
+        _RedefiningComposer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver,
+    ):
+        def __init__(self, stream):
+            yaml.reader.Reader.__init__(self, stream)
+            yaml.scanner.Scanner.__init__(self)
+            yaml.parser.Parser.__init__(self)
+            _RedefiningComposer.__init__(self)
+            yaml.constructor.SafeConstructor.__init__(self)
+            yaml.resolver.Resolver.__init__(self)
+
+    _loader = TerragruntSafeLoader
+    return _loader
+
+
+def _node_sizes(root):
+    """(distinct composed nodes, nodes after alias expansion) of a node graph.
+    Shared nodes are sized once, so this is linear in the composed document
+    however far its aliases would expand."""
+    import yaml
+
+    expanded, active = {}, set()
+
+    def size(node):
+        key = id(node)
+        if key in expanded:
+            return expanded[key]
+        if key in active:
+            raise ExpansionError("recursive alias")
+        active.add(key)
+        n = 1
+        if isinstance(node, yaml.MappingNode):
+            n += sum(size(k) + size(v) for k, v in node.value)
+        elif isinstance(node, yaml.SequenceNode):
+            n += sum(size(v) for v in node.value)
+        active.discard(key)
+        expanded[key] = n
+        return n
+
+    total = size(root) if root is not None else 0
+    return len(expanded), total
+
+
+def _compose(text):
+    loader = loader_class()(text)
+    try:
+        return loader, loader.get_single_node()
+    except BaseException:
+        loader.dispose()
+        raise
+
+
+def load_vars_text(text, max_expanded=MAX_EXPANDED_NODES):
+    """Parse YAML text, refusing documents whose aliases expand past
+    max_expanded nodes (billion-laughs guard; None disables). Aliased
+    subtrees stay shared objects in the returned tree."""
+    loader, node = _compose(text)
+    try:
+        if node is None:
+            return None
+        if max_expanded is not None:
+            _, expanded = _node_sizes(node)
+            if expanded > max_expanded:
+                raise ExpansionError(f"YAML expands to {expanded} nodes "
+                                     f"(limit {max_expanded}); check alias fan-out")
+        return loader.construct_document(node)
+    finally:
+        loader.dispose()
+
+
+def load_vars_yaml(path: Path, max_expanded=MAX_EXPANDED_NODES):
+    return load_vars_text(Path(path).read_text(encoding="utf-8"), max_expanded)
+
+
+def vars_stats(path: Path):
+    """Alias statistics of a YAML file, without constructing it:
+    {"anchors", "aliases", "fan_out": {anchor: alias uses}, "nodes",
+    "expanded_nodes", "expansion_ratio"}."""
+    loader, node = _compose(Path(path).read_text(encoding="utf-8"))
+    loader.dispose()
+    fan_out = dict(sorted(loader.__dict__.get("alias_fan_out", {}).items(),
+                          key=lambda kv: (-kv[1], kv[0])))
+    nodes, expanded = _node_sizes(node) if node is not None else (0, 0)
+    return {"anchors": loader.__dict__.get("anchor_count", 0),
+            "aliases": sum(fan_out.values()), "fan_out": fan_out,
+            "nodes": nodes, "expanded_nodes": expanded,
+            "expansion_ratio": round(expanded / nodes, 2) if nodes else 0}
 
-class _RedefiningComposer(yaml.composer.Composer):
-    def compose_node(self, parent, index):
-        event = self.peek_event()
-        if (not isinstance(event, yaml.events.AliasEvent)
-                and getattr(event, "anchor", None) is not None
-                and event.anchor in self.anchors):
-            del self.anchors[event.anchor]
-        return super().compose_node(parent, index)
 
+def load_aws_vars():
+    return load_vars_yaml(AWS_VARS)
 
-class TerragruntSafeLoader(
-    yaml.reader.Reader, yaml.scanner.Scanner, yaml.parser.Parser,
-    _RedefiningComposer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver,
-):
-    def __init__(self, stream):
-        yaml.reader.Reader.__init__(self, stream)
-        yaml.scanner.Scanner.__init__(self)
-        yaml.parser.Parser.__init__(self)
-        _RedefiningComposer.__init__(self)
-        yaml.constructor.SafeConstructor.__init__(self)
-        yaml.resolver.Resolver.__init__(self)
 
+def load_gcp_vars():
+    return load_vars_yaml(GCP_VARS)
 
-def load_vars_yaml(path: Path):
-    return yaml.load(Path(path).read_text(encoding="utf-8"), Loader=TerragruntSafeLoader)
 
+def _walk_stacks(root: Path):
+    return [p for p in root.rglob("terragrunt.hcl")
+            if not CACHE_DIRS.intersection(p.relative_to(root).parts)]
 
-def load_aws_vars():
-    return load_vars_yaml(AWS_VARS)
 
+_stack_index = {}
 
-def load_gcp_vars():
-    return load_vars_yaml(GCP_VARS)
+
+def stack_index():
+    """frozenset of every terragrunt.hcl under the AWS and GCP configuration
+    trees (caches skipped): one directory walk per process and REPO_ROOT,
+    shared by find_stacks() and has_stack(). Reflects the tree as of the
+    first call."""
+    hit = _stack_index.get(REPO_ROOT)
+    if hit is None:
+        hit = _stack_index[REPO_ROOT] = frozenset(
+            p for base in (AWS_ROOT, GCP_ROOT) if base.is_dir() for p in _walk_stacks(base))
+    return hit
 
 
 def find_stacks(root: Path):
-    """All terragrunt.hcl files under root, skipping caches."""
-    return sorted(p for p in root.rglob("terragrunt.hcl")
-                  if not CACHE_DIRS.intersection(p.relative_to(root).parts))
+    """All terragrunt.hcl files under root, skipping caches (answered from
+    stack_index() for roots inside the configuration trees)."""
+    root = Path(root)
+    if root.is_relative_to(AWS_ROOT) or root.is_relative_to(GCP_ROOT):
+        return sorted(p for p in stack_index() if p.is_relative_to(root))
+    return sorted(_walk_stacks(root))
+
+
+def has_stack(rel_dir):
+    """Whether the repo-relative directory holds a terragrunt.hcl (no
+    filesystem call once stack_index() is built)."""
+    return REPO_ROOT / rel_dir / "terragrunt.hcl" in stack_index()
 
 
 def aws_env_stacks():
@@ -110,6 +265,33 @@ def leaf_key_paths(data, prefix=""):
                 yield (p, v)
 
 
+def iter_shared(data, prefix=""):
+    """Alias-preserving walk: yield (dotted_path, key, value, first_path) for
+    every node of a loaded tree, key being the mapping key that leads to it
+    (None for list items and the root). A dict or list already reached through
+    another path (a YAML alias) is yielded once more with first_path set to
+    where it was first seen, and not descended again; first_path is None
+    otherwise."""
+    seen = {}
+    stack = [(prefix, None, data)]
+    while stack:
+        path, key, value = stack.pop()
+        if isinstance(value, (dict, list)) and value:
+            first = seen.get(id(value))
+            if first is not None:
+                yield path, key, value, first
+                continue
+            seen[id(value)] = path
+        yield path, key, value, None
+        if isinstance(value, dict):
+            children = [(f"{path}.{k}" if path else str(k), k, v) for k, v in value.items()]
+        elif isinstance(value, list):
+            children = [(f"{path}[{i}]", None, v) for i, v in enumerate(value)]
+        else:
+            continue
+        stack.extend(reversed(children))
+
+
 def find_key_line(path: Path, dotted: str):
     """Best-effort line number of a dotted key path in a YAML file.
 
@@ -142,15 +324,134 @@ def find_key_line(path: Path, dotted: str):
     return None
 
 
+_content_hash_memo = {}
+
+
+def module_content_hash(module_dir: Path):
+    """sha256 over the module's *.tf file names and bytes. Memoized for the
+    process on every *.tf's (name, st_mtime_ns, st_size), like
+    report.source_hash(): a repeat call stats the files, it does not
+    re-read them."""
+    module_dir = Path(module_dir)
+    tfs = sorted(module_dir.glob("*.tf"))
+    stat = tuple((tf.name, st.st_mtime_ns, st.st_size) for tf in tfs for st in [tf.stat()])
+    hit = _content_hash_memo.get((module_dir, stat))
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    for tf in tfs:
+        h.update(tf.name.encode())
+        h.update(b"\0")
+        h.update(tf.read_bytes())
+    digest = _content_hash_memo[(module_dir, stat)] = h.hexdigest()
+    return digest
+
+
+def parse_module_variables(module_dir: Path):
+    """name -> {"type", "default", "required"} for every variable block declared
+    by a local terraform module. type/default are raw HCL expression text."""
+    out = {}
+    for tf in sorted(Path(module_dir).glob("*.tf")):
+        body = hcl.parse_body(tf.read_text(encoding="utf-8", errors="replace"))
+        for b in body["blocks"]:
+            if b["type"] != "variable" or not b["labels"]:
+                continue
+            attrs = b["body"]["attributes"]
+            out[b["labels"][0]] = {"type": attrs.get("type"),
+                                   "default": attrs.get("default"),
+                                   "required": "default" not in attrs}
+    return out
+
+
+_module_vars_memo = {}
+_module_vars_disk = None
+
+
+def module_variable_index(module_dir: Path):
+    """Memoized parse_module_variables(): a dict lookup per module dir after
+    the first call in a process (which reflects the module as of that call,
+    like stack_index()).
+
+    Shared by every stack that sources the same module; persisted to
+    MODULE_VARS_CACHE keyed by module_content_hash(), so unchanged modules
+    are not re-parsed across runs.
+    """
+    global _module_vars_disk
+    hit = _module_vars_memo.get(module_dir)
+    if hit is not None:
+        return hit
+    given = module_dir
+    module_dir = Path(module_dir).resolve()
+    hit = _module_vars_memo.get(module_dir)
+    if hit is not None:
+        _module_vars_memo[given] = hit
+        return hit
+    digest = module_content_hash(module_dir)
+    if _module_vars_disk is None:
+        try:
+            disk = json.loads(MODULE_VARS_CACHE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            disk = {}
+        # entries from another parser revision are discarded wholesale
+        _module_vars_disk = disk.get("modules", {}) \
+            if disk.get("version") == MODULE_VARS_CACHE_VERSION else {}
+    key = str(module_dir.relative_to(REPO_ROOT)) if module_dir.is_relative_to(REPO_ROOT) \
+        else str(module_dir)
+    entry = _module_vars_disk.get(key)
+    if isinstance(entry, dict) and entry.get("hash") == digest:
+        variables = entry["variables"]
+    else:
+        variables = parse_module_variables(module_dir)
+        _module_vars_disk[key] = {"hash": digest, "variables": variables}
+        try:
+            CACHE_DIR.mkdir(exist_ok=True)
+            # per process: backfill workers write concurrently, the last
+            # replace() wins and no reader sees a partial file
+            tmp = MODULE_VARS_CACHE.with_name(f"{MODULE_VARS_CACHE.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": MODULE_VARS_CACHE_VERSION,
+                                       "modules": _module_vars_disk},
+                                      indent=1, sort_keys=True), encoding="utf-8")
+            tmp.replace(MODULE_VARS_CACHE)
+        except OSError:
+            pass  # read-only checkout: the in-process memo still applies
+    _module_vars_memo[module_dir] = _module_vars_memo[given] = variables
+    return variables
+
+
 def module_declared_variables(module_dir: Path):
     """Variable names declared by a local terraform module (its *.tf files)."""
-    names = set()
-    for tf in module_dir.glob("*.tf"):
-        for m in re.finditer(r'variable\s+"([^"]+)"', tf.read_text(encoding="utf-8", errors="replace")):
-            names.add(m.group(1))
-    return names
+    return set(module_variable_index(module_dir))
+
+
+def read_module_source(hcl_path: Path, text=None):
+    """terraform.source of a stack (None if it has no terraform block)."""
+    return hcl.stack(hcl_path, text)["source"]
+
+
+REF_RE = re.compile(r"\?ref=([^\"&\s]+)")
+
+
+def read_source(hcl_path: Path):
+    """(terraform source, ?ref= value) of a stack; (None, None) without one."""
+    source = read_module_source(hcl_path)
+    if source is None:
+        return None, None
+    ref_m = REF_RE.search(source)
+    # refs interpolated from _env.hcl locals (e.g. ${include.env.locals.module_ref})
+    ref = ref_m.group(1) if ref_m else None
+    return source, ref
 
 
-def read_module_source(hcl_path: Path):
-    m = SOURCE_RE.search(Path(hcl_path).read_text(encoding="utf-8", errors="replace"))
-    return m.group(1) if m else None
+def resolve_env_ref(hcl_path: Path, ref: str):
+    """If the ref is a terragrunt interpolation, resolve module_ref from the nearest _env.hcl."""
+    if ref is None or "${" not in ref:
+        return ref
+    for parent in Path(hcl_path).parents:
+        env_hcl = parent / "_env.hcl"
+        if env_hcl.exists():
+            module_ref = hcl.string_value(hcl.stack(env_hcl)["locals"].get("module_ref"))
+            if module_ref:
+                return module_ref
+        if parent == REPO_ROOT:
+            break
+    return ref  # unresolved interpolation, keep as-is
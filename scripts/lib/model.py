@@ -0,0 +1,283 @@
+"""Typed domain model of the two configuration trees: envs, stacks, resources,
+networks and subnets, built once per run with cross-references.
+
+  Env       cloud, key, region / folder, name, block
+            -> stacks, resources {name: Resource}, network
+  Stack     cloud, path, parts, service          -> env, resource
+  Resource  name, block (.inputs)                -> env, stack
+  Network   name, cidr, azs, has_nat             -> env, resource, subnets, secondary
+  Subnet    kind, name, cidr, region, private_access, flow_logs, parent -> network
+
+Stacks bind to vars by the repo's path convention (what lib/fingerprint hashes):
+
+  aws  {service}/{region}/{env}   -> Environments["{region}-{env}"].Resources[service]
+  gcp  envs/{folder}/{env}/{res}  -> envs[folder][env].resources[res]  (key "folder/env")
+       envs/global/{res}          -> envs.global.resources[res]         (flat folder, name None)
+
+Other stacks (AWS account-level and org stacks, the GCP roots) have no env.
+AWS account envs in vars (network, security, ...) have region and name None.
+An Env named by a stack but absent from vars has an empty block.
+
+Instances are read-only, slotted records compared by identity; mappings
+are read-only views. of() memoizes per loaded tree pair, like
+varindex.of(); built without trees the model is path-only (stacks and the
+envs they name).
+"""
+
+from pathlib import Path
+from types import MappingProxyType
+
+from . import loaders
+
+AWS_SUBNET_KINDS = ("private", "public", "database", "intra", "elasticache")
+_EMPTY = MappingProxyType({})
+
+
+class _Record:
+    """Frozen record over __slots__ (in field order). DEFAULTS fill omitted
+    fields; REFS are the cross-references build() links after construction,
+    left out of repr. Plain slots rather than dataclasses, which would cost
+    every entry point that loads the model its import (scripts/startup-budget.py)."""
+
+    __slots__ = ()
+    DEFAULTS = {}
+    REFS = ()
+
+    def __init__(self, *args, **kw):
+        if len(args) > len(self.__slots__):
+            raise TypeError(f"{type(self).__name__}() takes {len(self.__slots__)} fields")
+        given = dict(zip(self.__slots__, args))
+        for k, v in kw.items():
+            if k not in self.__slots__ or k in given:
+                raise TypeError(f"{type(self).__name__}() bad field {k!r}")
+            given[k] = v
+        vals = dict(self.DEFAULTS, **given)
+        for name in self.__slots__:
+            if name not in vals:
+                raise TypeError(f"{type(self).__name__}() missing field {name!r}")
+            object.__setattr__(self, name, vals[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    __delattr__ = __setattr__
+
+    def __repr__(self):
+        return f"{type(self).__name__}(" + ", ".join(
+            f"{n}={getattr(self, n)!r}" for n in self.__slots__ if n not in self.REFS) + ")"
+
+
+class Env(_Record):
+    """cloud, key ("us-stg" / "network"; "stg/eu" / "global"), region (aws
+    region-envs), folder (gcp), name (env tier / env segment; None if flat),
+    block (its vars.yaml mapping)."""
+
+    __slots__ = ("cloud", "key", "region", "folder", "name", "block",
+                 "stacks", "resources", "network")
+    DEFAULTS = {"region": None, "folder": None, "name": None,
+                "stacks": (), "resources": _EMPTY, "network": None}
+    REFS = ("block", "stacks", "resources", "network")
+
+    @property
+    def flat(self):
+        return self.cloud == "gcp" and self.name is None
+
+
+class Resource(_Record):
+    __slots__ = ("name", "block", "env", "stack")
+    DEFAULTS = {"env": None, "stack": None}
+    REFS = ("block", "env", "stack")
+
+    @property
+    def inputs(self):
+        return self.block.get("inputs", {}) or {} if isinstance(self.block, dict) else {}
+
+
+class Stack(_Record):
+    """parts: directories below AWS_ROOT / GCP_ENVS (() for a root);
+    service: "_root" / "_folder_root" for roots."""
+
+    __slots__ = ("cloud", "path", "parts", "service", "env", "resource")
+    DEFAULTS = {"env": None, "resource": None}
+    REFS = ("env", "resource")
+
+    @property
+    def rel(self):
+        return self.path.relative_to(loaders.REPO_ROOT).as_posix()
+
+    def module_source(self, resolve=True):
+        """(terraform source, ref); the ref resolved through _env.hcl unless
+        resolve is false."""
+        source, ref = loaders.read_source(self.path)
+        return source, loaders.resolve_env_ref(self.path, ref) if resolve else ref
+
+
+class Subnet(_Record):
+    """kind: aws private/public/...; gcp "subnet" / "secondary" (parent: the
+    subnet a secondary range extends)."""
+
+    __slots__ = ("kind", "cidr", "name", "region", "private_access", "flow_logs",
+                 "parent", "network")
+    DEFAULTS = {"name": None, "region": None, "private_access": None,
+                "flow_logs": None, "parent": None, "network": None}
+    REFS = ("network",)
+
+
+class Network(_Record):
+    """cidr (aws VPC CIDR), azs (aws), has_nat (gcp cloud_nats)."""
+
+    __slots__ = ("name", "cidr", "azs", "has_nat", "subnets", "secondary", "env",
+                 "resource")
+    DEFAULTS = {"cidr": None, "azs": (), "has_nat": None, "subnets": (),
+                "secondary": (), "env": None, "resource": None}
+    REFS = ("subnets", "secondary", "env", "resource")
+
+    def of_kind(self, kind):
+        return tuple(s for s in self.subnets if s.kind == kind)
+
+
+class Model(_Record):
+    """stacks (aws then gcp, by path), envs {(cloud, key): Env} in vars order
+    then stack order, by_path {Path: Stack}."""
+
+    __slots__ = ("stacks", "envs", "by_path")
+    REFS = ("by_path",)
+
+    def stack(self, path):
+        return self.by_path.get(Path(path))
+
+    def env(self, cloud, key):
+        return self.envs.get((cloud, key))
+
+    def networks(self, cloud):
+        return [e.network for e in self.envs.values()
+                if e.cloud == cloud and e.network is not None]
+
+
+def _link(obj, **refs):
+    for k, v in refs.items():
+        object.__setattr__(obj, k, v)
+
+
+def _aws_network(env, res):
+    vpc = res.inputs
+    if not vpc.get("vpc_cidr"):
+        return None
+    net = Network(vpc.get("vpc_name", f"{env.key}-vpc"), vpc["vpc_cidr"],
+                  tuple(vpc.get("azs") or ()), env=env, resource=res)
+    subnets = tuple(Subnet(kind, c, network=net) for kind in AWS_SUBNET_KINDS
+                    for c in vpc.get(f"{kind}_subnets") or ())
+    _link(net, subnets=subnets)
+    return net
+
+
+def _gcp_network(env, res):
+    vpc = res.inputs
+    subnets = vpc.get("subnets") or []
+    if not subnets:
+        return None
+    net = Network(vpc.get("network_name", "?"), has_nat=bool(vpc.get("cloud_nats")),
+                  env=env, resource=res)
+    _link(net, subnets=tuple(
+        Subnet("subnet", s.get("subnet_ip"), s.get("subnet_name"), s.get("subnet_region"),
+               s.get("subnet_private_access"), s.get("subnet_flow_logs"), network=net)
+        for s in subnets), secondary=tuple(
+        Subnet("secondary", r.get("ip_cidr_range"), r.get("range_name"),
+               parent=subnet_name, network=net)
+        for subnet_name, lst in (vpc.get("secondary_ranges") or {}).items()
+        for r in lst or ()))
+    return net
+
+
+def _aws_stack(path):
+    parts = path.relative_to(loaders.AWS_ROOT).parts[:-1]
+    if len(parts) >= 3 and parts[-2] in loaders.AWS_REGIONS \
+            and parts[-1] in loaders.AWS_ENV_NAMES:
+        return parts, "/".join(parts[:-2]), (f"{parts[-2]}-{parts[-1]}",
+                                             {"region": parts[-2], "name": parts[-1]})
+    return parts, "/".join(parts) or "_root", None
+
+
+def _gcp_stack(path):
+    if not path.is_relative_to(loaders.GCP_ENVS):  # terragrunt/terragrunt.hcl
+        return (), "_root", None
+    parts = path.relative_to(loaders.GCP_ENVS).parts[:-1]
+    if not parts:
+        return parts, "_root", None
+    if len(parts) == 3 and parts[0] != "global":
+        return parts, parts[2], (f"{parts[0]}/{parts[1]}",
+                                 {"folder": parts[0], "name": parts[1]})
+    env = ("global", {"folder": "global"}) if len(parts) == 2 and parts[0] == "global" \
+        else None
+    return parts, "/".join(parts[1:]) or "_folder_root", env
+
+
+def build(aws=None, gcp=None):
+    envs = {}
+
+    def env(cloud, key, block=None, **kw):
+        e = envs.get((cloud, key))
+        if e is None:
+            e = envs[(cloud, key)] = Env(cloud, key, **kw, block=block or {})
+        return e
+
+    for key, block in ((aws or {}).get("Environments", {}) or {}).items():
+        region, _, name = key.partition("-")
+        if region in loaders.AWS_REGIONS and name in loaders.AWS_ENV_NAMES:
+            env("aws", key, block, region=region, name=name)
+        else:
+            env("aws", key, block)
+    for folder, fenvs in ((gcp or {}).get("envs", {}) or {}).items():
+        if not isinstance(fenvs, dict):
+            continue
+        if "resources" in fenvs:
+            env("gcp", folder, fenvs, folder=folder)
+            continue
+        for name, block in fenvs.items():
+            if isinstance(block, dict):
+                env("gcp", f"{folder}/{name}", block, folder=folder, name=name)
+
+    stacks = []
+    # the GCP root terragrunt.hcl (one level above envs/) first
+    gcp_paths = [p for p in loaders.find_stacks(loaders.GCP_TG_ROOT)
+                 if p.parent == loaders.GCP_TG_ROOT] + loaders.find_stacks(loaders.GCP_ENVS)
+    for cloud, paths, classify in (("aws", loaders.find_stacks(loaders.AWS_ROOT), _aws_stack),
+                                   ("gcp", gcp_paths, _gcp_stack)):
+        for p in paths:
+            parts, service, where = classify(p)
+            e = env(cloud, where[0], **where[1]) if where else None
+            stacks.append(Stack(cloud, p, parts, service, e))
+
+    by_env = {}
+    for s in stacks:
+        if s.env is not None:
+            by_env.setdefault(s.env, []).append(s)
+    for e in envs.values():
+        section = "Resources" if e.cloud == "aws" else "resources"
+        own = {s.service: s for s in by_env.get(e, ())}
+        res = {}
+        for name, block in ((e.block.get(section, {}) or {}) if isinstance(e.block, dict)
+                            else {}).items():
+            r = res[name] = Resource(name, block, e, own.get(name))
+            if r.stack is not None:
+                _link(r.stack, resource=r)
+        _link(e, stacks=tuple(by_env.get(e, ())), resources=MappingProxyType(res))
+        if e.cloud == "aws" and "vpc" in res:
+            _link(e, network=_aws_network(e, res["vpc"]))
+        elif e.cloud == "gcp" and "net-vpc" in res:
+            _link(e, network=_gcp_network(e, res["net-vpc"]))
+    return Model(tuple(stacks), MappingProxyType(envs),
+                 MappingProxyType({s.path: s for s in stacks}))
+
+
+_built = {}
+
+
+def of(aws=None, gcp=None):
+    """build(aws, gcp), memoized per loaded tree pair (and REPO_ROOT) for the
+    process."""
+    key = (id(aws), id(gcp), loaders.REPO_ROOT)
+    hit = _built.get(key)
+    if hit is None or hit[0] is not aws or hit[1] is not gcp:
+        hit = _built[key] = (aws, gcp, build(aws, gcp))
+    return hit[2]
@@ -8,31 +8,59 @@ schema_version and updating .github workflows):
     "evidence_path": "...", "controls": ["PCI-DSS 1.2.1"] }
 
 Score = 100 - sum(score_impact). Grades: A >= 90, B >= 80, C >= 70, D >= 60, else F.
+
+Reports also roll records up per category and per control (each control a
+record lists): counts by status, applicable (non-N/A) weight, score_impact
+and score = % of applicable weight retained. Totals and rollups come from one
+pass over the records (tally() / tally_add(), which producers can also feed
+as they emit records).
+
+Checks may also emit per-resource detail records (record(..., resource=)):
+one per offending stack/range/policy, score_impact 0. They are kept in a
+columnar store(); summary() derives the schema v1 report from the
+check-level records alone. ndjson_open()/ndjson_write()/ndjson_close() stream
+the same records (plus a trailing summary line) as they are produced, and
+read_ndjson() filters such a file without loading it.
 """
 
 import hashlib
 import json
+import os
+from array import array
 from datetime import datetime, timezone
 from pathlib import Path
 
+from . import loaders
+
 SCHEMA_VERSION = 1
+# optional source_hash() sidecar, next to the module variable cache
+SOURCE_HASH_SIDECAR = loaders.CACHE_DIR / "source-hashes.json"
+SOURCE_HASH_SIDECAR_VERSION = 1
 STATUSES = {"PASS", "WARN", "FAIL", "N/A"}
 REQUIRED_FIELDS = ["category", "check", "status", "score_impact", "weight",
                    "explanation", "evidence_path", "controls"]
 
 
 def record(category, check, status, weight, explanation, evidence_path, controls,
-           warn_factor=0.5):
+           warn_factor=0.5, resource=None):
     """Build one check record. score_impact derives from status:
-    FAIL -> weight, WARN -> weight*warn_factor, PASS/N/A -> 0."""
+    FAIL -> weight, WARN -> weight*warn_factor, PASS/N/A -> 0.
+
+    With resource set, the record is a per-resource detail row of the check:
+    it carries a "resource" field and score_impact 0 (the check-level record
+    carries the check's impact)."""
     if status not in STATUSES:
         raise ValueError(f"invalid status {status!r} for check {check!r}")
     impact = {"FAIL": weight, "WARN": round(weight * warn_factor, 1)}.get(status, 0)
-    return {
+    rec = {
         "category": category, "check": check, "status": status,
-        "score_impact": impact, "weight": weight, "explanation": explanation,
-        "evidence_path": str(evidence_path), "controls": list(controls),
+        "score_impact": 0 if resource is not None else impact, "weight": weight,
+        "explanation": explanation, "evidence_path": str(evidence_path),
+        "controls": list(controls),
     }
+    if resource is not None:
+        rec["resource"] = resource
+    return rec
 
 
 def validate_record(rec):
@@ -59,34 +87,122 @@ def grade(s):
     return "A" if s >= 90 else "B" if s >= 80 else "C" if s >= 70 else "D" if s >= 60 else "F"
 
 
-def source_hash(paths):
+_source_hash_memo = {}
+
+
+def _stat_key(paths):
+    key = []
+    for p in sorted(str(p) for p in paths):
+        st = Path(p).stat()
+        key.append((p, st.st_mtime_ns, st.st_size))
+    return tuple(key)
+
+
+def source_hash(paths, sidecar=None):
     """sha256 over the concatenated bytes of the source inputs, for the
-    generated-doc staleness trailer (G1-10)."""
+    generated-doc staleness trailer (G1-10).
+
+    Memoized for the process on every input's (path, st_mtime_ns, st_size);
+    with a sidecar path (e.g. SOURCE_HASH_SIDECAR) the digest is also
+    persisted there, so later runs skip re-hashing unchanged inputs.
+    """
+    stat = _stat_key(paths)
+    hit = _source_hash_memo.get(stat)
+    if hit:
+        return hit
+    names = "\n".join(p for p, _, _ in stat)
+    disk = {}
+    if sidecar:
+        try:
+            disk = json.loads(Path(sidecar).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            disk = {}
+        disk = disk if disk.get("version") == SOURCE_HASH_SIDECAR_VERSION else {}
+        entry = disk.get("entries", {}).get(names)
+        if isinstance(entry, dict) and entry.get("stat") == [list(s[1:]) for s in stat]:
+            _source_hash_memo[stat] = entry["sha256"]
+            return entry["sha256"]
     h = hashlib.sha256()
-    for p in sorted(str(p) for p in paths):
+    for p, _, _ in stat:
         h.update(Path(p).read_bytes())
-    return h.hexdigest()
+    digest = _source_hash_memo[stat] = h.hexdigest()
+    if sidecar:
+        entries = disk.get("entries", {})
+        entries[names] = {"stat": [list(s[1:]) for s in stat], "sha256": digest}
+        try:
+            Path(sidecar).parent.mkdir(exist_ok=True)
+            tmp = Path(sidecar).with_name(f"{Path(sidecar).name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": SOURCE_HASH_SIDECAR_VERSION,
+                                       "entries": entries}, indent=1, sort_keys=True),
+                           encoding="utf-8")
+            tmp.replace(sidecar)
+        except OSError:
+            pass  # read-only checkout: the in-process memo still applies
+    return digest
 
 
 def staleness_trailer(paths):
     return f"<!-- generated-from: sha256:{source_hash(paths)} -->"
 
 
-def build_report(records, generator, sources):
+_STATUS_KEYS = {"PASS": "pass", "WARN": "warn", "FAIL": "fail", "N/A": "na"}
+
+
+def _bucket():
+    return {"checks": 0, "pass": 0, "warn": 0, "fail": 0, "na": 0,
+            "weight": 0, "score_impact": 0}
+
+
+def tally():
+    """Empty accumulator for tally_add(): overall, per-category and
+    per-control running totals."""
+    return {"totals": _bucket(), "categories": {}, "controls": {}}
+
+
+def tally_add(t, rec):
+    """Fold one record into tally t (O(controls) per record)."""
+    buckets = [t["totals"], t["categories"].setdefault(rec["category"], _bucket())]
+    buckets += [t["controls"].setdefault(c, _bucket()) for c in rec["controls"]]
+    key = _STATUS_KEYS[rec["status"]]
+    applicable = rec["status"] != "N/A"
+    for b in buckets:
+        b["checks"] += 1
+        b[key] += 1
+        if applicable:
+            b["weight"] += rec["weight"]
+            b["score_impact"] += rec["score_impact"]
+    return t
+
+
+def _rollup(b):
+    """Bucket counts plus score: % of applicable (non-N/A) weight retained;
+    None when nothing in the bucket is applicable."""
+    out = dict(b, score_impact=round(b["score_impact"], 1))
+    out["score"] = round(100 * (b["weight"] - b["score_impact"]) / b["weight"], 1) \
+        if b["weight"] else None
+    return out
+
+
+def build_report(records, generator, sources, t=None):
+    """Report dict for records; t is their tally() if the producer already
+    accumulated one, else it is computed here in one pass."""
+    if t is None:
+        t = tally()
+        for r in records:
+            tally_add(t, r)
+    tot = t["totals"]
+    s = max(0, round(100 - tot["score_impact"], 1))
     return {
         "schema_version": SCHEMA_VERSION,
         "generator": generator,
         "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
         "source_hash": source_hash(sources),
-        "score": score(records),
-        "grade": grade(score(records)),
-        "totals": {
-            "checks": len(records),
-            "pass": sum(1 for r in records if r["status"] == "PASS"),
-            "warn": sum(1 for r in records if r["status"] == "WARN"),
-            "fail": sum(1 for r in records if r["status"] == "FAIL"),
-            "na": sum(1 for r in records if r["status"] == "N/A"),
-        },
+        "score": s,
+        "grade": grade(s),
+        "totals": {"checks": tot["checks"], "pass": tot["pass"], "warn": tot["warn"],
+                   "fail": tot["fail"], "na": tot["na"]},
+        "categories": {c: _rollup(b) for c, b in t["categories"].items()},
+        "controls": {c: _rollup(b) for c, b in sorted(t["controls"].items())},
         "checks": records,
     }
 
@@ -95,6 +211,132 @@ def write_report_json(report, path: Path):
     Path(path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
 
 
+# -- columnar record store ----------------------------------------------------
+#
+# One check fans out to one detail row per offending resource, so a report
+# holds far more rows than checks. The store keeps each field as a column of
+# indexes into one table of interned values: category, check, status,
+# controls, evidence and the numbers repeat across rows and are stored once.
+
+STORE_FIELDS = REQUIRED_FIELDS + ["resource"]
+
+
+def store():
+    return {"values": [], "ids": {}, "rows": 0,
+            "cols": {f: array("I") for f in STORE_FIELDS}}
+
+
+def _intern(st, value):
+    key = (type(value), value)
+    i = st["ids"].get(key)
+    if i is None:
+        i = st["ids"][key] = len(st["values"])
+        st["values"].append(value)
+    return i
+
+
+def store_add(st, rec):
+    for f in STORE_FIELDS:
+        v = rec.get(f)
+        st["cols"][f].append(_intern(st, tuple(v) if isinstance(v, list) else v))
+    st["rows"] += 1
+
+
+def rows(st, resources=True):
+    """Records in insertion order; resources=False yields only the
+    check-level records (the schema v1 view)."""
+    values, cols = st["values"], st["cols"]
+    res_col = cols["resource"]
+    for i in range(st["rows"]):
+        resource = values[res_col[i]]
+        if resource is not None and not resources:
+            continue
+        rec = {f: values[cols[f][i]] for f in REQUIRED_FIELDS}
+        rec["controls"] = list(rec["controls"])
+        if resource is not None:
+            rec["resource"] = resource
+        yield rec
+
+
+def summary(st, generator, sources):
+    """The schema v1 report (check-level records only) of a store."""
+    t, records = tally(), []
+    for r in rows(st, resources=False):
+        tally_add(t, r)
+        records.append(r)
+    return build_report(records, generator, sources, t)
+
+
+# -- NDJSON report stream ----------------------------------------------------
+#
+# One compact JSON record per line, written as each record is produced, then
+# one trailing {"summary": {...}} line: the schema v1 report minus "checks",
+# tallied from the check-level records on the way through. Consumers can
+# start reading before the run ends, and neither side holds the records.
+
+def ndjson_open(path, generator, sources):
+    """Writer for ndjson_write()/ndjson_close()."""
+    return {"fh": open(path, "w", encoding="utf-8"), "tally": tally(),
+            "generator": generator, "sources": sources}
+
+
+def ndjson_write(w, rec):
+    w["fh"].write(json.dumps(rec, separators=(",", ":")) + "\n")
+    w["fh"].flush()
+    if "resource" not in rec:
+        tally_add(w["tally"], rec)
+
+
+def ndjson_close(w, summary=True):
+    """Write the summary line, close, and return the summary. With summary
+    false (the run failed) the file is only closed: a stream without its
+    summary line reads as incomplete (read_ndjson_summary() -> None)."""
+    if not summary:
+        w["fh"].close()
+        return None
+    summ = build_report([], w["generator"], w["sources"], w["tally"])
+    del summ["checks"]
+    w["fh"].write(json.dumps({"summary": summ}, separators=(",", ":")) + "\n")
+    w["fh"].close()
+    return summ
+
+
+def read_ndjson(path, status=None, category=None, resources=True):
+    """Records of an NDJSON report, lazily, one line at a time; status and
+    category filter (a value or a collection of values); resources=False
+    skips per-resource detail records. The summary line is not yielded."""
+    status = {status} if isinstance(status, str) else status
+    category = {category} if isinstance(category, str) else category
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if "summary" in rec \
+                    or (status and rec.get("status") not in status) \
+                    or (category and rec.get("category") not in category) \
+                    or (not resources and "resource" in rec):
+                continue
+            yield rec
+
+
+def read_ndjson_summary(path):
+    """The trailing summary of an NDJSON report, read from the end of the
+    file; None while the run is still writing records."""
+    with open(path, "rb") as fh:
+        end = fh.seek(0, 2)
+        pos, tail = end, b""
+        while pos > 0 and b"\n" not in tail:
+            pos = max(0, pos - 65536)
+            fh.seek(pos)
+            tail = fh.read(end - pos).rstrip(b"\n")
+    try:
+        rec = json.loads(tail.rsplit(b"\n", 1)[-1] or b"{}")
+    except ValueError:  # last line still being written
+        return None
+    return rec.get("summary") if isinstance(rec, dict) else None
+
+
 def render_scorecard(report, title, sources):
     s, g = report["score"], report["grade"]
     t = report["totals"]
@@ -112,6 +354,12 @@ def render_scorecard(report, title, sources):
         icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌", "N/A": "➖"}[r["status"]]
         lines.append(f"| {r['category']} | {r['check']} | {icon} {r['status']} | "
                      f"-{r['score_impact']} | {r['weight']} | {', '.join(r['controls'])} |")
+    if report.get("categories"):
+        lines += ["", "## Categories", "",
+                  "| Category | Score | PASS | WARN | FAIL | N/A |", "|---|---|---|---|---|---|"]
+        for c, b in report["categories"].items():
+            sc = "—" if b["score"] is None else b["score"]
+            lines.append(f"| {c} | {sc} | {b['pass']} | {b['warn']} | {b['fail']} | {b['na']} |")
     lines += ["", "## Explanations", ""]
     for r in report["checks"]:
         if r["status"] in ("FAIL", "WARN"):
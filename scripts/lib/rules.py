@@ -3,10 +3,35 @@
 Rule IDs are preserved verbatim from the legacy scripts/compliance-check.py —
 do not renumber. New rules append; they never reuse an existing ID.
 
-Each rule: id, framework, title, description, severity, category.
+Each rule: id, framework, title, description, severity, category, and
+optionally "checks" — the predicates scripts/lib/engine.py evaluates for it
+(see that module for the check fields). Rules without checks are declared
+but not yet derived from the tree.
 Controls mapping: the id IS the control reference.
+
+The rules are frozen into an immutable catalog at import (CATALOG): rules in
+declaration order plus id -> rule and framework/category/severity -> tuple
+indexes, so rule() and rules_for() are dict lookups however many controls
+are mapped. catalog() builds a catalog of these rules plus YAML rule packs:
+
+  rules:
+    - id: ISO-A.8.24
+      framework: ISO 27001
+      title: Use of cryptography
+      description: ...
+      severity: high
+      category: encryption
+      checks: [...]          # optional, as above
+
+Pack rules append after the built-in ones; a duplicate id, or a check with
+an unknown scope or predicate or a finding that would not format
+(check_errors()), is an error.
 """
 
+from types import MappingProxyType
+
+from . import loaders
+
 FRAMEWORKS = {
     "PCI_DSS": "PCI DSS",
     "CIS": "CIS Benchmarks",
@@ -19,10 +44,28 @@ RULES = [
     # --- PCI DSS (legacy IDs, preserved) ---
     {"id": "PCI-DSS-1.1", "framework": "PCI DSS", "title": "Network Segmentation",
      "description": "Implement network segmentation to isolate cardholder data",
-     "severity": "critical", "category": "network"},
+     "severity": "critical", "category": "network",
+     "checks": [
+         {"scope": "aws", "predicate": "aws_vpc_without_private_subnets",
+          "pass": "PCI-DSS-1.1",
+          "finding": "VPCs without private subnets: {items}",
+          "remediation": "Declare private subnet tiers for workload isolation"},
+         {"scope": "gcp", "predicate": "gke_without_private_nodes",
+          "pass": "PCI-DSS-1.1-GCP",
+          "finding": "GKE clusters without private nodes: {items}",
+          "remediation": "Set enable_private_nodes: true"}]},
     {"id": "PCI-DSS-3.4", "framework": "PCI DSS", "title": "Encryption at Rest",
      "description": "Encrypt cardholder data at rest using strong cryptography",
-     "severity": "critical", "category": "encryption"},
+     "severity": "critical", "category": "encryption",
+     "checks": [
+         {"scope": "aws", "predicate": "aws_storage_unencrypted",
+          "pass": "PCI-DSS-3.4",
+          "finding": "storage_encrypted=false declared in envs: {items}",
+          "remediation": "Enable encryption (with CMKs) for all data services"},
+         {"scope": "gcp", "predicate": "gke_etcd_unencrypted",
+          "pass": "PCI-DSS-3.4-GCP",
+          "finding": "GKE etcd encryption off: {items}",
+          "remediation": "Enable database_encryption (CMEK) on GKE"}]},
     {"id": "PCI-DSS-4.1", "framework": "PCI DSS", "title": "Encryption in Transit",
      "description": "Encrypt cardholder data during transmission over networks",
      "severity": "critical", "category": "encryption"},
@@ -31,11 +74,25 @@ RULES = [
      "severity": "high", "category": "access"},
     {"id": "PCI-DSS-10.1", "framework": "PCI DSS", "title": "Audit Logging",
      "description": "Log all access to cardholder data and system components",
-     "severity": "high", "category": "logging"},
+     "severity": "high", "category": "logging",
+     "checks": [
+         {"scope": "aws", "predicate": "aws_cloudtrail_missing",
+          "pass": "PCI-DSS-10.1", "finding": "No CloudTrail stack",
+          "remediation": "Add org CloudTrail with log-file validation"},
+         {"scope": "gcp", "predicate": "gcp_audit_missing",
+          "pass": "PCI-DSS-10.1-GCP", "finding": "No GCP audit log sink stack",
+          "remediation": "Add envs/global/audit"}]},
     # --- CIS Benchmarks (legacy IDs, preserved) ---
     {"id": "CIS-1.1", "framework": "CIS Benchmarks", "title": "Root Access Restriction",
      "description": "Restrict root/admin access to systems",
-     "severity": "high", "category": "access"},
+     "severity": "high", "category": "access",
+     "checks": [
+         {"scope": "aws", "predicate": "aws_wildcard_allow", "pass": "CIS-1.1",
+          "finding": "Wildcard Allow Action in: {head}",
+          "remediation": "Scope policy actions to least privilege"},
+         {"scope": "repo", "predicate": "secret_files", "pass": None,
+          "finding": "Potential secret files found: {count} files",
+          "remediation": "Remove secret files; use secure secret management"}]},
     {"id": "CIS-2.1", "framework": "CIS Benchmarks", "title": "Encryption Standards",
      "description": "Use approved encryption algorithms and key lengths",
      "severity": "high", "category": "encryption"},
@@ -48,22 +105,146 @@ RULES = [
     # --- SOC 2 (legacy IDs, preserved) ---
     {"id": "SOC2-CC6.1", "framework": "SOC 2", "title": "Logical Access Controls",
      "description": "Implement logical access controls for systems",
-     "severity": "high", "category": "access"},
+     "severity": "high", "category": "access",
+     "checks": [
+         {"scope": "gcp", "predicate": "gke_without_workload_identity",
+          "pass": "SOC2-CC6.1",
+          "finding": "GKE stacks missing Workload Identity wiring",
+          "remediation": "Wire identity_namespace on every svc-gke stack"}]},
     {"id": "SOC2-CC6.7", "framework": "SOC 2", "title": "Data Transmission Security",
      "description": "Secure data transmission between systems",
      "severity": "high", "category": "encryption"},
     {"id": "SOC2-CC7.1", "framework": "SOC 2", "title": "System Monitoring",
      "description": "Monitor system operations and performance",
-     "severity": "medium", "category": "logging"},
+     "severity": "medium", "category": "logging",
+     "checks": [
+         {"scope": "repo", "predicate": "required_docs_missing",
+          "pass": "SOC2-CC7.1",
+          "finding": "Missing required documentation: {items}",
+          "remediation": "Create missing security/compliance docs"}]},
 ]
 
 
-def rules_for(framework: str):
-    return [r for r in RULES if r["framework"] == framework]
+SEVERITIES = ("critical", "high", "medium")
+REQUIRED = ("id", "framework", "title", "description", "severity", "category")
+INDEXED = ("framework", "category", "severity")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def build_catalog(rules):
+    """Immutable {"rules", "by_id", "by_framework", "by_category",
+    "by_severity"} over rule dicts; ValueError on a malformed rule or a
+    duplicate id."""
+    by_id, idx = {}, {f: {} for f in INDEXED}
+    for r in rules:
+        missing = [f for f in REQUIRED if not r.get(f)]
+        if missing:
+            raise ValueError(f"rule {r.get('id', '?')!r} lacks {missing}")
+        if r["framework"] not in FRAMEWORKS.values():
+            raise ValueError(f"rule {r['id']!r}: unknown framework {r['framework']!r}")
+        if r["severity"] not in SEVERITIES:
+            raise ValueError(f"rule {r['id']!r}: severity {r['severity']!r} "
+                             f"not in {SEVERITIES}")
+        if r["id"] in by_id:
+            raise ValueError(f"duplicate rule id {r['id']!r}")
+        frozen = by_id[r["id"]] = _freeze(r)
+        for f in INDEXED:
+            idx[f].setdefault(r[f], []).append(frozen)
+    cat = {"rules": tuple(by_id.values()), "by_id": MappingProxyType(by_id)}
+    for f in INDEXED:
+        cat[f"by_{f}"] = MappingProxyType({k: tuple(v) for k, v in idx[f].items()})
+    return MappingProxyType(cat)
+
+
+def load_pack(path):
+    """Rule dicts from a YAML rule pack ({"rules": [...]})."""
+    data = loaders.load_vars_yaml(path) or {}
+    rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(rules, list) or not all(isinstance(r, dict) for r in rules):
+        raise ValueError(f"{path}: expected a top-level 'rules' list of mappings")
+    return rules
+
+
+def check_errors(r):
+    """Problems with the checks of rule dict r: each must be a mapping with a
+    scope in engine.SCOPES, a predicate registered in engine.PREDICATES, a
+    finding and a remediation. The finding must be a well-formed format
+    string naming only engine.FINDING_FIELDS."""
+    from . import engine  # lazy: the engine pulls in facts and the vars model
+
+    checks = r.get("checks", [])
+    if not isinstance(checks, list):
+        return ["checks must be a list"]
+    errors = []
+    for i, c in enumerate(checks):
+        if not isinstance(c, dict):
+            errors.append(f"check {i} is not a mapping")
+            continue
+        if c.get("scope") not in engine.SCOPES:
+            errors.append(f"check {i}: scope {c.get('scope')!r} not in {engine.SCOPES}")
+        if c.get("predicate") not in engine.PREDICATES:
+            errors.append(f"check {i}: unknown predicate {c.get('predicate')!r}")
+        missing = [f for f in ("finding", "remediation") if not c.get(f)]
+        if missing:
+            errors.append(f"check {i} lacks {missing}")
+        elif (bad := _finding_error(c["finding"], engine.FINDING_FIELDS)):
+            errors.append(f"check {i}: finding {bad}")
+    return errors
+
+
+def _finding_error(template, fields):
+    """Why str.format() of template with the keyword fields would fail, or
+    None; format specs are checked as templates too."""
+    import string
+
+    if not isinstance(template, str):
+        return "must be a string"
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as e:
+        return f"is malformed: {e}"
+    for _, field, spec, conversion in parsed:
+        if field is None:
+            continue
+        name = field.partition(".")[0].partition("[")[0]
+        if name not in fields:
+            return f"field {{{field}}} not in {fields}"
+        if conversion not in (None, "r", "s", "a"):
+            return f"has unknown conversion !{conversion}"
+        if spec and (bad := _finding_error(spec, fields)):
+            return bad
+    return None
+
+
+def catalog(*packs):
+    """CATALOG extended with the rules of each YAML pack path, in order;
+    ValueError naming the pack and rule on a malformed check."""
+    if not packs:
+        return CATALOG
+    rules = [dict(r) for r in RULES]
+    for p in packs:
+        for r in load_pack(p):
+            errors = check_errors(r)
+            if errors:
+                raise ValueError(f"{p}: rule {r.get('id', '?')!r}: {'; '.join(errors)}")
+            rules.append(r)
+    return build_catalog(rules)
+
+
+CATALOG = build_catalog(RULES)
+RULES = CATALOG["rules"]  # the frozen built-in rules
+
+
+def rules_for(framework: str, cat=CATALOG):
+    return cat["by_framework"].get(framework, ())
 
 
-def rule(rule_id: str):
-    for r in RULES:
-        if r["id"] == rule_id:
-            return r
-    raise KeyError(rule_id)
+def rule(rule_id: str, cat=CATALOG):
+    return cat["by_id"][rule_id]
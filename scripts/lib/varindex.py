@@ -0,0 +1,111 @@
+"""Inverted key/value index over a loaded vars tree.
+
+Gate checks ask "is there a rotation_period key anywhere", "does this block
+set storage_encrypted: false", "is any budget key declared". Answering those
+by json.dumps-ing the tree and substring-searching the text re-serializes the
+tree once per check per env, and depends on json's formatting (spacing,
+quoting, lower-cased booleans). The index is built once per loaded tree and
+answers the same questions exactly:
+
+  { "keys":    {key name: [(dotted path, value), ...]},
+    "values":  {(type name, scalar): [dotted path, ...]},
+    "aliases": {first path: [alias path, ...]} }
+
+It is built with loaders.iter_shared(), so an aliased subtree is indexed
+once; lookups re-root matches under each alias path. Paths use
+leaf_key_paths() dotting, with [i] for list items.
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+from . import loaders
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def build(data):
+    keys, values, aliases = {}, {}, {}
+    for path, key, value, first in loaders.iter_shared(data):
+        if first is not None:
+            aliases.setdefault(first, []).append(path)
+        if key is not None:
+            keys.setdefault(str(key), []).append((path, value))
+        if first is None and isinstance(value, _SCALARS):
+            values.setdefault((type(value).__name__, value), []).append(path)
+    return {"keys": keys, "values": values, "aliases": aliases}
+
+
+_built = {}
+
+
+def of(data):
+    """build(data), memoized per loaded tree object for the process."""
+    hit = _built.get(id(data))
+    if hit is None or hit[0] is not data:
+        hit = _built[id(data)] = (data, build(data))
+    return hit[1]
+
+
+def _under(path, prefix):
+    return not prefix or path == prefix or path.startswith(prefix + ".") \
+        or path.startswith(prefix + "[")
+
+
+def _rerooted(idx, path):
+    """path plus its copies under every alias of an enclosing shared node,
+    re-rooted again until no new path appears (an alias inside an aliased
+    node). An alias site inside its own node (a recursive anchor) is not
+    followed."""
+    out, seen, i = [path], {path}, 0
+    while i < len(out):
+        p, i = out[i], i + 1
+        for first, sites in idx["aliases"].items():
+            if _under(p, first) and p != first:
+                for site in sites:
+                    q = site + p[len(first):]
+                    if q not in seen and not _under(site, first):
+                        seen.add(q)
+                        out.append(q)
+    return out
+
+
+def find_keys(idx, key, under=None):
+    """[(path, value)] for keys equal to `key`, or satisfying key(name) when
+    callable, located at or below the dotted path `under`."""
+    names = [n for n in idx["keys"] if key(n)] if callable(key) else [key]
+    out = []
+    for n in names:
+        for path, value in idx["keys"].get(n, ()):
+            out += [(p, value) for p in _rerooted(idx, path) if _under(p, under)]
+    return out
+
+
+def has_key(idx, key, under=None):
+    return bool(find_keys(idx, key, under))
+
+
+def find_values(idx, value, under=None):
+    """Dotted paths of scalar leaves equal to `value` (type-exact: True is not
+    1), or satisfying value(v) when callable, at or below `under`."""
+    if callable(value):
+        wanted = [k for k in idx["values"] if value(k[1])]
+    else:
+        wanted = [(type(value).__name__, value)]
+    out = []
+    for k in wanted:
+        for path in idx["values"].get(k, ()):
+            out += [p for p in _rerooted(idx, path) if _under(p, under)]
+    return out
+
+
+def mentions(idx, word, under=None):
+    """Dotted paths at or below `under` whose key name, or whose string
+    value, contains `word` (e.g. any kms_key* key or a value naming one)."""
+    return [p for p, _ in find_keys(idx, lambda n: word in n, under)] + \
+        find_values(idx, lambda v: isinstance(v, str) and word in v, under)
+
+
+def key_value(idx, key, value, under=None):
+    """[(path, value)] where `key` is set to exactly `value` below `under`."""
+    return [(p, v) for p, v in find_keys(idx, key, under)
+            if type(v) is type(value) and v == value]
@@ -29,7 +29,8 @@ REPO = loaders.REPO_ROOT
 OUTPUT = REPO / "PLACEHOLDERS.md"
 TOKEN_RE = re.compile(r"PLACEHOLDER_[A-Z0-9_]+")
 SCAN_SUFFIXES = {".tf", ".hcl", ".yaml", ".yml", ".json"}
-SKIP_DIRS = {".git", ".terragrunt-cache", ".terraform", "evidence", "__pycache__"}
+SKIP_DIRS = {".git", ".terragrunt-cache", ".terraform", "evidence", "__pycache__",
+             ".gate-cache"}
 
 # how-to-resolve guidance per token type (second underscore-delimited field)
 RESOLUTIONS = {
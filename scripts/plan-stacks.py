@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Level-parallel terragrunt plan orchestrator.
+
+Replaces the serial `find ... | while read dir; terragrunt plan` loops. The
+stack set comes from loaders.aws_env_stacks()/gcp_env_stacks(); ordering
+comes from the dependency graph (scripts/lib/graph.py). Stacks within one
+topological level run concurrently on a bounded worker pool, and a level
+starts only once the previous one has finished. Each plan is exported as JSON
+to plans/<repo_path_with_underscores>.json, the layout plan-guard reads.
+
+A stack whose dependency failed is not planned (reported as SKIP).
+
+Plan cache: each exported plan gets a sidecar plans/<name>.fingerprint holding
+the stack's input fingerprint (scripts/lib/fingerprint.py: hcl + includes,
+the vars subtree it reads, module source@ref, dependency fingerprints). A
+stack whose fingerprint matches its sidecar is not re-planned (CACHED).
+Use --no-cache to re-plan everything, e.g. to pick up cloud-side drift.
+
+Env selection: --env X takes AWS stacks {svc}/{region}/X and GCP stacks in
+envs/X/* (GCP folders are the env tier; shrd/* is opt-in via --env shrd).
+
+Usage:
+  python3 scripts/plan-stacks.py --env stg               # plan, JSON to plans/
+  python3 scripts/plan-stacks.py --env dev --jobs 4 --cloud aws
+  python3 scripts/plan-stacks.py --env stg --dry-run     # print levels only
+  python3 scripts/plan-stacks.py --env stg --no-cache    # ignore cached plans
+  TERRAGRUNT=scripts/fixtures/stub-terragrunt \\
+    python3 scripts/plan-stacks.py --env stg             # offline, stub binary
+
+Controls: SOC2 CC8.1 (ordered change execution), PCI-DSS 6.4.x.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import fingerprint, graph as stackgraph, loaders  # noqa: E402
+
+REPO = loaders.REPO_ROOT
+PLANS_DIR = REPO / "plans"
+PLAN_BINARY = "tfplan.binary"
+
+
+def select_stacks(env, cloud="all"):
+    """{graph node: terragrunt.hcl path} for the stacks of one env."""
+    out = {}
+    if cloud in ("all", "aws"):
+        for s in loaders.aws_env_stacks():
+            if s["env"] == env:
+                out[stackgraph.stack_key(s["path"])] = s["path"]
+    if cloud in ("all", "gcp"):
+        for s in loaders.gcp_env_stacks():
+            if s["folder"] == env:
+                out[stackgraph.stack_key(s["path"])] = s["path"]
+    return out
+
+
+def plan_json_path(node, plans_dir):
+    return Path(plans_dir) / (node.replace("/", "_") + ".json")
+
+
+def fingerprint_path(node, plans_dir):
+    return Path(plans_dir) / (node.replace("/", "_") + ".fingerprint")
+
+
+def cached(node, fp, plans_dir):
+    sidecar = fingerprint_path(node, plans_dir)
+    return (plan_json_path(node, plans_dir).is_file() and sidecar.is_file()
+            and sidecar.read_text(encoding="utf-8").strip() == fp)
+
+
+def plan_stack(node, terragrunt, plans_dir, fp=None):
+    """Plan one stack and export its JSON plan. Returns (status, seconds, detail).
+    A failed stack loses its previous plan and fingerprint, so neither
+    plan-guard nor the cache can pick up a stale result."""
+    import subprocess
+
+    cwd = REPO / node
+    started = time.monotonic()
+    env = {**os.environ, "TG_NON_INTERACTIVE": "true"}
+    for stale in (fingerprint_path(node, plans_dir), plan_json_path(node, plans_dir)):
+        stale.unlink(missing_ok=True)
+    r = subprocess.run([terragrunt, "plan", f"-out={PLAN_BINARY}"], cwd=cwd, env=env,
+                       capture_output=True, text=True)
+    if r.returncode != 0:
+        return "FAIL", time.monotonic() - started, (r.stderr or r.stdout).strip()
+    r = subprocess.run([terragrunt, "show", "-json", PLAN_BINARY], cwd=cwd, env=env,
+                       capture_output=True, text=True)
+    if r.returncode != 0:
+        return "FAIL", time.monotonic() - started, (r.stderr or r.stdout).strip()
+    plan_json_path(node, plans_dir).write_text(r.stdout, encoding="utf-8")
+    if fp:
+        fingerprint_path(node, plans_dir).write_text(fp + "\n", encoding="utf-8")
+    return "OK", time.monotonic() - started, ""
+
+
+def run_levels(levels, edges, terragrunt, plans_dir, jobs, fps=None):
+    """Plan level by level; {node: (status, seconds, detail)}. With fps
+    ({node: fingerprint}), stacks whose cached plan matches are not re-run."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    fps = fps or {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for i, level in enumerate(levels):
+            runnable, futures = [], {}
+            for node in level:
+                blocked = [d for d in edges.get(node, [])
+                           if results.get(d, ("OK",))[0] not in ("OK", "CACHED")]
+                if blocked:
+                    results[node] = ("SKIP", 0.0, f"dependency not planned: {blocked[0]}")
+                elif node in fps and cached(node, fps[node], plans_dir):
+                    results[node] = ("CACHED", 0.0, "")
+                else:
+                    runnable.append(node)
+            print(f"level {i}: {len(runnable)} stacks to plan of {len(level)}")
+            for node in runnable:
+                futures[node] = pool.submit(plan_stack, node, terragrunt, plans_dir,
+                                            fps.get(node))
+            for node in level:
+                if node in futures:
+                    results[node] = futures[node].result()
+                status, secs, _ = results[node]
+                print(f"  {status:<6} {secs:7.1f}s  {node}")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--env", required=True, help="dev | stg | prod | shrd ...")
+    ap.add_argument("--cloud", choices=["all", "aws", "gcp"], default="all")
+    ap.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1),
+                    help="max stacks planned concurrently within a level")
+    ap.add_argument("--plans-dir", type=Path, default=PLANS_DIR)
+    ap.add_argument("--terragrunt", default=os.environ.get("TERRAGRUNT", "terragrunt"),
+                    help="terragrunt binary (env TERRAGRUNT; a stub works offline)")
+    ap.add_argument("--dry-run", action="store_true", help="print levels, plan nothing")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-plan every stack even if its input fingerprint is unchanged")
+    args = ap.parse_args()
+
+    stacks = select_stacks(args.env, args.cloud)
+    if not stacks:
+        print(f"plan-stacks: no stacks for env {args.env!r} ({args.cloud})", file=sys.stderr)
+        return 1
+    full = stackgraph.build_graph()
+    g = stackgraph.subgraph(full, lambda n: n in stacks)
+    try:
+        levels = stackgraph.topo_levels(g)
+    except stackgraph.CycleError as e:
+        print(f"FAIL: {e}", file=sys.stderr)
+        return 1
+
+    if args.dry_run:
+        for i, level in enumerate(levels):
+            print(f"level {i}: {' '.join(level)}")
+        return 0
+
+    # stacks run with cwd = their own dir, so pin a relative binary path now
+    terragrunt = shutil.which(args.terragrunt)
+    if terragrunt is None:
+        print(f"FAIL: terragrunt binary {args.terragrunt!r} not found", file=sys.stderr)
+        return 1
+    terragrunt = str(Path(terragrunt).resolve())
+
+    args.plans_dir.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    # fingerprints span the full graph: dependencies outside --env still count
+    fps = {} if args.no_cache else \
+        {n: fp for n, fp in fingerprint.fingerprints(full).items() if n in stacks}
+    results = run_levels(levels, g["edges"], terragrunt, args.plans_dir,
+                         max(1, args.jobs), fps)
+    wall = time.monotonic() - started
+
+    failed = {n: r for n, r in results.items() if r[0] not in ("OK", "CACHED")}
+    hits = sum(1 for r in results.values() if r[0] == "CACHED")
+    serial = sum(r[1] for r in results.values())
+    print(f"plan-stacks: {len(results) - len(failed)}/{len(results)} planned "
+          f"({hits} from cache) in {wall:.1f}s wall ({serial:.1f}s summed stack time, "
+          f"{len(levels)} levels, {args.jobs} workers); JSON plans in {args.plans_dir}/")
+    for node, (status, _, detail) in sorted(failed.items()):
+        print(f"  {status}: {node}", file=sys.stderr)
+        for line in detail.splitlines()[-5:]:
+            print(f"    {line}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
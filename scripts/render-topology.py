@@ -21,7 +21,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from lib import loaders, report as rp  # noqa: E402
+from lib import loaders, model, report as rp  # noqa: E402
 
 REPO = loaders.REPO_ROOT
 TOPOLOGY_MD = REPO / "NETWORK_TOPOLOGY.md"
@@ -29,64 +29,20 @@ MERMAID = REPO / "architecture.mmd"
 SOURCES = [loaders.AWS_VARS, loaders.GCP_VARS]
 
 
-def aws_vpcs(aws):
-    out = []
-    for envkey in sorted(aws.get("Environments", {}) or {}):
-        res = (aws["Environments"][envkey] or {}).get("Resources", {}) or {}
-        vpc = (res.get("vpc") or {}).get("inputs", {}) or {}
-        if not vpc.get("vpc_cidr"):
-            continue
-        out.append({
-            "env": envkey,
-            "name": vpc.get("vpc_name", f"{envkey}-vpc"),
-            "cidr": vpc["vpc_cidr"],
-            "azs": vpc.get("azs", []),
-            "private": vpc.get("private_subnets", []),
-            "public": vpc.get("public_subnets", []),
-            "database": vpc.get("database_subnets", []),
-            "intra": vpc.get("intra_subnets", []),
-            "elasticache": vpc.get("elasticache_subnets", []),
-        })
-    return out
-
-
-def gcp_networks(gcp):
-    out = []
-
-    def handle(folder, env, res):
-        netvpc = (res.get("net-vpc") or {}).get("inputs", {}) or {}
-        subnets = netvpc.get("subnets") or []
-        if not subnets:
-            return
-        sec = netvpc.get("secondary_ranges") or {}
-        ranges = []
-        for subnet_name, lst in sec.items():
-            for r in lst or []:
-                ranges.append({"subnet": subnet_name,
-                               "name": r.get("range_name"),
-                               "cidr": r.get("ip_cidr_range")})
-        out.append({
-            "folder": folder, "env": env,
-            "network": netvpc.get("network_name", "?"),
-            "subnets": [{"name": s.get("subnet_name"), "cidr": s.get("subnet_ip"),
-                         "region": s.get("subnet_region"),
-                         "private_access": s.get("subnet_private_access"),
-                         "flow_logs": s.get("subnet_flow_logs")}
-                        for s in subnets],
-            "secondary": ranges,
-            "has_nat": bool(netvpc.get("cloud_nats")),
-        })
-
-    for folder, envs in (gcp.get("envs", {}) or {}).items():
-        if not isinstance(envs, dict):
-            continue
-        if "resources" in envs:
-            handle(folder, "-", envs.get("resources") or {})
-            continue
-        for env, envval in envs.items():
-            if isinstance(envval, dict) and "resources" in envval:
-                handle(folder, env, envval.get("resources") or {})
-    return out
+def aws_vpcs(m):
+    """AWS VPC networks of a lib/model model, by env key."""
+    return sorted(m.networks("aws"), key=lambda n: n.env.key)
+
+
+def gcp_networks(m):
+    """GCP Shared VPC networks, in vars.yaml order."""
+    return m.networks("gcp")
+
+
+def _where(n):
+    """(folder, env) of a GCP network; flat folders (envs.{folder}.resources)
+    show env "-"."""
+    return n.env.folder, n.env.name or "-"
 
 
 def render_markdown(avpcs, gnets):
@@ -104,9 +60,9 @@ def render_markdown(avpcs, gnets):
     ]
     for v in avpcs:
         lines.append(
-            f"| {v['env']} | {v['name']} | `{v['cidr']}` | {len(v['azs'])} | "
-            + " | ".join(", ".join(f"`{c}`" for c in v[k]) or "—"
-                         for k in ("private", "public", "database", "intra", "elasticache"))
+            f"| {v.env.key} | {v.name} | `{v.cidr}` | {len(v.azs)} | "
+            + " | ".join(", ".join(f"`{s.cidr}`" for s in v.of_kind(k)) or "—"
+                         for k in model.AWS_SUBNET_KINDS)
             + " |")
     lines += [
         "",
@@ -120,19 +76,19 @@ def render_markdown(avpcs, gnets):
         "|---|---|---|---|---|---|---|---|",
     ]
     for n in gnets:
-        for s in n["subnets"]:
+        for s in n.subnets:
             lines.append(
-                f"| {n['folder']}/{n['env']} | {n['network']} | {s['name']} | "
-                f"`{s['cidr']}` | {s['region']} | "
-                f"{'yes' if s['private_access'] else 'NO'} | "
-                f"{'yes' if s['flow_logs'] else 'NO'} | "
-                f"{'yes' if n['has_nat'] else 'NO'} |")
+                f"| {'/'.join(_where(n))} | {n.name} | {s.name} | "
+                f"`{s.cidr}` | {s.region} | "
+                f"{'yes' if s.private_access else 'NO'} | "
+                f"{'yes' if s.flow_logs else 'NO'} | "
+                f"{'yes' if n.has_nat else 'NO'} |")
     lines += ["", "### GKE secondary ranges", "",
               "| Folder/Env | Subnet | Range | CIDR |", "|---|---|---|---|"]
     for n in gnets:
-        for r in n["secondary"]:
-            lines.append(f"| {n['folder']}/{n['env']} | {r['subnet']} | "
-                         f"{r['name']} | `{r['cidr']}` |")
+        for r in n.secondary:
+            lines.append(f"| {'/'.join(_where(n))} | {r.parent} | "
+                         f"{r.name} | `{r.cidr}` |")
     lines += ["", rp.staleness_trailer(SOURCES), ""]
     return "\n".join(lines) + "\n"
 
@@ -142,21 +98,21 @@ def render_mermaid(avpcs, gnets):
     lines.append('    subgraph AWS["AWS Landing Zone"]')
     lines.append('        TGW[Transit Gateway]')
     for v in avpcs:
-        node = v["env"].replace("-", "_")
-        lines.append(f'        {node}["{v["name"]}<br/>{v["cidr"]}"]')
+        node = v.env.key.replace("-", "_")
+        lines.append(f'        {node}["{v.name}<br/>{v.cidr}"]')
         lines.append(f"        TGW --- {node}")
     lines.append("    end")
     lines.append('    subgraph GCP["GCP Landing Zone"]')
-    shared = [n for n in gnets if n["folder"] == "shrd"]
-    others = [n for n in gnets if n["folder"] != "shrd"]
+    shared = [n for n in gnets if n.env.folder == "shrd"]
+    others = [n for n in gnets if n.env.folder != "shrd"]
     for n in shared:
-        node = f'g_{n["folder"]}_{n["env"]}'.replace("-", "_")
-        lines.append(f'        {node}["shrd/{n["env"]}: {n["network"]}"]')
+        node = "g_{}_{}".format(*_where(n)).replace("-", "_")
+        lines.append(f'        {node}["shrd/{_where(n)[1]}: {n.name}"]')
     for n in others:
-        node = f'g_{n["folder"]}_{n["env"]}'.replace("-", "_")
-        lines.append(f'        {node}["{n["folder"]}/{n["env"]}: {n["network"]}"]')
-        peer = f'g_shrd_{"prod" if n["folder"] in ("prod", "stg") else "dev"}'
-        if any(f'g_{s["folder"]}_{s["env"]}' == peer for s in shared):
+        node = "g_{}_{}".format(*_where(n)).replace("-", "_")
+        lines.append(f'        {node}["{"/".join(_where(n))}: {n.name}"]')
+        peer = f'g_shrd_{"prod" if n.env.folder in ("prod", "stg") else "dev"}'
+        if any("g_{}_{}".format(*_where(s)) == peer for s in shared):
             lines.append(f"        {peer} -.peering.- {node}")
     lines.append("    end")
     lines.append(f"    %% generated-from: sha256:{rp.source_hash(SOURCES)}")
@@ -164,10 +120,9 @@ def render_mermaid(avpcs, gnets):
 
 
 def build():
-    aws = loaders.load_aws_vars()
-    gcp = loaders.load_gcp_vars()
-    avpcs = aws_vpcs(aws)
-    gnets = gcp_networks(gcp)
+    m = model.of(loaders.load_aws_vars(), loaders.load_gcp_vars())
+    avpcs = aws_vpcs(m)
+    gnets = gcp_networks(m)
     return render_markdown(avpcs, gnets), render_mermaid(avpcs, gnets)
 
 
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Architecture-score history: record reports per commit, query trends.
+
+Appends ARCHITECTURE_REPORT.json (or --report) to the local score history
+(scripts/lib/history.py, .gate-cache/score-history.sqlite) keyed by the
+current commit, and answers questions over every recorded run:
+
+  trend          overall score, one --check, --category or --metric per commit
+  first-failing  the commit each currently-FAILing check started failing at
+  ratchet        commits below the gate floor or below the commit before
+                 them; exit 1 if any (floor: min_architecture_score in
+                 .github/gate-thresholds.yaml unless --floor)
+
+A working tree with uncommitted changes records as dirty; the latest dirty
+and clean run of a commit are kept apart.
+
+Usage:
+  python3 scripts/architecture-score.py && python3 scripts/score-history.py record
+  python3 scripts/score-history.py trend --limit 10
+  python3 scripts/score-history.py trend --check cidr-overlap
+  python3 scripts/score-history.py first-failing --json
+  python3 scripts/score-history.py ratchet
+
+Controls: SOC2 CC8.1, PCI-DSS 6.4 (change control).
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import git, history, loaders  # noqa: E402
+
+REPO = loaders.REPO_ROOT
+REPORT_JSON = REPO / "ARCHITECTURE_REPORT.json"
+THRESHOLDS = REPO / ".github" / "gate-thresholds.yaml"
+
+
+def head_commit():
+    """(sha, commit time, dirty) of the working tree; the regenerated report
+    itself does not make the tree dirty."""
+    sha, ct = git.run("log", "-1", "--format=%H %ct").split()
+    dirty = bool(git.run("status", "--porcelain", "--untracked-files=no", "--",
+                         ".", f":!{REPORT_JSON.relative_to(REPO).as_posix()}").strip())
+    return sha, int(ct), dirty
+
+
+def gate_floor():
+    if not THRESHOLDS.exists():
+        return None
+    return (loaders.load_vars_yaml(THRESHOLDS) or {}).get("min_architecture_score")
+
+
+def _when(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _rev(row):
+    return row["commit_sha"][:10] + ("+dirty" if row.get("dirty") else "")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", type=Path, default=history.DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="append a report for the current commit")
+    rec.add_argument("--report", type=Path, default=REPORT_JSON)
+    tr = sub.add_parser("trend", help="score per commit (or one check/category)")
+    grp = tr.add_mutually_exclusive_group()
+    grp.add_argument("--check")
+    grp.add_argument("--category")
+    grp.add_argument("--metric", help="e.g. placeholder_tokens (recorded by backfill)")
+    tr.add_argument("--limit", type=int, default=20)
+    ff = sub.add_parser("first-failing", help="where each failing check started failing")
+    ff.add_argument("--check")
+    ra = sub.add_parser("ratchet", help="commits below the floor or below their predecessor")
+    ra.add_argument("--floor", type=float, default=None)
+    for p in (tr, ff, ra):
+        p.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    conn = history.connect(args.db)
+    if args.cmd == "record":
+        try:
+            report = json.loads(args.report.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"FAIL: cannot read report {args.report}: {e}", file=sys.stderr)
+            return 1
+        sha, ct, dirty = head_commit()
+        run_id = history.record(conn, report, sha, ct, dirty)
+        label = sha[:10] + ("+dirty" if dirty else "")
+        print(f"recorded run {run_id} for {label}: score {report['score']}" if run_id
+              else f"unchanged: this report is already recorded for {label}")
+        return 0
+
+    if args.cmd == "trend":
+        rows = history.trend(conn, args.check, args.category, args.limit, args.metric)
+    elif args.cmd == "first-failing":
+        rows = history.first_failing(conn, args.check)
+    else:
+        floor = args.floor if args.floor is not None else gate_floor()
+        rows = history.ratchet_violations(conn, floor)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for r in rows:
+            if args.cmd == "trend" and args.check:
+                print(f"{_rev(r)}  {_when(r['committed_at'])}  {r['status']:<4}  "
+                      f"-{r['score_impact']}")
+            elif args.cmd == "trend" and args.metric:
+                print(f"{_rev(r)}  {_when(r['committed_at'])}  {r['value']:g}")
+            elif args.cmd == "trend" and args.category:
+                print(f"{_rev(r)}  {_when(r['committed_at'])}  -{r['score_impact']}  "
+                      f"({r['fail']}/{r['checks']} FAIL)")
+            elif args.cmd == "trend":
+                print(f"{_rev(r)}  {_when(r['committed_at'])}  {r['score']:>5}  {r['grade']}")
+            elif args.cmd == "first-failing":
+                print(f"{r['check_name']:<28} failing since {r['commit_sha'][:10]} "
+                      f"({_when(r['committed_at'])}, {r['runs_failing']} commits)")
+            else:
+                prev = "" if r["prev_score"] is None else f" (was {r['prev_score']})"
+                print(f"{_rev(r)}  {_when(r['committed_at'])}  {r['score']}{prev}  "
+                      f"{r['reason']}")
+        if not rows:
+            print("(none)")
+    return 1 if args.cmd == "ratchet" and rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,13 +9,11 @@ Controls: PCI-DSS 6.3.2 (code review/scanning), CIS 1.x, SOC2 CC7.1.
 
 import json
 import shutil
-import subprocess
 import sys
-import tempfile
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from lib import loaders  # noqa: E402
+from lib import git, loaders  # noqa: E402
 
 REPO = loaders.REPO_ROOT
 THRESHOLDS = REPO / ".github" / "gate-thresholds.yaml"
@@ -26,14 +24,19 @@ def export_index():
     """Pristine export of the git index (tracked + staged files only), so the
     scan surface is identical locally and in CI. Local terragrunt/terraform
     caches hold vendored module clones that would otherwise dominate results
-    (882 phantom findings measured on a cache-polluted tree)."""
+    (882 phantom findings measured on a cache-polluted tree). checkout-index,
+    not raw blobs (git.materialize), so .gitattributes eol/filter conversion
+    applies exactly as in a checkout."""
+    import tempfile
+
     tmp = Path(tempfile.mkdtemp(prefix="secgate-"))
-    subprocess.run(["git", "checkout-index", "-a", f"--prefix={tmp}/"],
-                   cwd=REPO, check=True)
+    git.run("checkout-index", "-a", f"--prefix={tmp}/")
     return tmp
 
 
 def main():
+    import subprocess
+
     th = loaders.load_vars_yaml(THRESHOLDS)
     fail = False
     scan_root = export_index()
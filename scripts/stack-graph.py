@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Terragrunt stack dependency graph: topological levels, DOT, JSON.
+
+Extracts every `dependency`/`dependencies` edge between stacks in both
+terragrunt trees (scripts/lib/graph.py) and prints the planning order as
+levels — stacks in one level have no edges between them and may be planned
+concurrently. Exit 1 on a dependency cycle.
+
+Usage:
+  python3 scripts/stack-graph.py                    # levels (text)
+  python3 scripts/stack-graph.py --format dot > stacks.dot
+  python3 scripts/stack-graph.py --format json
+  python3 scripts/stack-graph.py --env stg          # stacks of one env only
+
+Controls: SOC2 CC8.1 (ordered, reviewable change execution).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import graph as stackgraph  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--format", choices=["levels", "dot", "json"], default="levels")
+    ap.add_argument("--env", help="keep only stacks whose path has this env segment "
+                                  "(dependencies through other stacks still order them)")
+    args = ap.parse_args()
+
+    g = stackgraph.build_graph()
+    if args.env:
+        g = stackgraph.subgraph(g, lambda n: args.env in n.split("/"))
+
+    if args.format == "dot":
+        print(stackgraph.to_dot(g), end="")
+    elif args.format == "json":
+        print(stackgraph.to_json(g), end="")
+    else:
+        try:
+            levels = stackgraph.topo_levels(g)
+        except stackgraph.CycleError as e:
+            print(f"FAIL: {e}", file=sys.stderr)
+            return 1
+        for i, level in enumerate(levels):
+            print(f"level {i} ({len(level)} stacks):")
+            for n in level:
+                print(f"  {n}")
+        if g["missing"]:
+            print(f"unresolved dependencies ({len(g['missing'])}):")
+            for m in g["missing"]:
+                print(f"  {m['from']} -> {m['config_path']}")
+    cycle = stackgraph.find_cycle(g)
+    if cycle:
+        print(f"FAIL: dependency cycle: {' -> '.join(cycle)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Startup budget for the gate entry points (scripts/*.py).
+
+Pre-commit hooks and CI run several of these per change, on small inputs,
+so interpreter start plus module imports is most of their wall time. Each
+entry point is imported in a fresh interpreter under `python -X importtime`
+(module level only — main() does not run, so no gate executes) and checked
+against two limits:
+
+  - import time: the sum of its top-level imports (cumulative, minimum of
+    --runs probes, bytecode cached under .gate-cache/pycache) must stay under
+    max_startup_import_ms in .github/gate-thresholds.yaml
+  - lazy modules: none of LAZY_MODULES may be imported at module level; they
+    belong inside the function that needs them (yaml is imported by
+    lib/loaders on first parse)
+
+Usage:
+  python3 scripts/startup-budget.py                   # all entry points, exit 1 over budget
+  python3 scripts/startup-budget.py --runs 9 --json
+  python3 scripts/startup-budget.py impact plan-guard # selected entry points
+  python3 scripts/startup-budget.py --budget-ms 40    # override the threshold
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import loaders  # noqa: E402
+
+SCRIPTS = Path(__file__).resolve().parent
+THRESHOLDS = loaders.REPO_ROOT / ".github" / "gate-thresholds.yaml"
+# probes compile into their own bytecode cache (the first probe warms it), so
+# PYTHONDONTWRITEBYTECODE in the caller's environment does not turn every
+# probe into a cold compile
+PYCACHE = loaders.CACHE_DIR / "pycache"
+
+# heavy at import, needed only on some paths
+LAZY_MODULES = ("yaml", "sqlite3", "subprocess", "concurrent.futures", "multiprocessing",
+                "tempfile")
+
+MARKER = "-- startup-budget probe --"
+PROBE = f"""
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("startup_probe", sys.argv[1])
+mod = importlib.util.module_from_spec(spec)
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+spec.loader.exec_module(mod)
+"""
+
+
+def entry_points():
+    return sorted(p.stem for p in SCRIPTS.glob("*.py"))
+
+
+def probe(name):
+    """(top-level import microseconds, [modules imported]) of one import of
+    scripts/<name>.py, counting only what it imports itself."""
+    import subprocess
+
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPYCACHEPREFIX"] = str(PYCACHE)
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE,
+                        str(SCRIPTS / f"{name}.py")], capture_output=True, text=True, env=env)
+    if r.returncode != 0:
+        raise RuntimeError(f"{name}: import failed\n{r.stderr.strip()}")
+    lines = r.stderr.split(MARKER + "\n", 1)[-1].splitlines()
+    total, modules = 0, []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cum, name_field = line[len("import time:"):].split("|")
+        if not cum.strip().isdigit():  # the header line
+            continue
+        modules.append(name_field.strip())
+        if not name_field.startswith("  "):  # top level: cumulative covers its children
+            total += int(cum)
+    return total, modules
+
+
+def measure(name, runs):
+    best, modules = None, []
+    for _ in range(runs):
+        us, modules = probe(name)
+        best = us if best is None else min(best, us)
+    lazy = sorted(m for m in LAZY_MODULES if m in modules)
+    return {"entry_point": name, "import_ms": round(best / 1000, 1),
+            "modules": len(modules), "lazy_violations": lazy}
+
+
+def budget_ms():
+    if not THRESHOLDS.exists():
+        return None
+    return (loaders.load_vars_yaml(THRESHOLDS) or {}).get("max_startup_import_ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("names", nargs="*", help="entry points (default: every scripts/*.py)")
+    ap.add_argument("--runs", type=int, default=5, help="probes per entry point (min is kept)")
+    ap.add_argument("--budget-ms", type=float, default=None)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    names = args.names or entry_points()
+    unknown = [n for n in names if not (SCRIPTS / f"{n}.py").exists()]
+    if unknown:
+        print(f"FAIL: unknown entry point(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    limit = args.budget_ms if args.budget_ms is not None else budget_ms()
+    results = []
+    for n in names:
+        res = measure(n, args.runs)
+        res["over_budget"] = limit is not None and res["import_ms"] > limit
+        results.append(res)
+    failed = [r for r in results if r["over_budget"] or r["lazy_violations"]]
+
+    if args.json:
+        print(json.dumps({"budget_ms": limit, "results": results}, indent=2))
+    else:
+        print(f"{'entry point':<28} {'imports':>9} {'modules':>8}  budget {limit} ms")
+        for r in sorted(results, key=lambda r: -r["import_ms"]):
+            flag = []
+            if r["over_budget"]:
+                flag.append("OVER BUDGET")
+            if r["lazy_violations"]:
+                flag.append("imports at startup: " + ", ".join(r["lazy_violations"]))
+            print(f"{r['entry_point']:<28} {r['import_ms']:>7}ms {r['modules']:>8}  "
+                  f"{'; '.join(flag) or 'ok'}")
+    if failed:
+        print(f"FAIL: {len(failed)} entry point(s) over the startup budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
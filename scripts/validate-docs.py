@@ -9,7 +9,6 @@ the multi-cloud infrastructure repository.
 import os
 import sys
 import re
-import yaml
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 import argparse
@@ -183,6 +182,8 @@ class DocumentationValidator:
                     
     def validate_yaml_docs(self):
         """Validate YAML file documentation"""
+        import yaml
+
         yaml_files = list(self.root_dir.rglob("*.yaml")) + list(self.root_dir.rglob("*.yml"))
         
         for yaml_file in yaml_files:
@@ -340,7 +341,7 @@ def check_staleness(root_dir: str = ".") -> bool:
 
     root = Path(root_dir)
     ok = True
-    current = _rp.source_hash([_ld.AWS_VARS, _ld.GCP_VARS])
+    current = _rp.source_hash([_ld.AWS_VARS, _ld.GCP_VARS], sidecar=_rp.SOURCE_HASH_SIDECAR)
     trailer_re = _re.compile(r"generated-from: sha256:([0-9a-f]{64})")
     for name in ["NETWORK_TOPOLOGY.md", "architecture.mmd", "ARCHITECTURE_SCORECARD.md"]:
         f = root / name
@@ -8,7 +8,6 @@ configurations to ensure compliance with security best practices and standards.
 
 import os
 import sys
-import yaml
 import json
 import glob
 import argparse
@@ -80,6 +79,8 @@ class SecurityValidator:
             
     def validate_aws_vars_file(self, file_path: Path):
         """Validate AWS vars.yaml file for security issues"""
+        import yaml
+
         try:
             with open(file_path, 'r') as f:
                 data = yaml.safe_load(f)
@@ -101,6 +102,8 @@ class SecurityValidator:
             
     def validate_gcp_vars_file(self, file_path: Path):
         """Validate GCP vars.yaml file for security issues"""
+        import yaml
+
         try:
             with open(file_path, 'r') as f:
                 data = yaml.safe_load(f)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Anchor/alias statistics for both vars.yaml files.
+
+Reports, per file, the anchors defined, alias uses per anchor (fan-out), the
+number of composed YAML nodes and the number they expand to once every alias
+is inlined — the size any serialize-the-tree check actually walks. Sizes are
+computed on the composed node graph (scripts/lib/loaders.py), so a
+billion-laughs document is measured without ever being expanded.
+
+Exit 1 if a file expands past the loader's budget (loaders.MAX_EXPANDED_NODES,
+which load_vars_yaml() enforces for every gate).
+
+Usage:
+  python3 scripts/vars-stats.py                # text
+  python3 scripts/vars-stats.py --json
+  python3 scripts/vars-stats.py --top 5        # fan-out rows per file
+
+Controls: SOC2 CC8.1 (consistent change tooling).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from lib import loaders  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--top", type=int, default=10, help="fan-out rows per file (text)")
+    args = ap.parse_args()
+
+    stats, over = {}, []
+    for path in (loaders.AWS_VARS, loaders.GCP_VARS):
+        rel = path.relative_to(loaders.REPO_ROOT).as_posix()
+        try:
+            stats[rel] = loaders.vars_stats(path)
+        except loaders.ExpansionError as e:  # recursive alias
+            stats[rel] = {"error": str(e)}
+            over.append(rel)
+            continue
+        if stats[rel]["expanded_nodes"] > loaders.MAX_EXPANDED_NODES:
+            over.append(rel)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        for rel, st in stats.items():
+            if "error" in st:
+                print(f"{rel}: {st['error']}")
+                continue
+            print(f"{rel}: {st['anchors']} anchors, {st['aliases']} aliases, "
+                  f"{st['nodes']} nodes -> {st['expanded_nodes']} expanded "
+                  f"(x{st['expansion_ratio']})")
+            for anchor, uses in list(st["fan_out"].items())[:args.top]:
+                print(f"  &{anchor:<24} {uses:>5} uses")
+    for rel in over:
+        print(f"FAIL: {rel} exceeds the alias expansion budget "
+              f"({loaders.MAX_EXPANDED_NODES} nodes)", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())